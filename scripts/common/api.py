@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""In-memory render API for Modus theme ports.
+
+For Python services that import ``scripts.common``: render a tool's theme
+for a theme name or an in-memory palette and get the document back as a
+string, as a stream of byte chunks, or for many (tool, palette) pairs at
+once. Rendering goes through the same ``RenderSession`` as ``render``, so
+templates, mappings, specs and named palettes are read once and cached
+(compiled templates and resolved palettes in the shared on-disk cache);
+no output files are written.
+
+Documents are the tool's primary theme file, byte for byte what
+``render`` would write for the same palette. Variants are always rendered
+in full, even for tools whose files inherit from a base theme, and tools
+that write a theme family get the single-theme document each family entry
+is taken from.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Union
+
+from scripts.common import io
+from scripts.common import registry as registry_utils
+from scripts.common import render
+from scripts.common.palette import Palette
+from scripts.common.render import content_hash
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# A theme name from palettes/, or a palette mapping (flat, or with "name" and "palette").
+PaletteInput = Union[str, Mapping[str, Any]]
+
+
+class Renderer:
+    """Render port documents through a shared ``RenderSession``.
+
+    The session caches manifests' templates, mappings, specs, named
+    palettes and rendered documents; the renderer only resolves palette
+    inputs and builds each tool's primary render job. Instances are
+    thread-safe; a service should share one.
+
+    Args:
+        repo_root: Checkout holding ``ports/``, ``mappings/`` and ``palettes/``.
+        cache_size: How many in-memory palettes and rendered documents to keep.
+    """
+
+    def __init__(self, repo_root: Path = REPO_ROOT, cache_size: int = 256) -> None:
+        self.repo_root = repo_root
+        self.cache_size = cache_size
+        self._registry: dict[str, dict[str, Any]] | None = None
+        self._adhoc: dict[str, Palette] = {}
+        self._lock = threading.Lock()
+        palette_paths = {path.stem: path for path in (repo_root / "palettes").glob("*.json")}
+        self.session = render.RenderSession(palette_paths, cache_size)
+
+    @property
+    def registry(self) -> dict[str, dict[str, Any]]:
+        if self._registry is None:
+            self._registry = registry_utils.load_registry(self.repo_root)
+        return self._registry
+
+    def tools(self) -> list[str]:
+        """List the tools that can be rendered."""
+        return sorted(self.registry)
+
+    def themes(self) -> list[str]:
+        """List the theme names available from ``palettes/``."""
+        return sorted(self.session.palette_paths)
+
+    def palette(self, palette: PaletteInput, theme_name: str | None = None) -> tuple[str, Palette, str]:
+        """Resolve a theme name or palette mapping.
+
+        Args:
+            palette: Theme name, or a palette mapping whose values may alias
+                other keys.
+            theme_name: Name for an in-memory palette (required unless the
+                mapping carries a ``name``).
+
+        Returns:
+            (theme name, resolved palette, content hash).
+
+        Raises:
+            KeyError: If a named theme does not exist.
+            ValueError: If an in-memory palette has no name or is invalid.
+        """
+        if isinstance(palette, str):
+            if palette not in self.session.palette_paths:
+                raise KeyError(f"Unknown theme: {palette}")
+            return (palette, *self.session.palette_entry(palette))
+
+        if isinstance(palette, Palette):
+            name = theme_name or palette.name
+            values: Mapping[str, Any] = palette
+        elif isinstance(palette.get("palette"), Mapping):
+            name = theme_name or palette.get("name")
+            values = palette["palette"]
+        else:
+            name = theme_name
+            values = palette
+        if not name:
+            raise ValueError("theme_name is required for an in-memory palette")
+        digest = content_hash(name + "\0" + json.dumps(dict(values), sort_keys=True))
+        resolved = self._adhoc.get(digest)
+        if resolved is None:
+            resolved = values if isinstance(values, Palette) else Palette(io.resolve_palette(dict(values)), name)
+            with self._lock:
+                self._adhoc[digest] = resolved
+                while len(self._adhoc) > self.cache_size:
+                    del self._adhoc[next(iter(self._adhoc))]
+        return name, resolved, digest
+
+    def _path(self, manifest: dict[str, Any], value: str) -> Path:
+        return Path(manifest.get("_root", self.repo_root)) / value
+
+    def job(self, tool: str, palette: PaletteInput, theme_name: str | None = None) -> dict[str, Any]:
+        """Return the render job of a tool's primary theme file for a palette."""
+        name, resolved, digest = self.palette(palette, theme_name)
+        manifest = registry_utils.get_tool(self.registry, tool)
+        mapping_path = manifest.get("mapping_path")
+        if not mapping_path:
+            raise ValueError(f"mapping_path missing in manifest for {tool}")
+        if manifest.get("spec_path"):
+            kind, source = "spec", manifest["spec_path"]
+        elif manifest.get("template_path"):
+            kind, source = "template", manifest["template_path"]
+        else:
+            raise ValueError(f"No spec_path or template_path for {tool}")
+        return {
+            "tool": tool,
+            "theme": name,
+            "kind": kind,
+            "source": self._path(manifest, source),
+            "mapping_path": self._path(manifest, mapping_path),
+            "mapping_overlays": registry_utils.mapping_overlays(manifest, name),
+            "palette": (resolved, digest),
+            "output_path": None,
+        }
+
+    def render(self, tool: str, palette: PaletteInput, theme_name: str | None = None) -> str:
+        """Render a tool's theme document.
+
+        Args:
+            tool: Tool name from the registry.
+            palette: Theme name or in-memory palette (see ``palette``).
+            theme_name: Name for an in-memory palette.
+
+        Returns:
+            The rendered document, ending in a newline.
+        """
+        content = self.session.render(self.job(tool, palette, theme_name))
+        return content if content.endswith("\n") else content + "\n"
+
+    def iter_render(
+        self,
+        tool: str,
+        palette: PaletteInput,
+        theme_name: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Render a tool's theme document as UTF-8 chunks of ``chunk_size`` bytes.
+
+        Only the last chunk may be shorter, and a multi-byte character may
+        span two chunks. Template ports are rendered as they stream; the
+        finished document is cached like ``render``'s.
+        """
+        buffer = bytearray()
+        last = ""
+        for text in self.session.iter_render(self.job(tool, palette, theme_name), chunk_size):
+            if not text:
+                continue
+            last = text[-1]
+            buffer += text.encode("utf-8")
+            whole = len(buffer) - len(buffer) % chunk_size
+            for start in range(0, whole, chunk_size):
+                yield bytes(buffer[start:start + chunk_size])
+            del buffer[:whole]
+        if last != "\n":
+            buffer += b"\n"
+        for start in range(0, len(buffer), chunk_size):
+            yield bytes(buffer[start:start + chunk_size])
+
+    def render_many(
+        self,
+        requests: Iterable[tuple[str, PaletteInput]],
+        max_workers: int | None = None,
+    ) -> list[str]:
+        """Render many (tool, palette) pairs concurrently.
+
+        In-memory palettes must carry a ``name``. Jobs are keyed up front so
+        every input is cached before rendering in parallel.
+
+        Returns:
+            Documents in request order.
+        """
+        jobs = [self.job(tool, palette) for tool, palette in requests]
+        for job in jobs:
+            self.session.job_key(job)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            contents = list(pool.map(self.session.render, jobs))
+        return [content if content.endswith("\n") else content + "\n" for content in contents]
+
+
+@lru_cache(maxsize=1)
+def default_renderer() -> Renderer:
+    """Return the shared renderer for this checkout."""
+    return Renderer()
+
+
+def render_document(tool: str, palette: PaletteInput, theme_name: str | None = None) -> str:
+    """Render a tool's theme document with the shared renderer."""
+    return default_renderer().render(tool, palette, theme_name)
+
+
+def iter_document(
+    tool: str,
+    palette: PaletteInput,
+    theme_name: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Stream a tool's theme document with the shared renderer."""
+    return default_renderer().iter_render(tool, palette, theme_name, chunk_size)
+
+
+def render_batch(requests: Iterable[tuple[str, PaletteInput]], max_workers: int | None = None) -> list[str]:
+    """Render many (tool, palette) pairs with the shared renderer."""
+    return default_renderer().render_many(requests, max_workers)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Export bundles for provisioning machines without a checkout.
+
+A bundle is a gzipped tar holding:
+
+- ``bundle.json``: format version and the tools it contains,
+- ``tools/<tool>.json``: the tool's ``install_targets`` and its
+  installable units (a theme file or directory, with its theme, ledger
+  hash and the content hash of every file in it). The targets are only
+  informational: ``import`` installs where the local manifest says,
+- ``objects/<sha256>``: each distinct file content once, since outputs
+  shared between tools would otherwise be stored repeatedly.
+
+Members are sorted and carry no timestamps or owners, so identical
+outputs always produce a byte-identical bundle. Manifests precede
+objects, so ``import`` can place every object in its destinations as the
+archive streams past, reading it once from start to end.
+
+Bundles are untrusted input: tool names and unit and file paths must be
+plain relative names, and every file must land inside its unit.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io as stdio
+import json
+import re
+import tarfile
+from collections.abc import Callable
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, NamedTuple
+
+from scripts.common import cache
+from scripts.common import ledger
+
+BUNDLE_VERSION = 1
+
+_CHUNK_SIZE = 1 << 16
+
+_TOOL_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+class Unit(NamedTuple):
+    """An installable theme file or directory, installed as ``path``."""
+
+    path: str
+    theme: str | None
+    source: Path
+
+
+def file_hash(path: Path) -> str:
+    """Return the SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _unit_files(source: Path) -> list[tuple[str, Path]]:
+    # (path within the unit, file) pairs; "" for a file unit.
+    if source.is_dir():
+        return [(path.relative_to(source).as_posix(), path) for path in sorted(source.rglob("*")) if path.is_file()]
+    return [("", source)]
+
+
+def _check_path(value: Any, what: str) -> None:
+    # Unit and file paths come from the bundle and must stay relative.
+    if not isinstance(value, str) or "\\" in value:
+        raise ValueError(f"Unsafe {what} in bundle: {value!r}")
+    path = PurePosixPath(value)
+    if path.is_absolute() or ".." in path.parts:
+        raise ValueError(f"Unsafe {what} in bundle: {value!r}")
+
+
+def check_manifest(name: str, manifest: Any) -> None:
+    """Validate a tool manifest read from the bundle member ``name``.
+
+    Raises:
+        ValueError: If the tool name does not match the member, or any
+            unit or file path is absolute or contains ``..``.
+    """
+    tool = manifest.get("tool") if isinstance(manifest, dict) else None
+    if not isinstance(tool, str) or not _TOOL_NAME_RE.fullmatch(tool) or name != f"tools/{tool}.json":
+        raise ValueError(f"Unsafe tool name in bundle: {tool!r}")
+    for unit in manifest.get("units", []):
+        _check_path(unit.get("path"), "unit path")
+        if not unit["path"]:
+            raise ValueError("Unsafe unit path in bundle: ''")
+        for entry in unit.get("files", []):
+            _check_path(entry.get("path"), "file path")
+
+
+def _inside(path: Path, root: Path) -> bool:
+    resolved = path.resolve()
+    return resolved == root or root in resolved.parents
+
+
+def _tarinfo(name: str, size: int) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mode = 0o644
+    info.mtime = 0
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    return info
+
+
+def _add_bytes(archive: tarfile.TarFile, name: str, data: bytes) -> None:
+    archive.addfile(_tarinfo(name, len(data)), stdio.BytesIO(data))
+
+
+def _json_bytes(data: Any) -> bytes:
+    return (json.dumps(data, indent=2, sort_keys=True) + "\n").encode("utf-8")
+
+
+def write_bundle(out: BinaryIO, tools: dict[str, tuple[list[str], list[Unit]]]) -> tuple[int, int]:
+    """Stream a bundle of the given tools to a binary file object.
+
+    Args:
+        out: Writable binary stream; only written sequentially.
+        tools: Per tool, its ``install_targets`` and installable units.
+
+    Returns:
+        (number of files, number of distinct objects).
+    """
+    objects: dict[str, Path] = {}
+    manifests: dict[str, dict[str, Any]] = {}
+    files = 0
+    for tool, (install_targets, units) in sorted(tools.items()):
+        entries = []
+        for unit in sorted(units):
+            unit_files = []
+            for rel, path in _unit_files(unit.source):
+                digest = file_hash(path)
+                objects.setdefault(digest, path)
+                unit_files.append({"path": rel, "sha256": digest})
+            files += len(unit_files)
+            entries.append(
+                {"path": unit.path, "theme": unit.theme, "hash": ledger.content_hash(unit.source), "files": unit_files}
+            )
+        manifests[tool] = {"tool": tool, "install_targets": install_targets, "units": entries}
+
+    # NOTE: mtime=0 and an empty file name keep the gzip header deterministic.
+    with gzip.GzipFile(filename="", mode="wb", fileobj=out, mtime=0) as compressed:
+        with tarfile.open(fileobj=compressed, mode="w|", format=tarfile.PAX_FORMAT) as archive:
+            _add_bytes(archive, "bundle.json", _json_bytes({"version": BUNDLE_VERSION, "tools": sorted(manifests)}))
+            for tool, manifest in sorted(manifests.items()):
+                _add_bytes(archive, f"tools/{tool}.json", _json_bytes(manifest))
+            for digest, path in sorted(objects.items()):
+                with path.open("rb") as handle:
+                    archive.addfile(_tarinfo(f"objects/{digest}", path.stat().st_size), handle)
+    return files, len(objects)
+
+
+def read_bundle(source: BinaryIO, place: Callable[[dict[str, Any]], dict[str, Path]]) -> int:
+    """Extract a bundle from a binary stream in a single pass.
+
+    Args:
+        source: Readable binary stream; only read sequentially.
+        place: Called with each validated tool manifest before any object
+            arrives; returns the destination of each unit (by unit path)
+            whose files should be written. Other units are left alone.
+
+    Returns:
+        Number of files written.
+
+    Raises:
+        ValueError: If the stream is not a bundle, an object is corrupt or
+            missing, or a path would be written outside its unit.
+    """
+    targets: dict[str, list[Path]] = {}
+    written = 0
+    try:
+        with tarfile.open(fileobj=source, mode="r|gz") as archive:
+            for member in archive:
+                name = member.name
+                if name == "bundle.json":
+                    header = json.load(archive.extractfile(member))
+                    if header.get("version") != BUNDLE_VERSION:
+                        raise ValueError(f"Unsupported bundle version: {header.get('version')}")
+                elif name.startswith("tools/"):
+                    manifest = json.load(archive.extractfile(member))
+                    check_manifest(name, manifest)
+                    destinations = place(manifest)
+                    for unit in manifest["units"]:
+                        dest = destinations.get(unit["path"])
+                        if dest is None:
+                            continue
+                        root = dest.resolve()
+                        for entry in unit["files"]:
+                            path = dest / entry["path"] if entry["path"] else dest
+                            if not _inside(path, root):
+                                raise ValueError(f"Bundle path escapes {dest}: {entry['path']}")
+                            targets.setdefault(entry["sha256"], []).append(path)
+                elif name.startswith("objects/"):
+                    digest = name[len("objects/"):]
+                    paths = targets.pop(digest, None)
+                    if paths is None:
+                        continue
+                    data = archive.extractfile(member).read()
+                    if hashlib.sha256(data).hexdigest() != digest:
+                        raise ValueError(f"Corrupt object in bundle: {digest}")
+                    for path in paths:
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        cache.atomic_write_bytes(path, data)
+                    written += len(paths)
+    except (tarfile.TarError, EOFError, gzip.BadGzipFile) as exc:
+        raise ValueError(f"Not a valid bundle: {exc}") from None
+    if targets:
+        raise ValueError(f"Bundle is missing {len(targets)} object(s)")
+    return written
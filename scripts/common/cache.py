@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Process-safe shared cache and output locks for Modus theme ports.
+
+Several ``modus.py`` processes may run on one checkout at once (CI runs
+one per tool). Outputs shared between tools are written under a
+per-path advisory lock, and resolved palettes and compiled templates are
+kept in a content-addressed cache under
+``$XDG_CACHE_HOME/modus-themes-ports/shared-v<N>/``. A process that finds
+an entry missing takes that entry's lock, so concurrent processes wait
+for one build instead of repeating it.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from scripts.common import paths
+
+CACHE_VERSION = 2
+
+
+def cache_dir() -> Path:
+    """Return the cache directory shared by all commands."""
+    return paths.xdg_cache_home() / "modus-themes-ports"
+
+
+def _acquire(lock_path: Path) -> int:
+    # A waiter may wake holding a lock file its previous holder has already
+    # removed; it then retries on the current file, so holders never overlap.
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            held = os.fstat(fd)
+            current = os.stat(lock_path)
+            if (held.st_dev, held.st_ino) == (current.st_dev, current.st_ino):
+                return fd
+        except FileNotFoundError:
+            pass
+        except BaseException:
+            os.close(fd)
+            raise
+        os.close(fd)
+
+
+def _release(lock_path: Path, fd: int) -> None:
+    # Lock files are removed while still held, so the cache does not fill
+    # up with one per entry or output ever locked.
+    try:
+        lock_path.unlink(missing_ok=True)
+    except OSError:
+        pass
+    os.close(fd)
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on ``lock_path``, removed on release."""
+    fd = _acquire(lock_path)
+    try:
+        yield
+    finally:
+        _release(lock_path, fd)
+
+
+@contextmanager
+def output_lock(path: Path) -> Iterator[None]:
+    """Lock an output path against writers in other processes.
+
+    Lock files live in the cache directory, named by a hash of the
+    absolute output path, so the tree itself stays clean. If that
+    directory is not writable (read-only home, sandboxes) the write goes
+    ahead unlocked; it is still atomic.
+    """
+    digest = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()[:24]
+    lock_path = cache_dir() / "locks" / f"{digest}.lock"
+    try:
+        fd = _acquire(lock_path)
+    except OSError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        _release(lock_path, fd)
+
+
+_umask: int | None = None
+_umask_lock = threading.Lock()
+
+
+def _process_umask() -> int:
+    # Read on first use. Linux reports the umask in /proc; elsewhere it can
+    # only be queried by setting it, which briefly changes it process-wide.
+    global _umask
+    with _umask_lock:
+        if _umask is None:
+            try:
+                with open("/proc/self/status", encoding="ascii") as handle:
+                    _umask = next(int(line.split()[1], 8) for line in handle if line.startswith("Umask:"))
+            except (OSError, StopIteration, ValueError, IndexError):
+                _umask = os.umask(0o022)
+                os.umask(_umask)
+        return _umask
+
+
+def replacement_mode(path: Path) -> int:
+    """Return the mode for a file about to replace ``path``.
+
+    An existing file keeps its mode; a new one gets the default ``0o666``
+    less the umask, as ``open`` would give it.
+    """
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_process_umask()
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file through a temporary sibling and ``os.replace``.
+
+    The file keeps its mode, or gets the umask default if it is new.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.chmod(tmp, replacement_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class DiskCache:
+    """Content-addressed JSON cache shared by concurrent processes.
+
+    Entries are keyed by (namespace, key), where the key is a hash of
+    everything the value depends on; entries are never invalidated, only
+    superseded by new keys.
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory or cache_dir() / f"shared-v{CACHE_VERSION}"
+
+    def _path(self, namespace: str, key: str) -> Path:
+        return self.directory / namespace / key[:2] / f"{key}.json"
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        """Return a cached value, or None if absent or unreadable."""
+        try:
+            return json.loads(self._path(namespace, key).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def get_or_build(self, namespace: str, key: str, build: Callable[[], Any]) -> Any:
+        """Return a cached value, building and storing it under a lock if missing.
+
+        If the cache directory is not writable the value is built and
+        returned without being stored.
+        """
+        value = self.get(namespace, key)
+        if value is not None:
+            return value
+        path = self._path(namespace, key)
+        try:
+            with file_lock(path.with_suffix(".lock")):
+                value = self.get(namespace, key)
+                if value is None:
+                    value = build()
+                    atomic_write_bytes(path, json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        except OSError:
+            if value is None:
+                value = build()
+        return value
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Color space conversions and perceptual color differences.
+
+Conversions work on batches of (r, g, b) tuples with 0-255 channels and
+use lookup tables for sRGB linearization, so converting every color of
+many palettes costs a handful of multiplications per color.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+
+def _linearize(value: int) -> float:
+    srgb = value / 255
+    if srgb <= 0.04045:
+        return srgb / 12.92
+    return ((srgb + 0.055) / 1.055) ** 2.4
+
+
+# Linear-light sRGB channel values, indexed by 0-255 channel value.
+SRGB_TO_LINEAR = tuple(_linearize(value) for value in range(256))
+
+# D65 reference white for CIELAB.
+_WHITE_X = 0.95047
+_WHITE_Y = 1.0
+_WHITE_Z = 1.08883
+
+_LAB_EPSILON = 216 / 24389
+_LAB_KAPPA = 24389 / 27
+
+
+def linear_rgb(rgb: tuple[int, int, int]) -> tuple[float, float, float]:
+    """Convert 0-255 sRGB channels to linear-light 0-1 values."""
+    r, g, b = rgb
+    return SRGB_TO_LINEAR[r], SRGB_TO_LINEAR[g], SRGB_TO_LINEAR[b]
+
+
+def _delinearize(value: float) -> int:
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return round(value * 12.92 * 255)
+    return round((1.055 * value ** (1 / 2.4) - 0.055) * 255)
+
+
+def mix_rgb(
+    rgb1: tuple[int, int, int],
+    rgb2: tuple[int, int, int],
+    amount: float,
+) -> tuple[int, int, int]:
+    """Blend two 0-255 sRGB colors in linear light.
+
+    ``amount`` is the share of ``rgb2``: 0 gives ``rgb1``, 1 gives ``rgb2``.
+    """
+    return tuple(
+        _delinearize(SRGB_TO_LINEAR[a] + (SRGB_TO_LINEAR[b] - SRGB_TO_LINEAR[a]) * amount)
+        for a, b in zip(rgb1, rgb2)
+    )
+
+
+def _lab_f(t: float) -> float:
+    if t > _LAB_EPSILON:
+        return t ** (1 / 3)
+    return (_LAB_KAPPA * t + 16) / 116
+
+
+def linear_to_lab(linear: tuple[float, float, float]) -> tuple[float, float, float]:
+    """Convert linear-light sRGB to CIELAB (D65)."""
+    r, g, b = linear
+    x = (0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / _WHITE_X
+    y = (0.2126729 * r + 0.7151522 * g + 0.0721750 * b) / _WHITE_Y
+    z = (0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / _WHITE_Z
+    fx, fy, fz = _lab_f(x), _lab_f(y), _lab_f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def rgb_to_lab(rgb: tuple[int, int, int]) -> tuple[float, float, float]:
+    """Convert 0-255 sRGB channels to CIELAB (D65)."""
+    return linear_to_lab(linear_rgb(rgb))
+
+
+def linear_to_oklab(linear: tuple[float, float, float]) -> tuple[float, float, float]:
+    """Convert linear-light sRGB to OKLab.
+
+    See: https://bottosson.github.io/posts/oklab/
+    """
+    r, g, b = linear
+    l_ = (0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b) ** (1 / 3)
+    m_ = (0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b) ** (1 / 3)
+    s_ = (0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b) ** (1 / 3)
+    return (
+        0.2104542553 * l_ + 0.7936177850 * m_ - 0.0040720468 * s_,
+        1.9779984951 * l_ - 2.4285922050 * m_ + 0.4505937099 * s_,
+        0.0259040371 * l_ + 0.7827717662 * m_ - 0.8086757660 * s_,
+    )
+
+
+def rgb_to_oklab(rgb: tuple[int, int, int]) -> tuple[float, float, float]:
+    """Convert 0-255 sRGB channels to OKLab."""
+    return linear_to_oklab(linear_rgb(rgb))
+
+
+def rgb_to_lab_batch(colors: Iterable[tuple[int, int, int]]) -> list[tuple[float, float, float]]:
+    """Convert many sRGB colors to CIELAB, converting each distinct color once."""
+    cache: dict[tuple[int, int, int], tuple[float, float, float]] = {}
+    result: list[tuple[float, float, float]] = []
+    for rgb in colors:
+        lab = cache.get(rgb)
+        if lab is None:
+            lab = cache[rgb] = rgb_to_lab(rgb)
+        result.append(lab)
+    return result
+
+
+def delta_e_2000(
+    lab1: tuple[float, float, float],
+    lab2: tuple[float, float, float],
+) -> float:
+    """Calculate the CIEDE2000 color difference between two CIELAB colors.
+
+    See: Sharma, Wu, Dalal (2005), "The CIEDE2000 Color-Difference Formula".
+    """
+    l1, a1, b1 = lab1
+    l2, a2, b2 = lab2
+
+    c_bar = (math.hypot(a1, b1) + math.hypot(a2, b2)) / 2
+    c_bar7 = c_bar**7
+    g = 0.5 * (1 - math.sqrt(c_bar7 / (c_bar7 + 25**7)))
+    a1p = a1 * (1 + g)
+    a2p = a2 * (1 + g)
+    c1p = math.hypot(a1p, b1)
+    c2p = math.hypot(a2p, b2)
+    h1p = math.degrees(math.atan2(b1, a1p)) % 360 if c1p else 0.0
+    h2p = math.degrees(math.atan2(b2, a2p)) % 360 if c2p else 0.0
+
+    dlp = l2 - l1
+    dcp = c2p - c1p
+    if c1p * c2p == 0:
+        dhp = 0.0
+    else:
+        dhp = h2p - h1p
+        if dhp > 180:
+            dhp -= 360
+        elif dhp < -180:
+            dhp += 360
+    dhp_big = 2 * math.sqrt(c1p * c2p) * math.sin(math.radians(dhp / 2))
+
+    lp_bar = (l1 + l2) / 2
+    cp_bar = (c1p + c2p) / 2
+    if c1p * c2p == 0:
+        hp_bar = h1p + h2p
+    elif abs(h1p - h2p) <= 180:
+        hp_bar = (h1p + h2p) / 2
+    elif h1p + h2p < 360:
+        hp_bar = (h1p + h2p + 360) / 2
+    else:
+        hp_bar = (h1p + h2p - 360) / 2
+
+    t = (
+        1
+        - 0.17 * math.cos(math.radians(hp_bar - 30))
+        + 0.24 * math.cos(math.radians(2 * hp_bar))
+        + 0.32 * math.cos(math.radians(3 * hp_bar + 6))
+        - 0.20 * math.cos(math.radians(4 * hp_bar - 63))
+    )
+    d_theta = 30 * math.exp(-(((hp_bar - 275) / 25) ** 2))
+    cp_bar7 = cp_bar**7
+    r_c = 2 * math.sqrt(cp_bar7 / (cp_bar7 + 25**7))
+    s_l = 1 + (0.015 * (lp_bar - 50) ** 2) / math.sqrt(20 + (lp_bar - 50) ** 2)
+    s_c = 1 + 0.045 * cp_bar
+    s_h = 1 + 0.015 * cp_bar * t
+    r_t = -math.sin(math.radians(2 * d_theta)) * r_c
+
+    dl = dlp / s_l
+    dc = dcp / s_c
+    dh = dhp_big / s_h
+    return math.sqrt(max(0.0, dl * dl + dc * dc + dh * dh + r_t * dc * dh))
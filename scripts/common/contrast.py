@@ -7,6 +7,12 @@ minimum contrast ratio of 7:1 for normal text.
 
 from __future__ import annotations
 
+from collections.abc import Mapping
+
+from scripts.common.color import SRGB_TO_LINEAR
+from scripts.common.metrics import PaletteMetrics
+from scripts.common.palette import Palette
+
 
 def hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
     """Convert a hex color string to RGB tuple.
@@ -36,19 +42,19 @@ def relative_luminance(hex_color: str) -> float:
     Returns:
         Relative luminance value between 0 and 1.
     """
-    r, g, b = hex_to_rgb(hex_color)
+    return rgb_luminance(hex_to_rgb(hex_color))
 
-    def channel_luminance(value: int) -> float:
-        srgb = value / 255
-        if srgb <= 0.04045:
-            return srgb / 12.92
-        return ((srgb + 0.055) / 1.055) ** 2.4
 
-    r_lum = channel_luminance(r)
-    g_lum = channel_luminance(g)
-    b_lum = channel_luminance(b)
+def rgb_luminance(rgb: tuple[int, int, int]) -> float:
+    """Calculate relative luminance for an (r, g, b) tuple of 0-255 values."""
+    r, g, b = rgb
+    return 0.2126 * SRGB_TO_LINEAR[r] + 0.7152 * SRGB_TO_LINEAR[g] + 0.0722 * SRGB_TO_LINEAR[b]
 
-    return 0.2126 * r_lum + 0.7152 * g_lum + 0.0722 * b_lum
+
+def _ratio(lum1: float, lum2: float) -> float:
+    lighter = max(lum1, lum2)
+    darker = min(lum1, lum2)
+    return (lighter + 0.05) / (darker + 0.05)
 
 
 def contrast_ratio(fg_color: str, bg_color: str) -> float:
@@ -63,13 +69,7 @@ def contrast_ratio(fg_color: str, bg_color: str) -> float:
     Returns:
         Contrast ratio between 1:1 and 21:1.
     """
-    lum1 = relative_luminance(fg_color)
-    lum2 = relative_luminance(bg_color)
-
-    lighter = max(lum1, lum2)
-    darker = min(lum1, lum2)
-
-    return (lighter + 0.05) / (darker + 0.05)
+    return _ratio(relative_luminance(fg_color), relative_luminance(bg_color))
 
 
 # WCAG compliance thresholds
@@ -94,10 +94,19 @@ def meets_wcag_aaa(fg_color: str, bg_color: str) -> bool:
     return contrast_ratio(fg_color, bg_color) >= WCAG_AAA_NORMAL
 
 
+def _luminance(palette: Mapping[str, str], key: str, metrics: PaletteMetrics | None) -> float:
+    if metrics is not None and key in metrics:
+        return metrics.luminance(key)
+    if isinstance(palette, Palette):
+        return rgb_luminance(palette.rgb(key))
+    return relative_luminance(palette[key][:7])
+
+
 def validate_palette_contrast(
-    palette: dict[str, str],
+    palette: Mapping[str, str],
     bg_key: str = "bg-main",
     fg_keys: list[str] | None = None,
+    metrics: PaletteMetrics | None = None,
 ) -> list[str]:
     """Validate that foreground colors have sufficient contrast with background.
 
@@ -105,6 +114,8 @@ def validate_palette_contrast(
         palette: Resolved palette dictionary.
         bg_key: Key for the background color.
         fg_keys: List of foreground keys to check (defaults to common ones).
+        metrics: Precomputed metrics of the palette, read instead of
+            converting its colors.
 
     Returns:
         List of warning messages for colors that don't meet WCAG AAA.
@@ -127,12 +138,15 @@ def validate_palette_contrast(
     if not bg_color or not bg_color.startswith("#"):
         return [f"Background key '{bg_key}' not found or invalid"]
 
+    bg_lum = _luminance(palette, bg_key, metrics)
+
     for key in fg_keys:
         fg_color = palette.get(key)
         if not fg_color or not fg_color.startswith("#"):
             continue
 
-        ratio = contrast_ratio(fg_color, bg_color)
+        fg_lum = _luminance(palette, key, metrics)
+        ratio = _ratio(fg_lum, bg_lum)
         if ratio < WCAG_AAA_NORMAL:
             warnings.append(
                 f"{key} ({fg_color}) on {bg_key} ({bg_color}): "
@@ -140,3 +154,56 @@ def validate_palette_contrast(
             )
 
     return warnings
+
+
+def validate_blend_contrast(
+    palette: Mapping[str, str],
+    blends: Mapping[str, str],
+    bg_key: str = "bg-main",
+    fg_key: str = "fg-main",
+    metrics: PaletteMetrics | None = None,
+) -> list[str]:
+    """Validate colors derived by blend tokens against the main colors.
+
+    Translucent colors are overlays: they are composited over the
+    background, channel by channel in sRGB as applications blend them, and
+    the result is checked under the foreground. Opaque colors closer to
+    the background than to the foreground are checked the same way; the
+    rest are checked as foregrounds on the background.
+
+    Args:
+        palette: Resolved palette dictionary.
+        blends: Blended ``#RRGGBB`` or ``#RRGGBBAA`` colors keyed by token.
+        bg_key: Key for the background color.
+        fg_key: Key for the foreground color.
+        metrics: Precomputed metrics of the palette.
+
+    Returns:
+        List of warning messages for colors that don't meet WCAG AAA.
+    """
+    bg_color = palette.get(bg_key)
+    fg_color = palette.get(fg_key)
+    if not bg_color or not bg_color.startswith("#") or not fg_color or not fg_color.startswith("#"):
+        return [f"Keys '{bg_key}'/'{fg_key}' not found or invalid"]
+
+    bg_lum = _luminance(palette, bg_key, metrics)
+    fg_lum = _luminance(palette, fg_key, metrics)
+    bg_rgb = hex_to_rgb(bg_color[:7])
+    warnings: list[str] = []
+    for token, color in blends.items():
+        rgb = hex_to_rgb(color[:7])
+        overlay = len(color) == 9
+        if overlay:
+            alpha = int(color[7:9], 16) / 255
+            rgb = tuple(round(alpha * value + (1 - alpha) * base) for value, base in zip(rgb, bg_rgb))
+        lum = rgb_luminance(rgb)
+        if overlay or _ratio(lum, bg_lum) < _ratio(lum, fg_lum):
+            ratio = _ratio(fg_lum, lum)
+            shown = f"{color} over {bg_key}" if overlay else color
+            label = f"{fg_key} ({fg_color}) on {token} ({shown})"
+        else:
+            ratio = _ratio(lum, bg_lum)
+            label = f"{token} ({color}) on {bg_key} ({bg_color})"
+        if ratio < WCAG_AAA_NORMAL:
+            warnings.append(f"{label}: ratio {ratio:.2f}:1 < 7:1 (WCAG AAA)")
+    return warnings
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Color-vision-deficiency simulation and distinguishability audit.
+
+Colors are simulated with the Machado, Oliveira and Fernandes (2009)
+full-severity matrices in linear RGB, then compared with CIEDE2000 to
+find semantic color pairs that collapse under a deficiency.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from itertools import combinations
+from typing import Any
+
+from scripts.common import color
+from scripts.common.palette import Palette
+
+# Machado et al. (2009), severity 1.0, applied to linear RGB.
+SIMULATIONS: dict[str, tuple[tuple[float, float, float], ...]] = {
+    "protanopia": (
+        (0.152286, 1.052583, -0.204868),
+        (0.114503, 0.786281, 0.099216),
+        (-0.003882, -0.048116, 1.051998),
+    ),
+    "deuteranopia": (
+        (0.367322, 0.860646, -0.227968),
+        (0.280085, 0.672501, 0.047413),
+        (-0.011820, 0.042940, 0.968881),
+    ),
+    "tritanopia": (
+        (1.255528, -0.076749, -0.178779),
+        (-0.078411, 0.930809, 0.147602),
+        (0.004733, 0.691367, 0.303900),
+    ),
+}
+
+# Pairs with CIEDE2000 below this under simulation count as collapsed.
+DEFAULT_THRESHOLD = 5.0
+
+# Palette variants and the deficiencies they are designed for.
+TARGETS: dict[str, tuple[str, ...]] = {
+    "deuteranopia": ("deuteranopia", "protanopia"),
+    "tritanopia": ("tritanopia",),
+}
+
+# Semantic key groups whose members must stay distinguishable. Modus has
+# no success key: its success face uses info, so "status" covers
+# error/warning/success.
+SEMANTIC_GROUPS: dict[str, list[str]] = {
+    "diff": ["fg-added", "fg-removed", "fg-changed"],
+    "diff-intense": ["fg-added-intense", "fg-removed-intense", "fg-changed-intense"],
+    "diff-bg": ["bg-added", "bg-removed", "bg-changed"],
+    "diff-refine": ["bg-added-refine", "bg-removed-refine", "bg-changed-refine"],
+    "diff-fringe": ["bg-added-fringe", "bg-removed-fringe", "bg-changed-fringe"],
+    "status": ["err", "warning", "info"],
+}
+
+
+def ansi_groups(mapping: dict[str, Any]) -> dict[str, list[str]]:
+    """Build ANSI groups from a Ghostty-style ``palette`` slot mapping.
+
+    Slots 0-7 and 8-15 are compared separately, matching how terminal
+    programs pair normal and bright colors.
+    """
+    slots = mapping.get("palette") or {}
+    normal = [slots[str(i)] for i in range(8) if str(i) in slots]
+    bright = [slots[str(i)] for i in range(8, 16) if str(i) in slots]
+    return {"ansi": normal, "ansi-bright": bright}
+
+
+def targeted_simulations(theme_name: str) -> tuple[str, ...]:
+    """Return the simulations a palette variant is designed to withstand."""
+    for suffix, simulations in TARGETS.items():
+        if theme_name.endswith(suffix):
+            return simulations
+    return ()
+
+
+def simulate_batch(
+    linear: list[tuple[float, float, float]],
+    matrix: tuple[tuple[float, float, float], ...],
+) -> list[tuple[float, float, float]]:
+    """Apply a 3x3 simulation matrix to many linear-RGB colors, clamped to 0-1."""
+    (m00, m01, m02), (m10, m11, m12), (m20, m21, m22) = matrix
+    return [
+        (
+            min(1.0, max(0.0, m00 * r + m01 * g + m02 * b)),
+            min(1.0, max(0.0, m10 * r + m11 * g + m12 * b)),
+            min(1.0, max(0.0, m20 * r + m21 * g + m22 * b)),
+        )
+        for r, g, b in linear
+    ]
+
+
+def audit(
+    palettes: Mapping[str, Palette],
+    groups: dict[str, list[str]],
+    threshold: float = DEFAULT_THRESHOLD,
+    simulations: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    """Find semantic color pairs that collapse under simulated CVD.
+
+    Every distinct color across all palettes is simulated once per
+    deficiency, so the work grows with distinct colors, not palettes.
+
+    Args:
+        palettes: Resolved palettes keyed by theme name.
+        groups: Group name to list of palette keys that must stay distinct.
+        threshold: Pairs with CIEDE2000 below this are reported as collapsed.
+        simulations: Simulation names to run (defaults to all).
+
+    Returns:
+        List of collapsed pairs as dictionaries with theme, simulation,
+        targeted, group, keys, colors, delta_e and the unsimulated delta_e.
+    """
+    names = simulations or list(SIMULATIONS)
+
+    colors: dict[tuple[int, int, int], int] = {}
+    for palette in palettes.values():
+        for keys in groups.values():
+            for key in keys:
+                if key in palette and palette.is_color(key):
+                    colors.setdefault(palette.rgb(key), len(colors))
+    rgbs = list(colors)
+    linear = [color.linear_rgb(rgb) for rgb in rgbs]
+    labs = {"none": [color.linear_to_lab(value) for value in linear]}
+    for name in names:
+        labs[name] = [color.linear_to_lab(value) for value in simulate_batch(linear, SIMULATIONS[name])]
+
+    collapsed: list[dict[str, Any]] = []
+    for theme_name, palette in palettes.items():
+        targets = targeted_simulations(theme_name)
+        for group, keys in groups.items():
+            present = [key for key in keys if key in palette and palette.is_color(key)]
+            for key_a, key_b in combinations(present, 2):
+                index_a = colors[palette.rgb(key_a)]
+                index_b = colors[palette.rgb(key_b)]
+                base = color.delta_e_2000(labs["none"][index_a], labs["none"][index_b])
+                for name in names:
+                    delta = color.delta_e_2000(labs[name][index_a], labs[name][index_b])
+                    if delta < threshold:
+                        collapsed.append(
+                            {
+                                "theme": theme_name,
+                                "simulation": name,
+                                "targeted": name in targets,
+                                "group": group,
+                                "keys": (key_a, key_b),
+                                "colors": (palette[key_a], palette[key_b]),
+                                "delta_e": delta,
+                                "base_delta_e": base,
+                            }
+                        )
+    return collapsed
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Inheritance-based delta output for Modus theme ports.
+
+Variant themes (tinted, deuteranopia, tritanopia) differ from their base
+theme in only some entries. For target formats that support theme
+inheritance, a variant can be written as a reference to its base plus the
+entries that differ. The diff engine here is format-neutral: a format
+parses a rendered document into ordered ``(key, text)`` entries and emits
+a document from a header, a base theme name and the overriding entries.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+
+class Document(NamedTuple):
+    """A rendered document split into its leading comment block and entries."""
+
+    header: list[str]
+    entries: list[tuple[tuple[str, str], str]]
+
+
+class DeltaFormat(NamedTuple):
+    """How a target format is parsed into entries and written with inheritance."""
+
+    parse: Callable[[str], Document]
+    emit: Callable[[list[str], str, list[tuple[tuple[str, str], str]]], str]
+
+
+# Inheritance formats by name, as used in a manifest's ``delta_format``.
+FORMATS: dict[str, DeltaFormat] = {}
+
+
+def register_format(name: str, parse: Callable[[str], Document], emit: Callable[..., str]) -> None:
+    """Register a delta format."""
+    FORMATS[name] = DeltaFormat(parse, emit)
+
+
+def base_theme(theme_name: str, themes: Iterable[str]) -> str | None:
+    """Return the theme a variant inherits from, or None for a base theme.
+
+    The base is the longest other theme name that the variant extends with
+    a ``-suffix`` (``modus-operandi`` for ``modus-operandi-tinted``).
+    """
+    candidates = [name for name in themes if theme_name.startswith(f"{name}-")]
+    return max(candidates, key=len) if candidates else None
+
+
+def diff_entries(
+    base: list[tuple[tuple[str, str], str]],
+    variant: list[tuple[tuple[str, str], str]],
+) -> list[tuple[tuple[str, str], str]] | None:
+    """Return the variant entries that are new or differ from the base.
+
+    Returns:
+        Overriding entries in variant order, or None when the variant drops a
+        base entry (inheritance cannot remove keys).
+    """
+    base_text = dict(base)
+    variant_keys = {key for key, _ in variant}
+    if any(key not in variant_keys for key in base_text):
+        return None
+    return [(key, text) for key, text in variant if base_text.get(key) != text]
+
+
+def render_delta(format_name: str, base_content: str, variant_content: str, base_name: str) -> str:
+    """Rewrite a fully rendered variant as an inheriting delta of its base.
+
+    Falls back to the full variant when it cannot be expressed as overrides.
+    """
+    fmt = FORMATS[format_name]
+    variant = fmt.parse(variant_content)
+    overrides = diff_entries(fmt.parse(base_content).entries, variant.entries)
+    if overrides is None:
+        return variant_content
+    return fmt.emit(variant.header, base_name, overrides)
+
+
+_TOML_SECTION_RE = re.compile(r"^\[([^\[\]]+)\]\s*$")
+_TOML_KEY_RE = re.compile(r'^("(?:[^"\\]|\\.)*"|[A-Za-z0-9_.-]+)\s*=')
+
+
+def _parse_toml_lines(text: str) -> Document:
+    header: list[str] = []
+    entries: list[tuple[tuple[str, str], str]] = []
+    section = ""
+    lines = text.splitlines()
+    index = 0
+    while index < len(lines) and lines[index].startswith("#"):
+        header.append(lines[index])
+        index += 1
+    for line in lines[index:]:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        match = _TOML_SECTION_RE.match(stripped)
+        if match:
+            section = match.group(1).strip()
+            continue
+        match = _TOML_KEY_RE.match(stripped)
+        if match:
+            entries.append(((section, match.group(1)), line))
+        elif entries:
+            # Continuation of a multi-line value.
+            key, previous = entries[-1]
+            entries[-1] = (key, f"{previous}\n{line}")
+    return Document(header, entries)
+
+
+def _emit_helix(header: list[str], base_name: str, entries: list[tuple[tuple[str, str], str]]) -> str:
+    lines = [*header, ""] if header else []
+    lines.append(f'inherits = "{base_name}"')
+    sections: dict[str, list[str]] = {}
+    for (section, _), text in entries:
+        sections.setdefault(section, []).append(text)
+    if sections.get(""):
+        lines.append("")
+        lines.extend(sections.pop(""))
+    # NOTE: Helix merges [palette] key by key, so overriding entries are enough.
+    for section, texts in sections.items():
+        lines.extend(["", f"[{section}]", *texts])
+    return "\n".join(lines) + "\n"
+
+
+register_format("helix", _parse_toml_lines, _emit_helix)
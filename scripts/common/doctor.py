@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""Health checks for Modus theme ports.
+
+Doctor runs independent checks (binaries, palettes, templates, extra
+templates, specs, mapping references, mapping overlays and palette
+contrast) concurrently.
+Each check names the files it reads; its result is cached in
+``$XDG_CACHE_HOME/modus-themes-ports/doctor.json`` under a hash of those
+files and of every module under ``scripts/``, so a re-run over unchanged
+inputs and code skips straight to the report.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from scripts.common import contrast as contrast_utils
+from scripts.common import impact
+from scripts.common import io
+from scripts.common import metrics as metrics_utils
+from scripts.common import paths
+from scripts.common import template as template_utils
+from scripts.common.palette import Palette
+
+CACHE_VERSION = 1
+
+# Checks are wired up in modus.py and call into most of scripts/common, so
+# editing any module under scripts/ invalidates the cache.
+_CODE_ROOT = Path(__file__).resolve().parents[1]
+
+_palettes: dict[Path, tuple[str, Palette]] = {}
+_palette_lock = threading.Lock()
+
+
+class Check(NamedTuple):
+    """A single doctor check.
+
+    ``run`` returns (issues, warnings). Checks with no ``inputs`` are never
+    cached.
+    """
+
+    name: str
+    target: str
+    inputs: tuple[Path, ...]
+    run: Callable[[], tuple[list[str], list[str]]]
+
+
+class Result(NamedTuple):
+    """The outcome of a check."""
+
+    name: str
+    target: str
+    issues: list[str]
+    warnings: list[str]
+    cached: bool
+
+    @property
+    def status(self) -> str:
+        if self.issues:
+            return "failed"
+        return "warning" if self.warnings else "ok"
+
+
+def cache_path() -> Path:
+    """Return the doctor result cache file."""
+    return paths.xdg_cache_home() / "modus-themes-ports" / "doctor.json"
+
+
+def load_palette(path: Path) -> tuple[str, Palette]:
+    """Load a resolved palette once per process.
+
+    Loading is serialized because palettes share an append-only key table.
+    """
+    with _palette_lock:
+        if path not in _palettes:
+            _palettes[path] = io.load_palette(str(path))
+        return _palettes[path]
+
+
+def _file_hash(path: Path) -> str:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return "missing"
+
+
+def _code_hash() -> str:
+    digest = hashlib.sha256()
+    for path in sorted(_CODE_ROOT.rglob("*.py")):
+        digest.update(f"{path.relative_to(_CODE_ROOT).as_posix()}\0{_file_hash(path)}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def inputs_hash(inputs: Iterable[Path], file_hashes: dict[Path, str], code_hash: str) -> str:
+    """Hash a check's input files (by path and content) together with the doctor code."""
+    digest = hashlib.sha256(code_hash.encode("ascii"))
+    for path in inputs:
+        if path not in file_hashes:
+            file_hashes[path] = _file_hash(path)
+        digest.update(f"{path}\0{file_hashes[path]}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_cache() -> dict[str, dict[str, Any]]:
+    path = cache_path()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("checks", {})
+
+
+def _save_cache(entries: dict[str, dict[str, Any]]) -> None:
+    path = cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": CACHE_VERSION, "checks": dict(sorted(entries.items()))}
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".doctor.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2)
+            handle.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def run_checks(checks: list[Check], use_cache: bool = True) -> list[Result]:
+    """Run checks concurrently, reusing cached results whose inputs are unchanged.
+
+    Args:
+        checks: Checks to run.
+        use_cache: Read cached results (results are always written back).
+
+    Returns:
+        Results in the order of ``checks``.
+    """
+    stored = _load_cache() if use_cache else {}
+    code_hash = _code_hash()
+    file_hashes: dict[Path, str] = {}
+    entries: dict[str, dict[str, Any]] = {}
+
+    def run(check: Check) -> Result:
+        key = f"{check.name}:{check.target}"
+        digest = inputs_hash(check.inputs, file_hashes, code_hash) if check.inputs else None
+        entry = stored.get(key)
+        if digest and entry and entry.get("hash") == digest:
+            entries[key] = entry
+            return Result(check.name, check.target, entry["issues"], entry["warnings"], True)
+        try:
+            issues, warnings = check.run()
+        except Exception as exc:
+            issues, warnings = [f"{type(exc).__name__}: {exc}"], []
+        if digest:
+            entries[key] = {"hash": digest, "issues": issues, "warnings": warnings}
+        return Result(check.name, check.target, issues, warnings, False)
+
+    with ThreadPoolExecutor() as pool:
+        results = list(pool.map(run, checks))
+    if entries != stored:
+        _save_cache(entries)
+    return results
+
+
+def _group_by_theme(found: dict[str, list[str]], themes: list[str]) -> list[str]:
+    """Format per-theme findings, naming themes only when not all are affected."""
+    messages = []
+    for message, affected in found.items():
+        if len(affected) == len(themes):
+            messages.append(message)
+        else:
+            messages.append(f"{message} (in {', '.join(affected)})")
+    return messages
+
+
+def template_issues(
+    template_path: Path,
+    palette_paths: dict[str, Path],
+    mapping_path: Path | None,
+) -> list[str]:
+    """Check a template's tokens against every palette and the tool mapping."""
+    if not template_path.is_file():
+        return [f"Template missing: {template_path}"]
+    text = template_path.read_text(encoding="utf-8")
+    mapping: dict[str, Any] = {}
+    if mapping_path and mapping_path.is_file():
+        mapping = io.load_mapping(str(mapping_path))
+
+    found: dict[str, list[str]] = {}
+    themes = sorted(palette_paths)
+    for theme in themes:
+        palette_keys = set(load_palette(palette_paths[theme])[1].keys())
+        for error in template_utils.validate_template(text, palette_keys, set(mapping), template_path, mapping=mapping):
+            found.setdefault(error, []).append(theme)
+    return _group_by_theme(found, themes)
+
+
+def spec_issues(
+    spec_path: Path,
+    palette_paths: dict[str, Path],
+    mapping_path: Path,
+) -> list[str]:
+    """Render a spec against every palette and validate each result with the spec."""
+    if not spec_path.is_file():
+        return [f"Spec missing: {spec_path}"]
+    spec = io.load_spec(str(spec_path))
+    mapping = io.load_mapping(str(mapping_path))
+    issues = []
+    for theme in sorted(palette_paths):
+        _, palette = load_palette(palette_paths[theme])
+        try:
+            text = spec.render(theme, palette, mapping)
+        except (KeyError, ValueError) as exc:
+            issues.append(f"{theme}: render failed: {exc}")
+            continue
+        if hasattr(spec, "validate"):
+            issues.extend(f"{theme}: {issue}" for issue in spec.validate(text))
+    return issues
+
+
+def mapping_issues(mapping_path: Path, palette_paths: dict[str, Path]) -> list[str]:
+    """Check that a mapping loads and names palette keys present in every palette.
+
+    A string value counts as a palette reference when at least one palette
+    defines it; the top-level ``name`` is metadata and never a reference.
+    """
+    if not mapping_path.is_file():
+        return [f"Mapping missing: {mapping_path}"]
+    text = mapping_path.read_text(encoding="utf-8")
+    if not isinstance(json.loads(text), dict):
+        return ["Mapping must be an object"]
+
+    themes = sorted(palette_paths)
+    key_sets = {theme: set(load_palette(palette_paths[theme])[1].keys()) for theme in themes}
+    issues = []
+    for dotted, value, line in impact.mapping_leaves(text):
+        if dotted == "name":
+            continue
+        missing = [theme for theme in themes if value not in key_sets[theme]]
+        if missing and len(missing) < len(themes):
+            issues.append(f"{dotted} (line {line}): palette key {value} missing (in {', '.join(missing)})")
+    return issues
+
+
+def _unknown_keys(overlay: dict[str, Any], base: Any, prefix: str = "") -> list[str]:
+    unknown = []
+    for key, value in overlay.items():
+        dotted = f"{prefix}{key}"
+        if not isinstance(base, dict) or key not in base:
+            unknown.append(dotted)
+        elif isinstance(value, dict) and isinstance(base[key], dict):
+            unknown.extend(_unknown_keys(value, base[key], f"{dotted}."))
+    return unknown
+
+
+def overlay_issues(
+    overlay_path: Path,
+    themes_glob: str,
+    mapping_path: Path,
+    palette_paths: dict[str, Path],
+) -> list[str]:
+    """Check a mapping overlay against the default mapping and the themes it matches.
+
+    An overlay must match at least one theme, override only keys the
+    default mapping has, and name palette keys present in every theme it
+    applies to.
+    """
+    if not overlay_path.is_file():
+        return [f"Overlay missing: {overlay_path}"]
+    matched = {theme: path for theme, path in palette_paths.items() if fnmatch.fnmatchcase(theme, themes_glob)}
+    if not matched:
+        return [f"{overlay_path.name}: {themes_glob} matches no theme"]
+    overlay = io.load_mapping(str(overlay_path))
+    if not isinstance(overlay, dict):
+        return [f"{overlay_path.name}: overlay must be an object"]
+    issues = []
+    if mapping_path.is_file():
+        base = io.load_mapping(str(mapping_path))
+        issues.extend(
+            f"{overlay_path.name}: {dotted} is not in {mapping_path.name}" for dotted in _unknown_keys(overlay, base)
+        )
+    issues.extend(f"{overlay_path.name}: {issue}" for issue in mapping_issues(overlay_path, matched))
+    return issues
+
+
+def contrast_warnings(palette_path: Path, template_paths: tuple[Path, ...] = ()) -> list[str]:
+    """Return WCAG AAA contrast warnings for one palette.
+
+    Colors derived by blend tokens in ``template_paths`` are audited too;
+    malformed blends are left to the template checks.
+    """
+    _, palette = load_palette(palette_path)
+    metrics = metrics_utils.load_metrics(palette_path, palette)
+    warnings = contrast_utils.validate_palette_contrast(palette, metrics=metrics)
+    blends: dict[str, str] = {}
+    for path in template_paths:
+        for kind, key in template_utils.blend_tokens(path.read_text(encoding="utf-8")):
+            try:
+                blends[f"{{{kind}:{key}}}"] = template_utils.blend_color(palette, kind, key)
+            except (KeyError, ValueError):
+                continue
+    if blends:
+        warnings.extend(contrast_utils.validate_blend_contrast(palette, blends, metrics=metrics))
+    return warnings
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Warm Emacs daemon backend for palette extraction.
+
+Batch extraction pays for Emacs startup and loading ``modus-themes`` on
+every run. This backend starts (or reuses) a private
+``emacs --daemon=<socket>`` with ``scripts/core/extract-palettes-daemon.el``
+preloaded and sends each extraction through ``emacsclient --eval``. The
+daemon exits by itself after an idle timeout.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+CORE_DIR = Path(__file__).resolve().parents[1] / "core"
+
+DEFAULT_IDLE_TIMEOUT = 300
+
+
+def _elisp_string(value: str | Path) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def socket_path(repo_root: Path) -> Path:
+    """Return the daemon socket for a checkout.
+
+    Sockets live in ``$XDG_RUNTIME_DIR`` (or a per-user temp directory),
+    named after the checkout so separate clones get separate daemons.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = Path(runtime) if runtime else Path(tempfile.gettempdir()) / f"modus-themes-ports-{os.getuid()}"
+    tag = hashlib.sha256(str(repo_root.resolve()).encode("utf-8")).hexdigest()[:12]
+    return base / "modus-themes-ports" / f"emacs-{tag}"
+
+
+def emacsclient_bin(emacs: Path) -> Path:
+    """Find the emacsclient that belongs to an Emacs binary."""
+    for candidate in (emacs.parent / "emacsclient", emacs.parent / "bin" / "emacsclient"):
+        if candidate.is_file():
+            return candidate
+    found = shutil.which("emacsclient")
+    if found:
+        return Path(found)
+    raise FileNotFoundError(f"emacsclient not found next to {emacs}")
+
+
+class EmacsDaemon:
+    """A private Emacs daemon with the palette extractor preloaded."""
+
+    def __init__(self, emacs: Path, socket: Path, idle_timeout: int = DEFAULT_IDLE_TIMEOUT) -> None:
+        self.emacs = emacs
+        self.client = emacsclient_bin(emacs)
+        self.socket = socket
+        self.idle_timeout = idle_timeout
+
+    def _client(self, expr: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            [str(self.client), "--socket-name", str(self.socket), "--eval", expr],
+            capture_output=True,
+            text=True,
+        )
+
+    def alive(self) -> bool:
+        """Return True if the daemon answers on its socket."""
+        if not self.socket.exists():
+            return False
+        return self._client("t").returncode == 0
+
+    def start(self, themes_dir: Path) -> None:
+        """Start the daemon and preload modus-themes from ``themes_dir``."""
+        self.socket.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        # NOTE: A socket left by a crashed daemon makes --daemon fail to bind.
+        self.socket.unlink(missing_ok=True)
+        expr = f"(modus-themes-daemon-start {_elisp_string(themes_dir)} {self.idle_timeout})"
+        subprocess.run(
+            [
+                str(self.emacs),
+                "-Q",
+                f"--daemon={self.socket}",
+                "-L",
+                str(CORE_DIR),
+                "-l",
+                str(CORE_DIR / "extract-palettes-daemon.el"),
+                "--eval",
+                expr,
+            ],
+            check=True,
+            capture_output=True,
+        )
+
+    def ensure(self, themes_dir: Path) -> bool:
+        """Start the daemon unless it is already running.
+
+        Returns:
+            True if a running daemon was reused.
+        """
+        if self.alive():
+            return True
+        self.start(themes_dir)
+        return False
+
+    def export_palettes(self, themes_dir: Path, out_dir: Path) -> None:
+        """Export palettes through the daemon, starting it if needed."""
+        self.ensure(themes_dir)
+        expr = (
+            f"(modus-themes-daemon-export {_elisp_string(themes_dir)} "
+            f"{_elisp_string(out_dir)} {self.idle_timeout})"
+        )
+        result = self._client(expr)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"emacsclient exited with {result.returncode}")
+
+    def stop(self) -> bool:
+        """Shut the daemon down. Returns False if it was not running."""
+        if not self.alive():
+            return False
+        self._client("(kill-emacs 0)")
+        return True
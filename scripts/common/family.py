@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Theme family output for Modus theme ports.
+
+Some target formats hold several themes in one file (Zed's ``themes``
+array). In family mode a port still renders one document per theme; a
+family format splits each into a header, its single theme entry and a
+footer, and the family document is the first header, every entry in
+theme order and the first footer. Entries are written (or compared) as
+they are rendered and are not kept by the render session, so only one
+theme's document is held in memory at a time.
+"""
+
+from __future__ import annotations
+
+import filecmp
+import os
+import re
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from scripts.common import cache
+
+
+class FamilyFormat(NamedTuple):
+    """How a single-theme document is split into header, entry and footer.
+
+    ``entries_field`` names the field of the parsed family document that
+    lists its themes, for validation.
+    """
+
+    split: Callable[[str], tuple[str, str, str]]
+    separator: str
+    entries_field: str
+
+
+# Family formats by name, as used in a manifest's ``family_format``.
+FORMATS: dict[str, FamilyFormat] = {}
+
+
+def register_format(
+    name: str,
+    split: Callable[[str], tuple[str, str, str]],
+    separator: str,
+    entries_field: str,
+) -> None:
+    """Register a family format."""
+    FORMATS[name] = FamilyFormat(split, separator, entries_field)
+
+
+def iter_family(format_name: str, documents: Iterable[str]) -> Iterator[str]:
+    """Yield a family document piece by piece from single-theme documents.
+
+    Raises:
+        ValueError: If there are no documents or one cannot be split.
+    """
+    fmt = FORMATS[format_name]
+    footer = None
+    for document in documents:
+        header, entry, tail = fmt.split(document)
+        if footer is None:
+            footer = tail
+            yield header
+        else:
+            yield fmt.separator
+        yield entry
+    if footer is None:
+        raise ValueError("A theme family needs at least one theme")
+    yield footer if footer.endswith("\n") else footer + "\n"
+
+
+def write_family(path: Path, chunks: Iterable[str]) -> bool:
+    """Stream a family document to ``path``, replacing it atomically.
+
+    The output lock is held throughout, as for ``io.write_output``, and an
+    identical existing file is left untouched.
+
+    Returns:
+        True if the file was written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with cache.output_lock(path):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for chunk in chunks:
+                    handle.write(chunk.encode("utf-8"))
+            if path.is_file() and filecmp.cmp(tmp, path, shallow=False):
+                os.unlink(tmp)
+                return False
+            os.chmod(tmp, cache.replacement_mode(path))
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+    return True
+
+
+def check_family(path: Path, chunks: Iterable[str]) -> str | None:
+    """Compare a streamed family document against a file without writing.
+
+    Returns:
+        "missing" or "stale" if the file is out of date, otherwise None.
+    """
+    try:
+        handle = path.open("rb")
+    except FileNotFoundError:
+        return "missing"
+    with handle:
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            if handle.read(len(data)) != data:
+                return "stale"
+        if handle.read(1):
+            return "stale"
+    return None
+
+
+_JSON_THEMES_RE = re.compile(r'^([ \t]*)"themes": \[\n', re.MULTILINE)
+
+
+def _split_json_themes(document: str) -> tuple[str, str, str]:
+    match = _JSON_THEMES_RE.search(document)
+    end = document.rfind(f"\n{match.group(1)}]") if match else -1
+    if not match or end < match.end():
+        raise ValueError('Expected a "themes": [ ... ] array holding one theme')
+    return document[: match.end()], document[match.end():end], document[end:]
+
+
+register_format("json-themes", _split_json_themes, ",\n", "themes")
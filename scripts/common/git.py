@@ -51,3 +51,109 @@ def subtree_update(repo_root: str, remote_url: str, prefix: str) -> None:
             check=True,
             cwd=repo_root,
         )
+
+
+def show_file(repo_root: str, rev: str, path: str) -> str | None:
+    """Read a file's content at a given revision.
+
+    Args:
+        repo_root: Path to the repository root.
+        rev: Revision to read from (e.g., "HEAD").
+        path: File path relative to the repository root.
+
+    Returns:
+        The file content, or None if the path does not exist at that revision.
+    """
+    result = subprocess.run(
+        ["git", "show", f"{rev}:{path}"],
+        capture_output=True,
+        text=True,
+        cwd=repo_root,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def log_revisions(repo_root: str, rev_range: str, path: str, max_count: int | None = None) -> list[dict[str, str]]:
+    """List commits touching a path, oldest first.
+
+    Args:
+        repo_root: Path to the repository root.
+        rev_range: Revision or range to walk (e.g., "HEAD" or "v1..v2").
+        path: Path relative to the repository root to filter commits by.
+        max_count: Optional limit on the number of most recent commits.
+
+    Returns:
+        List of dictionaries with "sha", "short", "date" and "subject".
+    """
+    command = ["git", "log", "--format=%H%x00%h%x00%as%x00%s", rev_range]
+    if max_count:
+        command.append(f"--max-count={max_count}")
+    command.extend(["--", path])
+    result = subprocess.run(command, check=True, capture_output=True, text=True, cwd=repo_root)
+    revisions = []
+    for line in result.stdout.splitlines():
+        sha, short, date, subject = line.split("\0", 3)
+        revisions.append({"sha": sha, "short": short, "date": date, "subject": subject})
+    revisions.reverse()
+    return revisions
+
+
+class CatFile:
+    """A persistent ``git cat-file --batch`` process for reading many objects.
+
+    Use as a context manager; each ``read`` is one request/response on the
+    same process, so reading hundreds of objects costs one ``git`` startup.
+    """
+
+    def __init__(self, repo_root: str) -> None:
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=repo_root,
+        )
+
+    def __enter__(self) -> CatFile:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the git process."""
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+
+    def read(self, name: str) -> tuple[str, str, bytes] | None:
+        """Read an object by name (e.g., "HEAD:path" or a hex object id).
+
+        Returns:
+            A tuple of (object_id, type, content), or None if the object
+            does not exist.
+        """
+        self._process.stdin.write(name.encode("utf-8") + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().decode("utf-8").split()
+        if len(header) != 3:
+            return None
+        object_id, kind, size = header
+        content = self._process.stdout.read(int(size) + 1)[:-1]
+        return object_id, kind, content
+
+
+def tree_entries(content: bytes, object_id_size: int = 20) -> dict[str, tuple[str, str]]:
+    """Parse raw tree object content into {name: (mode, object_id)}."""
+    entries: dict[str, tuple[str, str]] = {}
+    pos = 0
+    while pos < len(content):
+        space = content.index(b" ", pos)
+        nul = content.index(b"\0", space)
+        mode = content[pos:space].decode("ascii")
+        name = content[space + 1 : nul].decode("utf-8", "surrogateescape")
+        object_id = content[nul + 1 : nul + 1 + object_id_size].hex()
+        entries[name] = (mode, object_id)
+        pos = nul + 1 + object_id_size
+    return entries
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Palette-key impact index for Modus theme ports.
+
+Maps every palette key and mapping key to the template lines and
+rendered outputs that depend on it, so a palette change can be traced
+to the exact files that need re-rendering.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from scripts.common.io import merge_mappings
+from scripts.common.template import (
+    BLEND_KINDS,
+    MAPPING_REF_PREFIX,
+    TOKEN_RE,
+    fragment_paths,
+    is_palette_kind,
+    mapping_ref,
+    parse_blend,
+)
+
+_JSON_TOKEN_RE = re.compile(r'"((?:[^"\\]|\\.)*)"(\s*:)?|([{}\[\],])|(\n)')
+
+
+class Reference(NamedTuple):
+    """A single place where a key feeds into a rendered output."""
+
+    tool: str
+    theme: str
+    kind: str
+    path: Path
+    line: int
+    token: str
+    output_path: Path
+
+
+def alias_chain(raw_palette: dict[str, str], key: str) -> list[str]:
+    """Return the key followed by every palette key it aliases.
+
+    Args:
+        raw_palette: Unresolved palette dictionary.
+        key: Palette key referenced by a template or mapping.
+
+    Returns:
+        List of keys whose values determine the resolved color of ``key``.
+    """
+    chain = [key]
+    value = raw_palette.get(key)
+    while isinstance(value, str) and value in raw_palette and value not in chain:
+        chain.append(value)
+        value = raw_palette[value]
+    return chain
+
+
+def template_tokens(text: str) -> list[tuple[str, str, int]]:
+    """Return (kind, key, line) for every token in a template."""
+    tokens: list[tuple[str, str, int]] = []
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        for match in TOKEN_RE.finditer(line):
+            tokens.append((match.group(1), match.group(2), lineno))
+    return tokens
+
+
+def mapping_leaves(text: str) -> list[tuple[str, str, int]]:
+    """Return (dotted_path, value, line) for every string leaf in mapping JSON."""
+    leaves: list[tuple[str, str, int]] = []
+    stack: list[list[Any]] = []
+    line = 1
+    for match in _JSON_TOKEN_RE.finditer(text):
+        string, colon, punct, newline = match.groups()
+        if newline:
+            line += 1
+        elif punct in ("{", "["):
+            stack.append([punct, 0 if punct == "[" else None])
+        elif punct in ("}", "]"):
+            if stack:
+                stack.pop()
+        elif punct == ",":
+            if stack and stack[-1][0] == "[":
+                stack[-1][1] += 1
+        elif colon:
+            if stack:
+                stack[-1][1] = string
+        elif string is not None and stack:
+            path = ".".join(str(frame[1]) for frame in stack)
+            leaves.append((path, string, line))
+    return leaves
+
+
+def _path_prefixes(dotted: str) -> list[str]:
+    parts = dotted.split(".")
+    return [".".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def build_index(
+    jobs: list[dict[str, Any]],
+    raw_palettes: dict[str, dict[str, str]],
+) -> dict[str, dict[str, list[Reference]]]:
+    """Build an inverted index from palette and mapping keys to references.
+
+    Template tokens are indexed under the key they name and every key that
+    key aliases in the theme's raw palette. ``{value:...}`` tokens, ``value.``
+    palette keys and spec mappings (with any overlays) are followed through
+    to the palette keys they select, blend
+    tokens are indexed under each key they blend, and
+    ``{include:...}`` tokens into their fragments. Jobs that inherit from a
+    base theme are indexed under both themes.
+
+    Args:
+        jobs: Render jobs (tool, theme, kind, source, mapping_path, output_path).
+        raw_palettes: Unresolved palettes keyed by theme name.
+
+    Returns:
+        Dictionary with "palette" and "mapping" sub-indexes keyed by key name.
+    """
+    index: dict[str, dict[str, list[Reference]]] = {"palette": {}, "mapping": {}}
+    texts: dict[Path, str] = {}
+    mappings: dict[Path, dict[str, Any]] = {}
+    merged: dict[tuple[Path, ...], dict[str, Any]] = {}
+    fragments: dict[Path, list[Path]] = {}
+
+    def read(path: Path) -> str:
+        if path not in texts:
+            texts[path] = path.read_text(encoding="utf-8")
+        return texts[path]
+
+    def mapping_data(path: Path) -> dict[str, Any]:
+        if path not in mappings:
+            mappings[path] = json.loads(read(path))
+        return mappings[path]
+
+    def merged_data(layers: tuple[Path, ...]) -> dict[str, Any]:
+        if layers not in merged:
+            merged[layers] = merge_mappings(mapping_data(path) for path in layers)
+        return merged[layers]
+
+    def layer_leaves(layers: tuple[Path, ...]) -> list[tuple[Path, str, str, int]]:
+        # Leaves of every layer that no later layer overrides.
+        leaves: list[tuple[Path, str, str, int]] = []
+        shadowed: set[str] = set()
+        for path in reversed(layers):
+            layer = mapping_leaves(read(path))
+            leaves.extend(
+                (path, dotted, value, line)
+                for dotted, value, line in layer
+                if not any(prefix in shadowed for prefix in _path_prefixes(dotted))
+            )
+            shadowed.update(dotted for dotted, _, _ in layer)
+        return leaves
+
+    def add(space: str, key: str, ref: Reference) -> None:
+        index[space].setdefault(key, []).append(ref)
+
+    # A delta output (see delta.py) also depends on its base theme's values.
+    inherited = [
+        job | {"theme": job["inherits"], "mapping_overlays": job.get("base_mapping_overlays") or ()}
+        for job in jobs
+        if job.get("inherits")
+    ]
+    for job in [*jobs, *inherited]:
+        raw = raw_palettes[job["theme"]]
+
+        def add_palette(key: str, ref: Reference) -> None:
+            if key not in raw:
+                return
+            for alias in alias_chain(raw, key):
+                add("palette", alias, ref)
+
+        layers = (job["mapping_path"], *(job.get("mapping_overlays") or ()))
+        if job["kind"] == "spec":
+            for mapping_path, dotted, value, line in layer_leaves(layers):
+                if value not in raw:
+                    continue
+                ref = Reference(job["tool"], job["theme"], job["kind"], mapping_path, line, value, job["output_path"])
+                add_palette(value, ref)
+                for prefix in _path_prefixes(dotted):
+                    add("mapping", prefix, ref)
+            continue
+
+        if job["source"] not in fragments:
+            fragments[job["source"]] = fragment_paths(job["source"])
+        for source in (job["source"], *fragments[job["source"]]):
+            for kind, key, line in template_tokens(read(source)):
+                ref = Reference(job["tool"], job["theme"], job["kind"], source, line, key, job["output_path"])
+                if is_palette_kind(kind) and key.startswith(MAPPING_REF_PREFIX):
+                    for prefix in _path_prefixes(key[len(MAPPING_REF_PREFIX):]):
+                        add("mapping", prefix, ref)
+                    try:
+                        add_palette(mapping_ref(merged_data(layers), key), ref)
+                    except (KeyError, ValueError):
+                        continue
+                elif is_palette_kind(kind):
+                    add_palette(key, ref)
+                elif kind in BLEND_KINDS:
+                    try:
+                        operands = parse_blend(kind, key)[0]
+                    except ValueError:
+                        continue
+                    for operand in operands:
+                        add_palette(operand, ref)
+                elif kind == "value":
+                    add("mapping", key, ref)
+                    value = merged_data(layers).get(key)
+                    if isinstance(value, str):
+                        add_palette(value, ref)
+
+    return index
+
+
+def lookup(
+    index: dict[str, dict[str, list[Reference]]],
+    key: str,
+) -> tuple[list[Reference], list[Reference]]:
+    """Return (palette_references, mapping_references) for a key."""
+    return index["palette"].get(key, []), index["mapping"].get(key, [])
+
+
+def changed_keys(old: dict[str, str] | None, new: dict[str, str]) -> set[str] | None:
+    """Return keys whose raw value differs between two palettes.
+
+    Returns None when there is no previous palette, meaning every key changed.
+    """
+    if old is None:
+        return None
+    keys = set(old) | set(new)
+    return {key for key in keys if old.get(key) != new.get(key)}
+
+
+def affected_outputs(
+    index: dict[str, dict[str, list[Reference]]],
+    changes: dict[str, set[str] | None],
+) -> set[Path]:
+    """Return output paths affected by per-theme palette changes.
+
+    Themes mapped to None (no previous palette) are skipped; callers
+    should re-render those themes entirely.
+
+    Args:
+        index: Index returned by ``build_index``.
+        changes: Changed keys per theme name.
+
+    Returns:
+        Set of output paths that must be re-rendered.
+    """
+    outputs: set[Path] = set()
+    for theme, keys in changes.items():
+        if not keys:
+            continue
+        for key in keys:
+            for ref in index["palette"].get(key, []):
+                if ref.theme == theme:
+                    outputs.add(ref.output_path)
+    return outputs
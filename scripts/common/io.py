@@ -5,10 +5,18 @@ from __future__ import annotations
 
 import importlib.util
 import json
+from collections.abc import Iterable
 from pathlib import Path
 from types import ModuleType
 from typing import Any
 
+from scripts.common import cache
+from scripts.common.palette import Palette
+
+# Resolved palettes are cached on disk by file content and this version;
+# bump it whenever resolve_palette's output changes.
+RESOLVER_VERSION = 1
+
 
 def load_spec(path: str) -> ModuleType:
     """Load a Python spec module from the given path."""
@@ -32,6 +40,43 @@ def load_mapping(path: str) -> dict[str, Any]:
         return json.load(f)
 
 
+def merge_mapping(base: dict[str, Any], overlay: dict[str, Any]) -> dict[str, Any]:
+    """Deep-merge an overlay onto a mapping without modifying either.
+
+    Objects are merged key by key; any other overlay value replaces the
+    base value.
+    """
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_mapping(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_mappings(layers: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Merge mapping layers in order, each onto the result of the ones before."""
+    layers = iter(layers)
+    merged = next(layers)
+    for overlay in layers:
+        merged = merge_mapping(merged, overlay)
+    return merged
+
+
+def changed_mapping_keys(base: dict[str, Any], overlay: dict[str, Any], prefix: str = "") -> list[str]:
+    """Return the dotted keys whose value an overlay changes when merged onto ``base``."""
+    changed = []
+    for key, value in overlay.items():
+        dotted = f"{prefix}{key}"
+        current = base.get(key) if isinstance(base, dict) else None
+        if isinstance(value, dict) and isinstance(current, dict):
+            changed.extend(changed_mapping_keys(current, value, f"{dotted}."))
+        elif value != current:
+            changed.append(dotted)
+    return changed
+
+
 def _resolve_palette_value(
     palette: dict[str, str],
     key: str,
@@ -61,15 +106,20 @@ def resolve_palette(palette: dict[str, str]) -> dict[str, str]:
     return resolved
 
 
-def load_palette(path: str) -> tuple[str, dict[str, str]]:
-    """Load a palette JSON file and resolve all references.
+def read_palette(path: str) -> tuple[str, dict[str, str]]:
+    """Load a palette JSON file without resolving references.
 
     Returns:
-        A tuple of (theme_name, resolved_palette).
+        A tuple of (theme_name, raw_palette).
     """
     palette_path = Path(path)
     with palette_path.open("r", encoding="utf-8") as f:
         data = json.load(f)
+    return parse_palette(data, palette_path)
+
+
+def parse_palette(data: Any, palette_path: Path) -> tuple[str, dict[str, str]]:
+    """Extract the theme name and raw palette from decoded palette JSON."""
     if isinstance(data, dict) and "palette" in data:
         name = data.get("name") or palette_path.stem
         palette = data["palette"]
@@ -78,15 +128,42 @@ def load_palette(path: str) -> tuple[str, dict[str, str]]:
         palette = data
     if not isinstance(palette, dict):
         raise ValueError(f"Palette must be an object: {palette_path}")
+    return name, palette
+
+
+def load_palette(path: str) -> tuple[str, Palette]:
+    """Load a palette JSON file and resolve all references.
+
+    Returns:
+        A tuple of (theme_name, resolved_palette).
+    """
+    name, palette = read_palette(path)
     # NOTE: Resolve palette references so rendered themes never contain alias names.
-    return name, resolve_palette(palette)
+    return name, Palette(resolve_palette(palette), name)
+
+
+def output_bytes(content: str) -> bytes:
+    """Return the exact bytes ``write_output`` writes for the content."""
+    if not content.endswith("\n"):
+        content += "\n"
+    return content.encode("utf-8")
 
 
 def write_output(path: str, content: str) -> Path:
-    """Write content to a file, creating parent directories as needed."""
+    """Write content to a file, creating parent directories as needed.
+
+    The write holds the output's lock and replaces the file atomically, so
+    concurrent renders never interleave and readers never see a partial
+    file. An identical existing file is left untouched.
+    """
     output_path = Path(path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    if not content.endswith("\n"):
-        content += "\n"
-    output_path.write_text(content, encoding="utf-8")
+    data = output_bytes(content)
+    with cache.output_lock(output_path):
+        try:
+            if output_path.stat().st_size == len(data) and output_path.read_bytes() == data:
+                return output_path
+        except FileNotFoundError:
+            pass
+        cache.atomic_write_bytes(output_path, data)
     return output_path
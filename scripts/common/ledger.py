@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Install ledger for Modus theme ports.
+
+Every install records, per tool, the installed path, its mode ("link"
+or "copy"), its source and a content hash in
+``$XDG_STATE_HOME/modus-themes-ports/<tool>.json``. Status and
+uninstall read the ledger instead of rescanning destination
+directories, and use the hash to leave hand-edited files alone. Sizes
+and modification times of the installed copy and its source are recorded
+too, so content is only hashed once one of them has changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from scripts.common import paths
+
+LEDGER_VERSION = 1
+
+
+def ledger_dir() -> Path:
+    """Return the directory holding per-tool ledgers."""
+    return paths.xdg_state_home() / "modus-themes-ports"
+
+
+def ledger_path(tool: str) -> Path:
+    """Return the ledger file for a tool."""
+    return ledger_dir() / f"{tool}.json"
+
+
+def load(tool: str) -> dict[str, dict[str, Any]]:
+    """Load a tool's ledger entries keyed by installed path (empty if none)."""
+    path = ledger_path(tool)
+    if not path.is_file():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != LEDGER_VERSION:
+        raise ValueError(f"Unsupported ledger version in {path}")
+    return data.get("entries", {})
+
+
+def save(tool: str, entries: dict[str, dict[str, Any]]) -> None:
+    """Write a tool's ledger atomically, removing it when empty."""
+    path = ledger_path(tool)
+    if not entries:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": LEDGER_VERSION, "tool": tool, "entries": dict(sorted(entries.items()))}
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{tool}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2)
+            handle.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def tools() -> list[str]:
+    """List tools that have a ledger."""
+    directory = ledger_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(path.stem for path in directory.glob("*.json"))
+
+
+def content_hash(path: Path) -> str:
+    """Hash a file, or a directory tree by relative path and file content."""
+    digest = hashlib.sha256()
+    if path.is_dir():
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(child.relative_to(path).as_posix().encode("utf-8") + b"\0")
+            digest.update(bytes.fromhex(content_hash(child)))
+        return digest.hexdigest()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_key(path: Path) -> list[int]:
+    """Return [size, mtime_ns] for a file.
+
+    A directory tree gives [entries, total size, newest mtime_ns] over
+    itself and everything below it, so renames show up through the
+    mtime of their directory.
+    """
+    stat = path.stat()
+    if not path.is_dir():
+        return [stat.st_size, stat.st_mtime_ns]
+    stats = [stat] + [child.stat() for child in path.rglob("*")]
+    return [len(stats), sum(item.st_size for item in stats), max(item.st_mtime_ns for item in stats)]
+
+
+def make_entry(dest: Path, source: Path, mode: str, theme: str | None) -> dict[str, Any]:
+    """Build a ledger entry for a freshly installed path."""
+    entry: dict[str, Any] = {
+        "mode": mode,
+        "source": str(source.resolve()),
+        "theme": theme,
+        "hash": content_hash(source),
+        "source_stat": _stat_key(source),
+    }
+    if mode == "copy":
+        entry["stat"] = _stat_key(dest)
+    return entry
+
+
+def make_import_entry(dest: Path, theme: str | None, digest: str, bundle: str) -> dict[str, Any]:
+    """Build a ledger entry for a path imported from an export bundle.
+
+    Imported copies have no source in a checkout, so they are recorded as
+    their own source: status reports them as "modified" once edited, but
+    never as "outdated".
+    """
+    return {
+        "mode": "copy",
+        "source": str(dest.resolve()),
+        "theme": theme,
+        "hash": digest,
+        "stat": _stat_key(dest),
+        "source_stat": _stat_key(dest),
+        "bundle": bundle,
+    }
+
+
+def entry_state(dest: Path, entry: dict[str, Any]) -> str:
+    """Classify an installed path against its ledger entry.
+
+    Returns:
+        "ok", "missing" (removed by hand), "replaced" (a link that no longer
+        points at its source), "broken" (a link whose source is gone),
+        "modified" (a copy edited since install) or "outdated" (an unedited
+        copy whose source has been re-rendered since install).
+    """
+    source = Path(entry["source"])
+    if entry["mode"] == "link":
+        if not dest.is_symlink():
+            return "replaced" if dest.exists() else "missing"
+        if (dest.parent / os.readlink(dest)).resolve() != source:
+            return "replaced"
+        return "ok" if source.exists() else "broken"
+
+    if dest.is_symlink() or not dest.exists():
+        return "replaced" if dest.is_symlink() else "missing"
+    if _changed(dest, entry, "stat"):
+        return "modified"
+    if source.exists() and _changed(source, entry, "source_stat"):
+        return "outdated"
+    return "ok"
+
+
+def _changed(path: Path, entry: dict[str, Any], stat_field: str) -> bool:
+    """Return True if a path's content differs from the recorded hash.
+
+    Only hashes when the recorded size and mtime no longer match (or were
+    never recorded, as in older ledgers).
+    """
+    if entry.get(stat_field) is not None and _stat_key(path) == entry[stat_field]:
+        return False
+    return content_hash(path) != entry["hash"]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Precomputed color metrics for extracted palettes.
+
+Contrast and lint checks need each palette color as RGB, linear RGB,
+WCAG relative luminance, CIELAB and OKLab. Rather than converting hex
+strings on every run, ``index-palettes`` (and ``extract-palettes`` after
+exporting) stores these per palette in the shared disk cache, keyed by a
+hash of the palette file, so an edited palette is simply indexed anew.
+
+An index holds each distinct color once, as one row of ``FIELDS``, and
+maps every resolved color key to its row. Values are stored at full
+precision, so results match recomputing them exactly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any
+
+from scripts.common import cache
+from scripts.common import color
+from scripts.common import io
+from scripts.common.palette import Palette
+
+METRICS_VERSION = 1
+
+# Columns of an index row.
+FIELDS = ("r", "g", "b", "lr", "lg", "lb", "luminance", "lab_l", "lab_a", "lab_b", "ok_l", "ok_a", "ok_b")
+
+_NAMESPACE = "metrics"
+
+_indexes: dict[str, PaletteMetrics] = {}
+_index_lock = threading.Lock()
+
+
+class PaletteMetrics:
+    """Color metrics for the color keys of one resolved palette."""
+
+    __slots__ = ("keys", "rows")
+
+    def __init__(self, keys: dict[str, int], rows: list[list[float]]) -> None:
+        self.keys = keys
+        self.rows = rows
+
+    @classmethod
+    def from_palette(cls, palette: Palette) -> PaletteMetrics:
+        """Compute metrics for every color key of a palette."""
+        keys: dict[str, int] = {}
+        positions: dict[tuple[int, int, int], int] = {}
+        rows: list[list[float]] = []
+        for key in palette:
+            if not palette.is_color(key):
+                continue
+            rgb = palette.rgb(key)
+            position = positions.get(rgb)
+            if position is None:
+                linear = color.linear_rgb(rgb)
+                luminance = 0.2126 * linear[0] + 0.7152 * linear[1] + 0.0722 * linear[2]
+                position = positions[rgb] = len(rows)
+                rows.append([*rgb, *linear, luminance, *color.linear_to_lab(linear), *color.linear_to_oklab(linear)])
+            keys[key] = position
+        return cls(keys, rows)
+
+    def to_json(self) -> dict[str, Any]:
+        return {"fields": list(FIELDS), "keys": self.keys, "rows": self.rows}
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.keys
+
+    def rgb(self, key: str) -> tuple[int, int, int]:
+        """Return (red, green, blue) values 0-255 for a color key."""
+        row = self.rows[self.keys[key]]
+        return row[0], row[1], row[2]
+
+    def linear(self, key: str) -> tuple[float, float, float]:
+        """Return linear-light 0-1 channels for a color key."""
+        row = self.rows[self.keys[key]]
+        return row[3], row[4], row[5]
+
+    def luminance(self, key: str) -> float:
+        """Return the WCAG relative luminance of a color key."""
+        return self.rows[self.keys[key]][6]
+
+    def lab(self, key: str) -> tuple[float, float, float]:
+        """Return the CIELAB (D65) coordinates of a color key."""
+        row = self.rows[self.keys[key]]
+        return row[7], row[8], row[9]
+
+    def oklab(self, key: str) -> tuple[float, float, float]:
+        """Return the OKLab coordinates of a color key."""
+        row = self.rows[self.keys[key]]
+        return row[10], row[11], row[12]
+
+
+def palette_hash(path: Path) -> str:
+    """Return the cache key of a palette file's metrics."""
+    digest = hashlib.sha256(f"metrics-v{METRICS_VERSION}\0{io.RESOLVER_VERSION}\0".encode("ascii"))
+    digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load_metrics(path: Path, palette: Palette | None = None) -> PaletteMetrics:
+    """Return the metrics of a palette file, indexing it if needed.
+
+    Indexes are kept per process as well as on disk; ``palette`` saves
+    resolving the file again when the caller already has it.
+    """
+    digest = palette_hash(path)
+    metrics = _indexes.get(digest)
+    if metrics is None:
+
+        def build() -> dict[str, Any]:
+            resolved = palette if palette is not None else io.load_palette(str(path))[1]
+            return PaletteMetrics.from_palette(resolved).to_json()
+
+        data = cache.DiskCache().get_or_build(_NAMESPACE, digest, build)
+        metrics = PaletteMetrics(data["keys"], data["rows"])
+        with _index_lock:
+            metrics = _indexes.setdefault(digest, metrics)
+    return metrics
+
+
+def index_palettes(palette_paths: list[Path]) -> int:
+    """Index palette files that have no stored metrics yet.
+
+    Returns:
+        Number of palettes indexed.
+    """
+    store = cache.DiskCache()
+    indexed = 0
+    for path in palette_paths:
+        digest = palette_hash(path)
+        if store.get(_NAMESPACE, digest) is None:
+            load_metrics(path)
+            indexed += 1
+    return indexed
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""OSC escape sequences that recolor a running terminal.
+
+A palette is turned, through the Ghostty mapping, into OSC 4 (ANSI slots
+0-15), OSC 10 (foreground), OSC 11 (background) and OSC 12 (cursor)
+sequences. The sequences for each theme are cached in
+``$XDG_CACHE_HOME/modus-themes-ports/osc/<theme>.json`` under a hash of
+the palette and mapping files, so applying a theme again skips palette
+resolution entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import string
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from scripts.common import io
+from scripts.common import paths
+
+# Bump when the emitted sequences change for the same inputs.
+FORMAT_VERSION = 1
+
+_ST = "\x1b\\"
+
+# Mapping key -> OSC code for the dynamic colors.
+_DYNAMIC_COLORS = (("foreground", 10), ("background", 11), ("cursor-color", 12))
+
+
+def color_spec(hex_color: str) -> str:
+    """Convert #RRGGBB to the X11 ``rgb:RR/GG/BB`` form terminals accept."""
+    value = hex_color.lstrip("#")
+    if len(value) not in (6, 8) or any(char not in string.hexdigits for char in value):
+        raise ValueError(f"Invalid hex color: {hex_color}")
+    return f"rgb:{value[0:2]}/{value[2:4]}/{value[4:6]}".lower()
+
+
+def sequences(palette: Mapping[str, str], mapping: dict[str, Any]) -> str:
+    """Build the OSC sequences for a resolved palette.
+
+    Args:
+        palette: Resolved palette.
+        mapping: Ghostty mapping (``palette`` slots plus dynamic color keys).
+
+    Returns:
+        All sequences concatenated, ready for a single write.
+    """
+
+    def resolve(palette_key: str) -> str:
+        if palette_key not in palette:
+            raise KeyError(f"Missing palette key: {palette_key}")
+        return color_spec(palette[palette_key])
+
+    slots = mapping.get("palette")
+    if not isinstance(slots, dict):
+        raise KeyError("Missing mapping key: palette")
+    parts: list[str] = []
+    for index in range(16):
+        if str(index) not in slots:
+            raise KeyError(f"Missing palette mapping for index {index}")
+        parts.append(f"\x1b]4;{index};{resolve(slots[str(index)])}{_ST}")
+    for key, code in _DYNAMIC_COLORS:
+        if key not in mapping:
+            raise KeyError(f"Missing mapping key: {key}")
+        parts.append(f"\x1b]{code};{resolve(mapping[key])}{_ST}")
+    return "".join(parts)
+
+
+def cache_path(theme_name: str) -> Path:
+    """Return the cache file holding a theme's sequences."""
+    return paths.xdg_cache_home() / "modus-themes-ports" / "osc" / f"{theme_name}.json"
+
+
+def _inputs_key(palette_path: Path, mapping_path: Path) -> str:
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode("ascii"))
+    for path in (palette_path, mapping_path):
+        digest.update(b"\0" + path.read_bytes())
+    return digest.hexdigest()
+
+
+def cached_sequences(theme_name: str, palette_path: Path, mapping_path: Path) -> str:
+    """Return a theme's sequences, building and caching them if inputs changed."""
+    key = _inputs_key(palette_path, mapping_path)
+    path = cache_path(theme_name)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        data = {}
+    if data.get("key") == key:
+        return data["sequences"]
+
+    _, palette = io.load_palette(str(palette_path))
+    content = sequences(palette, io.load_mapping(str(mapping_path)))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"key": key, "sequences": content}), encoding="utf-8")
+    os.replace(tmp, path)
+    return content
+
+
+def write_terminal(content: str) -> None:
+    """Write sequences to the controlling terminal in one write.
+
+    Falls back to stdout when there is no controlling terminal.
+    """
+    data = content.encode("ascii")
+    try:
+        fd = os.open("/dev/tty", os.O_WRONLY | os.O_NOCTTY)
+    except OSError:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        return
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Compact resolved palette representation for Modus theme ports.
+
+Every palette shares one interned key table, and each palette stores its
+values as a packed integer array. Colors are kept as ``0xRRGGBB`` ints so
+RGB conversions never re-parse hex strings; string forms are built lazily
+and cached on first access. Colors not written in lowercase are interned
+as symbols so they round-trip exactly, with their packed int kept
+alongside.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from array import array
+from collections.abc import Iterator, Mapping
+
+# Shared, append-only key table: key name -> slot index.
+_KEY_INDEX: dict[str, int] = {}
+_KEYS: list[str] = []
+
+# Non-color values such as "unspecified" are interned once and stored as
+# negative codes: code = -(symbol_index + 2). -1 marks a missing key.
+_SYMBOL_INDEX: dict[str, int] = {}
+_SYMBOLS: list[str] = []
+# Packed color code of each symbol that is a non-lowercase hex color, else -1.
+_SYMBOL_COLORS: list[int] = []
+
+# Guards appends to the shared tables so palettes can be built from any thread.
+_TABLE_LOCK = threading.Lock()
+
+_MISSING = -1
+_ALPHA_FLAG = 1 << 32
+_HEX_DIGITS = frozenset("0123456789abcdef")
+_ANY_CASE_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def _key_slot(key: str) -> int:
+    slot = _KEY_INDEX.get(key)
+    if slot is None:
+        with _TABLE_LOCK:
+            slot = _KEY_INDEX.get(key)
+            if slot is None:
+                slot = len(_KEYS)
+                key = sys.intern(key)
+                _KEYS.append(key)
+                _KEY_INDEX[key] = slot
+    return slot
+
+
+def _symbol_code(value: str) -> int:
+    index = _SYMBOL_INDEX.get(value)
+    if index is None:
+        with _TABLE_LOCK:
+            index = _SYMBOL_INDEX.get(value)
+            if index is None:
+                index = len(_SYMBOLS)
+                value = sys.intern(value)
+                _SYMBOLS.append(value)
+                _SYMBOL_COLORS.append(_pack_color(value, _ANY_CASE_HEX_DIGITS))
+                _SYMBOL_INDEX[value] = index
+    return -(index + 2)
+
+
+def _pack_color(value: str, digits: frozenset[str]) -> int:
+    if value.startswith("#") and len(value) in (7, 9) and digits.issuperset(value[1:]):
+        code = int(value[1:], 16)
+        return code | _ALPHA_FLAG if len(value) == 9 else code
+    return _MISSING
+
+
+def encode_value(value: str) -> int:
+    """Encode a palette value as an integer code.
+
+    Lowercase ``#RRGGBB`` and ``#RRGGBBAA`` colors become packed ints; any
+    other string, including an uppercase color, is interned as a symbol so
+    it round-trips exactly.
+    """
+    if isinstance(value, str):
+        code = _pack_color(value, _HEX_DIGITS)
+        if code != _MISSING:
+            return code
+    return _symbol_code(str(value))
+
+
+def decode_value(code: int) -> str:
+    """Decode an integer code back to its palette string."""
+    if code < 0:
+        return _SYMBOLS[-code - 2]
+    if code & _ALPHA_FLAG:
+        return f"#{code & 0xFFFFFFFF:08x}"
+    return f"#{code:06x}"
+
+
+class Palette(Mapping):
+    """Read-only resolved palette backed by a packed value array.
+
+    Behaves like ``dict[str, str]`` for lookups and iteration, and adds
+    ``rgb``/``rgba`` accessors that read channel values straight from the
+    packed ints. ``derived`` memoizes formatted values, keyed by
+    (format kind, key), for the lifetime of the palette.
+    """
+
+    __slots__ = ("name", "derived", "_codes", "_size", "_strings")
+
+    def __init__(self, values: Mapping[str, str], name: str = "") -> None:
+        codes = array("q")
+        size = 0
+        for key, value in values.items():
+            slot = _key_slot(key)
+            if slot >= len(codes):
+                codes.extend([_MISSING] * (slot + 1 - len(codes)))
+            if codes[slot] == _MISSING:
+                size += 1
+            codes[slot] = encode_value(value)
+        self.name = name
+        self.derived: dict[tuple[str, str], str] = {}
+        self._codes = codes
+        self._size = size
+        self._strings: list[str | None] | None = None
+
+    def _code(self, key: str) -> int:
+        slot = _KEY_INDEX.get(key)
+        if slot is None or slot >= len(self._codes):
+            raise KeyError(key)
+        code = self._codes[slot]
+        if code == _MISSING:
+            raise KeyError(key)
+        return code
+
+    def __getitem__(self, key: str) -> str:
+        slot = _KEY_INDEX.get(key)
+        if slot is None or slot >= len(self._codes) or self._codes[slot] == _MISSING:
+            raise KeyError(key)
+        strings = self._strings
+        if strings is None:
+            strings = self._strings = [None] * len(self._codes)
+        value = strings[slot]
+        if value is None:
+            value = strings[slot] = decode_value(self._codes[slot])
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        slot = _KEY_INDEX.get(key) if isinstance(key, str) else None
+        return slot is not None and slot < len(self._codes) and self._codes[slot] != _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for slot, code in enumerate(self._codes):
+            if code != _MISSING:
+                yield _KEYS[slot]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"Palette({self.name!r}, {self._size} keys)"
+
+    def _color_code(self, key: str) -> int:
+        code = self._code(key)
+        if code < 0:
+            return _SYMBOL_COLORS[-code - 2]
+        return code
+
+    def is_color(self, key: str) -> bool:
+        """Return True if the key holds a hex color."""
+        return self._color_code(key) >= 0
+
+    def rgb(self, key: str) -> tuple[int, int, int]:
+        """Return (red, green, blue) values 0-255 for a color key.
+
+        Raises:
+            KeyError: If the key is missing.
+            ValueError: If the key does not hold a hex color.
+        """
+        code = self._color_code(key)
+        if code < 0:
+            raise ValueError(f"Expected #RRGGBB value, got: {self[key]}")
+        if code & _ALPHA_FLAG:
+            code = (code & 0xFFFFFFFF) >> 8
+        return (code >> 16) & 0xFF, (code >> 8) & 0xFF, code & 0xFF
+
+    def rgba(self, key: str) -> tuple[int, int, int, int]:
+        """Return (red, green, blue, alpha) values 0-255 for a color key."""
+        code = self._color_code(key)
+        if code < 0:
+            raise ValueError(f"Expected #RRGGBB or #RRGGBBAA value, got: {self[key]}")
+        if code & _ALPHA_FLAG:
+            code &= 0xFFFFFFFF
+            return (code >> 24) & 0xFF, (code >> 16) & 0xFF, (code >> 8) & 0xFF, code & 0xFF
+        return (code >> 16) & 0xFF, (code >> 8) & 0xFF, code & 0xFF, 0xFF
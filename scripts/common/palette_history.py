@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Palette history across revisions of the vendored Modus themes.
+
+Palettes are read straight from git objects: theme sources for each
+revision are streamed through one ``git cat-file --batch`` process and
+the palette definitions are parsed in-process with a small Elisp
+reader, so no checkout or Emacs run is needed. Parsed sources are
+cached by blob id, and assembled palettes by the set of blob ids, so
+revisions that share files are only parsed once.
+
+The assembled palettes match ``extract-palettes``: core palette plus
+common mappings, with the faint preset applied, first entry winning.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from collections.abc import Iterable
+from typing import Any
+
+from scripts.common import color
+from scripts.common import git as git_utils
+from scripts.common.io import resolve_palette
+
+VENDOR_PATH = "vendor/modus-themes"
+
+# Preset applied by scripts/core/extract-palettes.el.
+PRESET_OVERRIDES = "modus-themes-preset-overrides-faint"
+
+_THEME_FILE_RE = re.compile(r"(modus-[a-z-]+)-theme\.el")
+_LIBRARY_FILE = "modus-themes.el"
+
+_DEFINITION_RE = re.compile(r"^\((?:defconst|defvar) ([a-z][a-z0-9-]*)\s", re.MULTILINE)
+_TOP_LEVEL_RE = re.compile(r"^\(", re.MULTILINE)
+_THEME_CALL_RE = re.compile(r"^\(modus-themes-theme\b", re.MULTILINE)
+
+_SEXP_TOKEN_RE = re.compile(r'\s+|;[^\n]*|"((?:[^"\\]|\\.)*)"|([()\'])|([^\s()";\']+)', re.DOTALL)
+
+
+class Symbol(str):
+    """An Elisp symbol, kept distinct from Elisp strings."""
+
+    __slots__ = ()
+
+
+def read_sexp(text: str, pos: int = 0) -> tuple[Any, int]:
+    """Read one s-expression starting at ``pos``.
+
+    Supports the subset used by palette definitions: lists, strings,
+    symbols, quote and comments. Lists become Python lists, quoted forms
+    become ``[Symbol("quote"), form]``.
+
+    Returns:
+        A tuple of (form, end position).
+    """
+    tokens = (match for match in _SEXP_TOKEN_RE.finditer(text, pos) if match.lastindex is not None)
+    end = pos
+
+    def read(match: re.Match[str]) -> Any:
+        nonlocal end
+        end = match.end()
+        string, punct, atom = match.groups()
+        if punct == "(":
+            items: list[Any] = []
+            for child in tokens:
+                if child.group(2) == ")":
+                    end = child.end()
+                    return items
+                items.append(read(child))
+            raise ValueError("Unterminated s-expression")
+        if punct == "'":
+            return [Symbol("quote"), read(next(tokens))]
+        if punct == ")":
+            raise ValueError(f"Unexpected ')' at offset {match.start()}")
+        if string is not None:
+            return re.sub(r"\\(.)", r"\1", string, flags=re.DOTALL)
+        return Symbol(atom)
+
+    first = next(tokens, None)
+    if first is None:
+        raise ValueError("Unterminated s-expression")
+    return read(first), end
+
+
+def _evaluate(form: Any, definitions: dict[str, Any]) -> list[Any]:
+    """Evaluate a palette definition value (quoted lists, ``append``, variables)."""
+    if isinstance(form, Symbol):
+        if form == "nil":
+            return []
+        value = definitions.get(form)
+        if value is None:
+            raise KeyError(f"Unknown palette variable: {form}")
+        return _evaluate(value, definitions)
+    if isinstance(form, list) and form:
+        head = form[0]
+        if head == "quote":
+            return list(form[1]) if isinstance(form[1], list) else []
+        if head == "append":
+            items: list[Any] = []
+            for part in form[1:]:
+                items.extend(_evaluate(part, definitions))
+            return items
+    raise ValueError(f"Unsupported palette form: {form!r}")
+
+
+def _entry_value(entry: list[Any]) -> str:
+    rest = entry[1:]
+    if rest and rest[0] == ".":
+        rest = rest[1:]
+    value = rest[0] if rest else Symbol("nil")
+    if isinstance(value, list):
+        return "(" + " ".join(_entry_value([None, item]) for item in value) + ")"
+    return str(value)
+
+
+def normalize_palette(entries: Iterable[Any]) -> dict[str, str]:
+    """Convert palette entries to a key/value dict, keeping the first of each key."""
+    palette: dict[str, str] = {}
+    for entry in entries:
+        if not isinstance(entry, list) or not entry or not isinstance(entry[0], Symbol):
+            continue
+        key = str(entry[0])
+        if key not in palette:
+            palette[key] = _entry_value(entry)
+    return dict(sorted(palette.items()))
+
+
+def parse_definitions(text: str, forms: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Read the top-level palette-related ``defconst``/``defvar`` forms of a source file.
+
+    Args:
+        text: Elisp source.
+        forms: Optional cache of parsed forms keyed by their source text.
+            Revisions usually touch one palette at a time, so unchanged
+            definitions are not parsed again.
+    """
+    definitions: dict[str, Any] = {}
+    starts = [match.start() for match in _TOP_LEVEL_RE.finditer(text)] + [len(text)]
+    for match in _DEFINITION_RE.finditer(text):
+        name = match.group(1)
+        if "palette" not in name and not name.startswith("modus-themes-preset-overrides"):
+            continue
+        end = starts[bisect_right(starts, match.start())]
+        source = text[match.start() : end]
+        form = forms.get(source) if forms is not None else None
+        if form is None:
+            try:
+                form, _ = read_sexp(source)
+            except ValueError:
+                # A nested line starting with "(" split the form; read in full.
+                try:
+                    form, _ = read_sexp(text, match.start())
+                except ValueError:
+                    continue
+            if forms is not None:
+                forms[source] = form
+        if len(form) >= 3:
+            definitions[name] = form[2]
+    return definitions
+
+
+def parse_theme_palette_var(text: str) -> str | None:
+    """Return the palette variable a theme file passes to ``modus-themes-theme``."""
+    match = _THEME_CALL_RE.search(text)
+    if match:
+        form, _ = read_sexp(text, match.start())
+        for arg in form[1:]:
+            if isinstance(arg, list) and arg and arg[0] == "quote":
+                arg = arg[1]
+            if isinstance(arg, Symbol) and arg.endswith("-palette"):
+                return str(arg)
+    return None
+
+
+class History:
+    """Reads raw palettes at many revisions through one cat-file process."""
+
+    def __init__(self, repo_root: str, vendor_path: str = VENDOR_PATH) -> None:
+        self.repo_root = repo_root
+        self.vendor_path = vendor_path
+        self._cat = git_utils.CatFile(repo_root)
+        self._definitions: dict[str, dict[str, Any]] = {}
+        self._forms: dict[str, Any] = {}
+        self._palette_vars: dict[str, str | None] = {}
+        self._palettes: dict[tuple[str, ...], dict[str, dict[str, str]]] = {}
+        self.blobs_read = 0
+
+    def __enter__(self) -> History:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._cat.close()
+
+    def _blob_text(self, object_id: str) -> str:
+        result = self._cat.read(object_id)
+        if result is None:
+            raise KeyError(f"Missing git object: {object_id}")
+        self.blobs_read += 1
+        return result[2].decode("utf-8")
+
+    def _blob_definitions(self, object_id: str) -> dict[str, Any]:
+        definitions = self._definitions.get(object_id)
+        if definitions is None:
+            definitions = self._definitions[object_id] = parse_definitions(self._blob_text(object_id), self._forms)
+        return definitions
+
+    def _blob_palette_var(self, object_id: str) -> str | None:
+        if object_id not in self._palette_vars:
+            text = self._blob_text(object_id)
+            self._palette_vars[object_id] = parse_theme_palette_var(text)
+            if object_id not in self._definitions:
+                self._definitions[object_id] = parse_definitions(text, self._forms)
+        return self._palette_vars[object_id]
+
+    def palettes(self, rev: str) -> dict[str, dict[str, str]]:
+        """Return raw palettes keyed by theme name at a revision."""
+        tree = self._cat.read(f"{rev}:{self.vendor_path}")
+        if tree is None or tree[1] != "tree":
+            return {}
+        object_id_size = len(tree[0]) // 2
+        entries = git_utils.tree_entries(tree[2], object_id_size)
+
+        sources = {
+            name: object_id
+            for name, (_mode, object_id) in entries.items()
+            if name == _LIBRARY_FILE or _THEME_FILE_RE.fullmatch(name)
+        }
+        cache_key = tuple(sorted(sources.items()))
+        cached = self._palettes.get(cache_key)
+        if cached is not None:
+            return cached
+
+        definitions: dict[str, Any] = {}
+        library = sources.get(_LIBRARY_FILE)
+        if library:
+            definitions.update(self._blob_definitions(library))
+        themes: dict[str, str] = {}
+        for name, object_id in sorted(sources.items()):
+            match = _THEME_FILE_RE.fullmatch(name)
+            if not match:
+                continue
+            theme_name = match.group(1)
+            palette_var = self._blob_palette_var(object_id)
+            definitions.update(self._definitions[object_id])
+            for candidate in (palette_var, f"{theme_name}-palette"):
+                if candidate and candidate in definitions:
+                    themes[theme_name] = candidate
+                    break
+
+        overrides = _evaluate(definitions[PRESET_OVERRIDES], definitions) if PRESET_OVERRIDES in definitions else []
+        palettes = {
+            theme_name: normalize_palette(overrides + _evaluate(definitions[palette_var], definitions))
+            for theme_name, palette_var in sorted(themes.items())
+        }
+        self._palettes[cache_key] = palettes
+        return palettes
+
+
+def _delta_e(old: str | None, new: str | None) -> float | None:
+    if not old or not new or not old.startswith("#") or not new.startswith("#"):
+        return None
+    if len(old) != 7 or len(new) != 7:
+        return None
+    lab_old = color.rgb_to_lab((int(old[1:3], 16), int(old[3:5], 16), int(old[5:7], 16)))
+    lab_new = color.rgb_to_lab((int(new[1:3], 16), int(new[3:5], 16), int(new[5:7], 16)))
+    return color.delta_e_2000(lab_old, lab_new)
+
+
+def timeline(
+    snapshots: list[tuple[dict[str, str], dict[str, dict[str, str]]]],
+    key: str,
+) -> dict[str, list[dict[str, Any]]]:
+    """Build per-theme change timelines for one palette key.
+
+    Args:
+        snapshots: (revision info, raw palettes) pairs, oldest first.
+        key: Palette key to follow.
+
+    Returns:
+        Theme name to list of changes, each with "revision", "raw" (the
+        palette entry), "value" (resolved color, or None when absent) and
+        "delta_e" from the previous value (None for the first entry or
+        non-color values).
+    """
+    result: dict[str, list[dict[str, Any]]] = {}
+    previous: dict[str, tuple[str | None, str | None]] = {}
+    resolved_cache: dict[int, dict[str, str]] = {}
+    for revision, palettes in snapshots:
+        for theme_name, raw in palettes.items():
+            resolved = resolved_cache.get(id(raw))
+            if resolved is None:
+                resolved = resolved_cache[id(raw)] = resolve_palette(raw)
+            current = (raw.get(key), resolved.get(key))
+            before = previous.get(theme_name)
+            if before == current:
+                continue
+            previous[theme_name] = current
+            result.setdefault(theme_name, []).append(
+                {
+                    "revision": revision,
+                    "raw": current[0],
+                    "value": current[1],
+                    "delta_e": _delta_e(before[1], current[1]) if before else None,
+                }
+            )
+    return result
+
+
+def ranked_diff(
+    old: dict[str, dict[str, str]],
+    new: dict[str, dict[str, str]],
+) -> list[dict[str, Any]]:
+    """Compare palettes between two revisions, largest perceptual change first.
+
+    Keys are compared by resolved value; entries whose raw definition
+    changed but still resolve to the same color are included with a
+    delta_e of 0. Additions, removals and non-color changes sort last.
+
+    Returns:
+        List of dictionaries with theme, key, old/new raw entries, old/new
+        resolved values and delta_e (None when not comparable).
+    """
+    changes: list[dict[str, Any]] = []
+    for theme_name in sorted(set(old) | set(new)):
+        old_raw = old.get(theme_name, {})
+        new_raw = new.get(theme_name, {})
+        old_resolved = resolve_palette(old_raw)
+        new_resolved = resolve_palette(new_raw)
+        for key in sorted(set(old_raw) | set(new_raw)):
+            if old_raw.get(key) == new_raw.get(key) and old_resolved.get(key) == new_resolved.get(key):
+                continue
+            before = old_resolved.get(key)
+            after = new_resolved.get(key)
+            delta = 0.0 if before == after and before is not None else _delta_e(before, after)
+            changes.append(
+                {
+                    "theme": theme_name,
+                    "key": key,
+                    "old_raw": old_raw.get(key),
+                    "new_raw": new_raw.get(key),
+                    "old": before,
+                    "new": after,
+                    "delta_e": delta,
+                }
+            )
+    changes.sort(key=lambda item: (item["delta_e"] is None, -(item["delta_e"] or 0.0), item["theme"], item["key"]))
+    return changes
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Near-duplicate color analysis for Modus palettes.
+
+Finds palette keys whose colors are visually indistinguishable
+(CIEDE2000 at or below a threshold), both within each palette and for
+the same key across variants.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping
+from fnmatch import fnmatchcase
+from typing import Any
+
+from scripts.common import color
+from scripts.common.metrics import PaletteMetrics
+from scripts.common.palette import Palette
+
+# Largest CIEDE2000 lightness weight S_L, reached at L = 0 or L = 100.
+_MAX_S_L = 1 + 0.015 * 2500 / math.sqrt(2520)
+# Lower bound on the chroma/hue quadratic form once the R_T rotation term
+# (|R_T| <= 2 sin 60 deg) is taken into account.
+_ROTATION_FLOOR = math.sqrt(1 - math.sin(math.radians(60)))
+
+
+def _ab_radius(chroma: float, threshold: float) -> float:
+    """Return the a/b search radius that cannot miss a pair within threshold.
+
+    CIEDE2000 divides chroma and hue differences by S_C = 1 + 0.045 * C',
+    where C' is at most 1.5x the mean CIELAB chroma of the pair, so a pair
+    within ``threshold`` is never further apart in a/b than this radius.
+    """
+    slack = _ROTATION_FLOOR - 0.03375 * threshold
+    if slack <= 0:
+        return math.inf
+    return threshold * (1 + 0.0675 * chroma) / slack
+
+
+def find_close_pairs(
+    labs: list[tuple[float, float, float]],
+    threshold: float,
+) -> list[tuple[int, int, float]]:
+    """Find all pairs of CIELAB colors within a CIEDE2000 threshold.
+
+    Colors are bucketed on a grid; each color only visits the cells its
+    exact search bounds can reach, so the cost grows with the number of
+    nearby colors rather than with every pair.
+
+    Args:
+        labs: CIELAB colors.
+        threshold: Maximum CIEDE2000 difference.
+
+    Returns:
+        List of (i, j, delta_e) with i < j.
+    """
+    l_cell = max(_MAX_S_L * threshold, 1e-9)
+    ab_cell = max(4 * threshold, 1.0)
+    grid: dict[tuple[int, int, int], list[int]] = {}
+    for i, (l, a, b) in enumerate(labs):
+        grid.setdefault((int(l // l_cell), int(a // ab_cell), int(b // ab_cell)), []).append(i)
+
+    pairs: list[tuple[int, int, float]] = []
+    for i, lab in enumerate(labs):
+        l, a, b = lab
+        radius = _ab_radius(math.hypot(a, b), threshold)
+        if math.isinf(radius):
+            candidates = range(i + 1, len(labs))
+        else:
+            span = int(math.ceil(radius / ab_cell))
+            cl, ca, cb = int(l // l_cell), int(a // ab_cell), int(b // ab_cell)
+            candidates = []
+            for dl in (-1, 0, 1):
+                for da in range(-span, span + 1):
+                    for db in range(-span, span + 1):
+                        bucket = grid.get((cl + dl, ca + da, cb + db))
+                        if bucket:
+                            candidates.extend(j for j in bucket if j > i)
+        for j in candidates:
+            other = labs[j]
+            if abs(other[0] - l) > _MAX_S_L * threshold:
+                continue
+            delta = color.delta_e_2000(lab, other)
+            if delta <= threshold:
+                pairs.append((i, j, delta))
+    return pairs
+
+
+def _matches(key: str, patterns: list[str] | None) -> bool:
+    return not patterns or any(fnmatchcase(key, pattern) for pattern in patterns)
+
+
+def near_duplicates(
+    palettes: Mapping[str, Palette],
+    threshold: float = 2.0,
+    key_patterns: list[str] | None = None,
+    metrics: Mapping[str, PaletteMetrics] | None = None,
+) -> dict[str, Any]:
+    """Find near-duplicate colors within palettes and across variants.
+
+    Identical colors are not reported; only distinct colors that fall
+    within the threshold are.
+
+    Args:
+        palettes: Resolved palettes keyed by theme name.
+        threshold: Maximum CIEDE2000 difference to report.
+        key_patterns: Optional glob patterns; only matching keys are checked.
+        metrics: Precomputed metrics keyed by theme name; CIELAB values are
+            read from them rather than converted.
+
+    Returns:
+        Dictionary with "palettes" entries (theme, key_a, hex_a, key_b, hex_b,
+        delta_e), "variants" entries (key, theme_a, hex_a, theme_b, hex_b,
+        delta_e), and the number of distinct "colors" and close "pairs".
+    """
+    occurrences: dict[tuple[int, int, int], list[tuple[str, str]]] = {}
+    known: dict[tuple[int, int, int], tuple[float, float, float]] = {}
+    for theme_name, palette in palettes.items():
+        table = metrics.get(theme_name) if metrics else None
+        for key in palette:
+            if not _matches(key, key_patterns) or not palette.is_color(key):
+                continue
+            rgb = palette.rgb(key)
+            occurrences.setdefault(rgb, []).append((theme_name, key))
+            if table is not None and rgb not in known and key in table:
+                known[rgb] = table.lab(key)
+
+    colors = list(occurrences)
+    missing = [rgb for rgb in colors if rgb not in known]
+    known.update(zip(missing, color.rgb_to_lab_batch(missing)))
+    labs = [known[rgb] for rgb in colors]
+    pairs = find_close_pairs(labs, threshold)
+
+    within: list[tuple] = []
+    across: list[tuple] = []
+    for i, j, delta in pairs:
+        hex_i = "#%02x%02x%02x" % colors[i]
+        hex_j = "#%02x%02x%02x" % colors[j]
+        by_theme: dict[str, list[str]] = {}
+        by_key: dict[str, list[str]] = {}
+        for theme_name, key in occurrences[colors[i]]:
+            by_theme.setdefault(theme_name, []).append(key)
+            by_key.setdefault(key, []).append(theme_name)
+        for theme_name, key in occurrences[colors[j]]:
+            for other_key in by_theme.get(theme_name, []):
+                first, second = sorted([(other_key, hex_i), (key, hex_j)])
+                within.append((theme_name, *first, *second, delta))
+            for other_theme in by_key.get(key, []):
+                first, second = sorted([(other_theme, hex_i), (theme_name, hex_j)])
+                across.append((key, *first, *second, delta))
+
+    within.sort()
+    across.sort()
+    return {"palettes": within, "variants": across, "colors": len(colors), "pairs": len(pairs)}
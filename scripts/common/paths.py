@@ -13,3 +13,19 @@ def xdg_config_home() -> Path:
     Returns $XDG_CONFIG_HOME if set, otherwise ~/.config.
     """
     return Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
+
+
+def xdg_state_home() -> Path:
+    """Return the XDG state home directory.
+
+    Returns $XDG_STATE_HOME if set, otherwise ~/.local/state.
+    """
+    return Path(os.environ.get("XDG_STATE_HOME", Path.home() / ".local" / "state"))
+
+
+def xdg_cache_home() -> Path:
+    """Return the XDG cache home directory.
+
+    Returns $XDG_CACHE_HOME if set, otherwise ~/.cache.
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
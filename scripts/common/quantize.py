@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Nearest-color quantization to xterm 256-color and 16-color palettes.
+
+Each target palette is converted to OKLab once and bucketed on a grid.
+Lookups search outward from the query's cell and stop as soon as no
+unvisited cell can hold a closer entry, and results are memoized per
+color, so quantizing every key of every palette is a dictionary hit
+after the first time a color is seen.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+from scripts.common import color
+
+# xterm's default colors for the 16 system slots.
+XTERM_SYSTEM: tuple[tuple[int, int, int], ...] = (
+    (0, 0, 0),
+    (205, 0, 0),
+    (0, 205, 0),
+    (205, 205, 0),
+    (0, 0, 238),
+    (205, 0, 205),
+    (0, 205, 205),
+    (229, 229, 229),
+    (127, 127, 127),
+    (255, 0, 0),
+    (0, 255, 0),
+    (255, 255, 0),
+    (92, 92, 255),
+    (255, 0, 255),
+    (0, 255, 255),
+    (255, 255, 255),
+)
+
+_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+_CELL = 0.05
+
+
+def _xterm_palette() -> tuple[tuple[int, int, int], ...]:
+    colors = list(XTERM_SYSTEM)
+    for r in _CUBE_LEVELS:
+        for g in _CUBE_LEVELS:
+            for b in _CUBE_LEVELS:
+                colors.append((r, g, b))
+    colors.extend((8 + 10 * i,) * 3 for i in range(24))
+    return tuple(colors)
+
+
+# The 256 xterm colors: system slots, 6x6x6 cube, gray ramp.
+XTERM_COLORS = _xterm_palette()
+
+
+class Quantizer:
+    """Exact nearest-neighbour lookup in OKLab over a fixed set of colors."""
+
+    __slots__ = ("indexes", "colors", "_points", "_grid", "_memo")
+
+    def __init__(self, indexes: list[int], colors: list[tuple[int, int, int]]) -> None:
+        self.indexes = indexes
+        self.colors = colors
+        self._points = [color.rgb_to_oklab(rgb) for rgb in colors]
+        self._grid: dict[tuple[int, int, int], list[int]] = {}
+        for position, point in enumerate(self._points):
+            self._grid.setdefault(self._cell(point), []).append(position)
+        self._memo: dict[tuple[int, int, int], int] = {}
+
+    @staticmethod
+    def _cell(point: tuple[float, float, float]) -> tuple[int, int, int]:
+        return int(point[0] // _CELL), int(point[1] // _CELL), int(point[2] // _CELL)
+
+    def nearest(self, rgb: tuple[int, int, int]) -> int:
+        """Return the palette index of the closest color to ``rgb``."""
+        index = self._memo.get(rgb)
+        if index is None:
+            index = self._memo[rgb] = self.indexes[self._search(color.rgb_to_oklab(rgb))]
+        return index
+
+    def _search(self, point: tuple[float, float, float]) -> int:
+        cl, ca, cb = self._cell(point)
+        best = -1
+        best_dist = math.inf
+        ring = 0
+        while True:
+            for dl in range(-ring, ring + 1):
+                for da in range(-ring, ring + 1):
+                    for db in range(-ring, ring + 1):
+                        if max(abs(dl), abs(da), abs(db)) != ring:
+                            continue
+                        for position in self._grid.get((cl + dl, ca + da, cb + db), ()):
+                            dist = math.dist(point, self._points[position])
+                            if dist < best_dist:
+                                best, best_dist = position, dist
+            # Every unvisited cell is at least `ring` cells away from the query.
+            if best >= 0 and best_dist <= ring * _CELL:
+                return best
+            ring += 1
+
+
+@lru_cache(maxsize=None)
+def quantizer(kind: str) -> Quantizer:
+    """Return the shared quantizer for "ansi256" or "ansi16".
+
+    ``ansi256`` only targets slots 16-255, since terminals and users
+    redefine the 16 system colors.
+    """
+    if kind == "ansi256":
+        indexes = list(range(16, 256))
+    elif kind == "ansi16":
+        indexes = list(range(16))
+    else:
+        raise KeyError(f"Unknown quantization palette: {kind}")
+    return Quantizer(indexes, [XTERM_COLORS[i] for i in indexes])
+
+
+def nearest_ansi256(rgb: tuple[int, int, int]) -> int:
+    """Return the closest xterm color index (16-255) to an sRGB color."""
+    return quantizer("ansi256").nearest(rgb)
+
+
+def nearest_ansi16(rgb: tuple[int, int, int]) -> int:
+    """Return the closest xterm system color index (0-15) to an sRGB color."""
+    return quantizer("ansi16").nearest(rgb)
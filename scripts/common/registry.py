@@ -1,41 +1,158 @@
 #!/usr/bin/env python3
-"""Tool registry for Modus theme ports."""
+"""Tool registry for Modus theme ports.
+
+Ports are discovered from one or more port roots: directories holding
+``<tool>/<tool>-port.json`` manifests. The repository's ``ports/`` is
+always the first root; more come from, in order:
+
+- ``$MODUS_PORTS_PATH`` (``os.pathsep``-separated directories),
+- ``port_roots`` in ``$XDG_CONFIG_HOME/modus-themes-ports/config.json``,
+- entry points in the ``modus_themes_ports.port_roots`` group, each
+  loading to a path, a list of paths or a callable returning either.
+
+Discovery is lazy: tool names come from manifest file names, and a
+manifest is parsed only when its tool is looked up. Relative paths in a
+manifest resolve against the parent of its port root (``_root``).
+
+A manifest's ``mapping_overlays`` list variant-specific mapping tweaks:
+``{"themes": "<glob>", "mapping_path": "..."}`` entries whose files are
+deep-merged, in order, onto ``mapping_path`` for matching theme names.
+"""
 
 from __future__ import annotations
 
+import fnmatch
 import json
+import os
+import sys
+from collections.abc import Iterator, Mapping
+from importlib import metadata
 from pathlib import Path
 from typing import Any
 
+from scripts.common import paths
+
+PORTS_PATH_ENV = "MODUS_PORTS_PATH"
+ENTRY_POINT_GROUP = "modus_themes_ports.port_roots"
+
+_MANIFEST_SUFFIX = "-port.json"
+
+
+def config_path() -> Path:
+    """Return the user config file that can list extra port roots."""
+    return paths.xdg_config_home() / "modus-themes-ports" / "config.json"
+
+
+def _entry_points() -> list[metadata.EntryPoint]:
+    if sys.version_info >= (3, 10):
+        return list(metadata.entry_points(group=ENTRY_POINT_GROUP))
+    return list(metadata.entry_points().get(ENTRY_POINT_GROUP, []))
+
+
+def _entry_point_roots() -> list[Path]:
+    roots: list[Path] = []
+    for entry_point in _entry_points():
+        value = entry_point.load()
+        if callable(value):
+            value = value()
+        if isinstance(value, (str, os.PathLike)):
+            value = [value]
+        roots.extend(Path(item) for item in value)
+    return roots
+
+
+def port_roots(repo_root: Path) -> list[Path]:
+    """Return every port root, the repository's own first, without duplicates."""
+    roots = [repo_root / "ports"]
+    env = os.environ.get(PORTS_PATH_ENV)
+    if env:
+        roots.extend(Path(item).expanduser() for item in env.split(os.pathsep) if item)
+    config = config_path()
+    if config.is_file():
+        data = json.loads(config.read_text(encoding="utf-8"))
+        roots.extend(Path(item).expanduser() for item in data.get("port_roots", []))
+    roots.extend(_entry_point_roots())
+
+    unique: list[Path] = []
+    for root in roots:
+        if root.resolve() not in {existing.resolve() for existing in unique}:
+            unique.append(root)
+    return unique
+
 
-def load_registry(repo_root: Path) -> dict[str, dict[str, Any]]:
-    """Load the tool registry from port manifests.
+class Registry(Mapping):
+    """Tool manifests keyed by tool name, parsed on first access."""
+
+    def __init__(self, roots: list[Path]) -> None:
+        self.roots = roots
+        self._paths: dict[str, Path] = {}
+        self._manifests: dict[str, dict[str, Any]] = {}
+        for root in roots:
+            if not root.is_dir():
+                raise FileNotFoundError(f"Ports directory missing: {root}")
+            for manifest_path in sorted(root.glob(f"*/*{_MANIFEST_SUFFIX}")):
+                tool = manifest_path.name[: -len(_MANIFEST_SUFFIX)]
+                if tool in self._paths:
+                    raise ValueError(f"Duplicate tool entry: {tool} ({self._paths[tool]}, {manifest_path})")
+                self._paths[tool] = manifest_path
+
+    def manifest_path(self, tool: str) -> Path:
+        """Return a tool's manifest file without parsing it."""
+        return self._paths[tool]
+
+    def __getitem__(self, tool: str) -> dict[str, Any]:
+        manifest = self._manifests.get(tool)
+        if manifest is None:
+            manifest_path = self._paths[tool]
+            with manifest_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not data.get("tool"):
+                raise ValueError(f"Missing tool name in {manifest_path}")
+            if data["tool"] != tool:
+                raise ValueError(f"Tool name {data['tool']!r} does not match manifest file {manifest_path}")
+            manifest = data | {"_manifest_path": str(manifest_path), "_root": str(manifest_path.parent.parent.parent)}
+            self._manifests[tool] = manifest
+        return manifest
+
+    def __contains__(self, tool: object) -> bool:
+        return tool in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+def mapping_overlays(manifest: dict[str, Any], theme_name: str) -> tuple[Path, ...]:
+    """Return the overlay mapping files that apply to a theme, in merge order.
+
+    Raises:
+        ValueError: If an overlay entry lacks ``themes`` or ``mapping_path``.
+    """
+    root = Path(manifest.get("_root", "."))
+    overlays = []
+    for entry in manifest.get("mapping_overlays") or []:
+        if not entry.get("themes") or not entry.get("mapping_path"):
+            raise ValueError(f"mapping_overlays entries require themes and mapping_path ({manifest.get('tool')})")
+        if fnmatch.fnmatchcase(theme_name, entry["themes"]):
+            overlays.append(root / entry["mapping_path"])
+    return tuple(overlays)
+
+
+def load_registry(repo_root: Path) -> Registry:
+    """Discover the tool registry across all port roots.
 
     Args:
         repo_root: Repository root directory.
 
     Returns:
-        Dictionary mapping tool names to their manifest data.
+        Lazy mapping of tool names to their manifest data.
     """
-    ports_dir = repo_root / "ports"
-    if not ports_dir.is_dir():
-        raise FileNotFoundError(f"Ports directory missing: {ports_dir}")
-
-    registry: dict[str, dict[str, Any]] = {}
-    for manifest_path in sorted(ports_dir.glob("*/*-port.json")):
-        with manifest_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        tool = data.get("tool")
-        if not tool:
-            raise ValueError(f"Missing tool name in {manifest_path}")
-        if tool in registry:
-            raise ValueError(f"Duplicate tool entry: {tool}")
-        registry[tool] = data | {"_manifest_path": str(manifest_path)}
-
-    return registry
+    return Registry(port_roots(repo_root))
 
 
-def get_tool(registry: dict[str, dict[str, Any]], tool: str) -> dict[str, Any]:
+def get_tool(registry: Mapping[str, dict[str, Any]], tool: str) -> dict[str, Any]:
     """Get a tool's manifest from the registry.
 
     Args:
@@ -4,14 +4,303 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import sys
+import threading
+from collections.abc import Iterator
 from pathlib import Path
+from types import ModuleType
+from typing import Any
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from scripts.common import cache
+from scripts.common import delta
 from scripts.common import io
+from scripts.common import template as template_utils
+from scripts.common.palette import Palette
+
+
+def content_hash(data: str | bytes) -> str:
+    """Return a hex SHA-256 digest for text or bytes."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class RenderSession:
+    """Render jobs with shared input caches and content-addressed reuse.
+
+    Jobs are dictionaries with ``tool``, ``theme``, ``kind`` ("template",
+    "extra_template" or "spec"), ``source``, ``mapping_path``, optional
+    ``mapping_overlays`` (merged onto the mapping in order) and
+    ``output_path``. Two jobs whose template, effective mapping and palette
+    hash to the same key are rendered once and share the resulting text.
+    Jobs with ``inherits`` (a base theme), ``delta_format`` and
+    ``base_mapping_overlays`` (the base theme's overlays) are written as
+    overrides of the base theme's rendering. Fragments pulled in with
+    ``{include:name}`` are rendered once per palette and mapping, and are
+    part of the including template's key. A job may carry ``palette``, a
+    (resolved palette, content hash) pair, to render a palette that has no
+    file in ``palette_paths``.
+
+    Args:
+        palette_paths: Palette files keyed by theme name.
+        cache_size: How many rendered documents and fragments to keep
+            (unbounded if None).
+    """
+
+    def __init__(self, palette_paths: dict[str, Path], cache_size: int | None = None) -> None:
+        self.palette_paths = palette_paths
+        self.cache_size = cache_size
+        self.renders = 0
+        self.reused = 0
+        self._palettes: dict[str, tuple[Palette, str]] = {}
+        self._mappings: dict[Path, dict[str, Any]] = {}
+        self._merged: dict[tuple[Path, ...], dict[str, Any]] = {}
+        self._texts: dict[Path, tuple[str, str]] = {}
+        self._specs: dict[Path, tuple[ModuleType, str]] = {}
+        self._value_keys: dict[Path, list[str]] = {}
+        self._compiled: dict[Path, list[list[str]]] = {}
+        self._fragment_paths: dict[Path, list[Path]] = {}
+        self.fragments = template_utils.Fragments(self.compiled, cache_size)
+        self._disk = cache.DiskCache()
+        self._rendered: dict[tuple[str, str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def palette(self, theme_name: str) -> Palette:
+        """Return the resolved palette for a theme."""
+        return self.palette_entry(theme_name)[0]
+
+    def palette_entry(self, theme_name: str) -> tuple[Palette, str]:
+        """Return the resolved palette for a theme and its content hash."""
+        if theme_name not in self._palettes:
+            path = self.palette_paths[theme_name]
+            data = path.read_bytes()
+
+            def resolve() -> dict[str, Any]:
+                name, raw = io.parse_palette(json.loads(data), path)
+                resolved = io.resolve_palette(raw)
+                digest = content_hash(theme_name + "\0" + json.dumps(resolved, sort_keys=True))
+                return {"name": name, "palette": resolved, "digest": digest}
+
+            # NOTE: Resolved palettes are shared with concurrent processes
+            # through the on-disk cache, keyed by theme name, file content
+            # and resolver version.
+            key = content_hash(f"{io.RESOLVER_VERSION}\0{theme_name}\0".encode("utf-8") + data)
+            entry = self._disk.get_or_build("palettes", key, resolve)
+            self._palettes[theme_name] = (Palette(entry["palette"], entry["name"]), entry["digest"])
+        return self._palettes[theme_name]
+
+    def mapping(self, path: Path) -> dict[str, Any]:
+        """Return a loaded mapping file."""
+        if path not in self._mappings:
+            self._mappings[path] = io.load_mapping(str(path))
+        return self._mappings[path]
+
+    def job_mapping(self, job: dict[str, Any]) -> dict[str, Any]:
+        """Return a job's mapping with its overlays merged, once per overlay set."""
+        overlays = job.get("mapping_overlays") or ()
+        if not overlays:
+            return self.mapping(job["mapping_path"])
+        layers = (job["mapping_path"], *overlays)
+        if layers not in self._merged:
+            self._merged[layers] = io.merge_mappings(self.mapping(path) for path in layers)
+        return self._merged[layers]
+
+    def template(self, path: Path) -> str:
+        """Return template text."""
+        return self._template_entry(path)[0]
+
+    def _template_entry(self, path: Path) -> tuple[str, str]:
+        if path not in self._texts:
+            text = path.read_text(encoding="utf-8")
+            self._texts[path] = (text, content_hash(text))
+        return self._texts[path]
+
+    def compiled(self, path: Path) -> list[list[str]]:
+        """Return a template's compiled segments, shared through the on-disk cache."""
+        if path not in self._compiled:
+            text, _ = self._template_entry(path)
+            key = content_hash(f"{template_utils.COMPILER_VERSION}\0{template_utils.TOKEN_RE.pattern}\0{text}")
+            self._compiled[path] = self._disk.get_or_build(
+                "templates", key, lambda: template_utils.compile_template(text)
+            )
+        return self._compiled[path]
+
+    def fragment_paths(self, path: Path) -> list[Path]:
+        """Return the fragments a template includes, directly or not."""
+        if path not in self._fragment_paths:
+            self._fragment_paths[path] = template_utils.fragment_paths(path)
+        return self._fragment_paths[path]
+
+    def _spec_entry(self, path: Path) -> tuple[ModuleType, str]:
+        if path not in self._specs:
+            self._specs[path] = (io.load_spec(str(path)), content_hash(path.read_bytes()))
+        return self._specs[path]
+
+    def _mapping_hash(self, job: dict[str, Any]) -> str:
+        mapping = self.job_mapping(job)
+        if job["kind"] == "spec":
+            return content_hash(json.dumps(mapping, sort_keys=True))
+        # NOTE: Templates only see mapping keys through {value:...} tokens and
+        # value.* palette keys, so ports with different mapping files can
+        # still share a render.
+        source = job["source"]
+        if source not in self._value_keys:
+            keys = set()
+            prefix = template_utils.MAPPING_REF_PREFIX
+            for path in (source, *self.fragment_paths(source)):
+                for match in template_utils.TOKEN_RE.finditer(self.template(path)):
+                    kind, key = match.group(1), match.group(2)
+                    if kind == "value":
+                        keys.add(key)
+                    elif key.startswith(prefix) and template_utils.is_palette_kind(kind):
+                        keys.add(key[len(prefix):].split(".")[0])
+            self._value_keys[source] = sorted(keys)
+        used = {key: mapping.get(key) for key in self._value_keys[source]}
+        return content_hash(json.dumps(used, sort_keys=True))
+
+    def job_key(self, job: dict[str, Any]) -> tuple[str, str, str]:
+        """Return the (source hash, mapping hash, palette hash) key for a job."""
+        if job["kind"] == "spec":
+            source_hash = self._spec_entry(job["source"])[1]
+        else:
+            source_hash = self._template_entry(job["source"])[1]
+            fragments = self.fragment_paths(job["source"])
+            if fragments:
+                parts = [source_hash, *(f"{path}\0{self._template_entry(path)[1]}" for path in fragments)]
+                source_hash = content_hash("\0".join(parts))
+        palette_hash = self._job_palette(job)[1]
+        if job.get("inherits"):
+            base_hash = self.palette_entry(job["inherits"])[1]
+            base_mapping_hash = self._mapping_hash(self._base_job(job))
+            palette_hash = content_hash(f"{palette_hash}\0{base_hash}\0{base_mapping_hash}\0{job['delta_format']}")
+        return source_hash, self._mapping_hash(job), palette_hash
+
+    def render(self, job: dict[str, Any], keep: bool = True) -> str:
+        """Render a job, reusing the result of any identical earlier job.
+
+        With ``keep`` false the result is not kept for later jobs, for
+        output streamed straight to a file such as a family entry.
+        """
+        key = self.job_key(job)
+        with self._lock:
+            if key in self._rendered:
+                self.reused += 1
+                return self._rendered[key]
+
+        content = self._render_job(job)
+        with self._lock:
+            self.renders += 1
+            if keep:
+                self._keep(key, content)
+        return content
+
+    def iter_render(self, job: dict[str, Any], chunk_size: int = 16 * 1024) -> Iterator[str]:
+        """Render a job incrementally, in chunks of about ``chunk_size`` characters.
+
+        Template jobs are rendered as they stream; the finished text is
+        kept for reuse as ``render`` keeps it. Other jobs, and jobs
+        already rendered, are yielded whole.
+        """
+        if job["kind"] == "spec" or job.get("inherits"):
+            yield self.render(job)
+            return
+        key = self.job_key(job)
+        with self._lock:
+            content = self._rendered.get(key)
+            if content is not None:
+                self.reused += 1
+        if content is not None:
+            yield content
+            return
+
+        segments, palette, mapping, theme_name, include = self._template_inputs(job)
+        parts: list[str] = []
+        for chunk in template_utils.iter_render_compiled(segments, palette, mapping, theme_name, chunk_size, include):
+            parts.append(chunk)
+            yield chunk
+        with self._lock:
+            self.renders += 1
+            self._keep(key, "".join(parts))
+
+    def _keep(self, key: tuple[str, str, str], content: str) -> None:
+        # Called with the lock held.
+        self._rendered[key] = content
+        while self.cache_size is not None and len(self._rendered) > self.cache_size:
+            del self._rendered[next(iter(self._rendered))]
+
+    def _job_palette(self, job: dict[str, Any]) -> tuple[Palette, str]:
+        return job.get("palette") or self.palette_entry(job["theme"])
+
+    def _template_inputs(self, job: dict[str, Any]) -> tuple[Any, ...]:
+        # Arguments of template_utils.render_compiled for a template job.
+        theme_name = job["theme"]
+        palette, palette_hash = self._job_palette(job)
+        mapping = self.job_mapping(job)
+        layers = "\0".join(str(path) for path in (job["mapping_path"], *(job.get("mapping_overlays") or ())))
+        include = self.fragments.includer(job["source"], palette, mapping, theme_name, f"{palette_hash}\0{layers}")
+        return self.compiled(job["source"]), palette, mapping, theme_name, include
+
+    def _render_job(self, job: dict[str, Any]) -> str:
+        if job["kind"] == "spec":
+            palette = self._job_palette(job)[0]
+            content = self._spec_entry(job["source"])[0].render(job["theme"], palette, self.job_mapping(job))
+        else:
+            content = template_utils.render_compiled(*self._template_inputs(job))
+        if job.get("inherits"):
+            content = delta.render_delta(job["delta_format"], self._base_render(job), content, job["inherits"])
+        return content
+
+    @staticmethod
+    def _base_job(job: dict[str, Any]) -> dict[str, Any]:
+        return job | {
+            "theme": job["inherits"],
+            "inherits": None,
+            "palette": None,
+            "mapping_overlays": job.get("base_mapping_overlays") or (),
+        }
+
+    def _base_render(self, job: dict[str, Any]) -> str:
+        # The full rendering of a delta job's base theme; shared with the base
+        # job itself but not counted as a render of its own.
+        base_job = self._base_job(job)
+        key = self.job_key(base_job)
+        with self._lock:
+            content = self._rendered.get(key)
+        if content is None:
+            content = self._render_job(base_job)
+            with self._lock:
+                self._keep(key, content)
+        return content
+
+
+def check_output(path: Path, content: str) -> str | None:
+    """Compare rendered content against an output file without writing.
+
+    Sizes are compared first; contents are hashed only when sizes match.
+
+    Args:
+        path: Output file path.
+        content: Freshly rendered content.
+
+    Returns:
+        "missing" or "stale" if the file is out of date, otherwise None.
+    """
+    expected = io.output_bytes(content)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return "missing"
+    if size != len(expected):
+        return "stale"
+    if content_hash(path.read_bytes()) != content_hash(expected):
+        return "stale"
+    return None
 
 
 def render_all(
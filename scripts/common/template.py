@@ -1,57 +1,244 @@
 #!/usr/bin/env python3
-"""Template rendering for Modus theme ports."""
+"""Template rendering for Modus theme ports.
+
+Templates may pull in partials with ``{include:name}``: ``name.tmpl``
+from the including template's directory, or else from ``ports/shared/``.
+A fragment's own trailing newline is dropped so an include can stand on
+its own line.
+
+Blend tokens derive colors from palette keys, mixing in linear light:
+``{mix:bg-main,blue,0.15}``, ``{lighten:fg-dim,0.1}``,
+``{darken:bg-main,0.1}`` and ``{alpha:bg-region,0x80}``.
+"""
 
 from __future__ import annotations
 
+import colorsys
 import re
+import threading
+from collections.abc import Callable, Iterator, Mapping
+from pathlib import Path
 from typing import Any
 
-TOKEN_RE = re.compile(r"\{(color|value|meta|rgb|rgba):([A-Za-z0-9_-]+)\}")
+from scripts.common import color as color_utils
+from scripts.common import quantize
+from scripts.common.palette import Palette
 
+TOKEN_RE = re.compile(r"\{([a-z][a-z0-9_]*):([A-Za-z0-9_.,-]+)\}")
 
-def _theme_title(theme: str) -> str:
-    return " ".join([part.capitalize() for part in theme.split("-")])
+# Compiled templates are cached on disk by text, token pattern and this
+# version; bump it whenever compile_template's output changes.
+COMPILER_VERSION = 2
 
+_KIND_RE = re.compile(r"[a-z][a-z0-9_]*")
 
-def _hex_to_rgb(value: str) -> str:
-    if not isinstance(value, str) or not value.startswith("#") or len(value) != 7:
-        raise ValueError(f"Expected #RRGGBB value, got: {value}")
-    r = int(value[1:3], 16)
-    g = int(value[3:5], 16)
-    b = int(value[5:7], 16)
-    return f"{r};{g};{b}"
+# Blend token kinds; see parse_blend.
+BLEND_KINDS = ("mix", "alpha", "lighten", "darken")
+
+# A palette token whose key starts with this names a mapping entry holding
+# the palette key instead, e.g. {ansi256:value.palette.1}.
+MAPPING_REF_PREFIX = "value."
+
+# Token kinds handled by render_template itself rather than a format.
+_BUILTIN_KINDS = {"color", "value", "meta", "include", *BLEND_KINDS}
+
+SHARED_FRAGMENT_DIR = Path(__file__).resolve().parents[2] / "ports" / "shared"
+
+# Palette color formats: token kind -> function of (r, g, b, a) 0-255 channels.
+FORMATS: dict[str, Callable[[tuple[int, int, int, int]], str]] = {}
+
+
+def register_format(kind: str, func: Callable[[tuple[int, int, int, int]], str]) -> None:
+    """Register a ``{kind:palette-key}`` token that formats a palette color.
+
+    ``func`` receives (red, green, blue, alpha) 0-255 channels and returns
+    the text to insert. Results are memoized per palette and key, so each
+    format runs at most once per color of a palette.
+
+    Raises:
+        ValueError: If the kind is not a valid token kind or is already taken.
+    """
+    if not _KIND_RE.fullmatch(kind):
+        raise ValueError(f"Invalid token kind: {kind}")
+    if kind in _BUILTIN_KINDS or kind in FORMATS:
+        raise ValueError(f"Token kind already registered: {kind}")
+    FORMATS[kind] = func
+
+
+def is_palette_kind(kind: str) -> bool:
+    """Return True if tokens of this kind reference a palette key."""
+    return kind == "color" or kind in FORMATS
+
+
+def mapping_ref(mapping: Mapping[str, Any], key: str) -> str:
+    """Return the palette key a ``value.``-prefixed token key selects.
+
+    The rest of the key is a dotted path into the mapping.
+
+    Raises:
+        KeyError: If the mapping has no such entry.
+        ValueError: If the entry is not a palette key name.
+    """
+    path = key[len(MAPPING_REF_PREFIX):]
+    node: Any = mapping
+    for part in path.split("."):
+        if not isinstance(node, Mapping) or part not in node:
+            raise KeyError(f"Missing mapping key: {path}")
+        node = node[part]
+    if not isinstance(node, str):
+        raise ValueError(f"Mapping key '{path}' does not name a palette key")
+    return node
+
+
+def _theme_title(theme: str) -> str:
+    return " ".join([part.capitalize() for part in theme.split("-")])
 
 
 def _format_unit(value: float) -> str:
     return f"{value:.6f}".rstrip("0").rstrip(".")
 
 
-def _hex_to_rgba(value: str) -> str:
+# Formatted 0-1 channel strings, indexed by 0-255 channel value.
+_UNIT_STRINGS = tuple(_format_unit(value / 255.0) for value in range(256))
+
+
+def _hex_channels(value: str) -> tuple[int, int, int, int]:
     if not isinstance(value, str) or not value.startswith("#") or len(value) not in (7, 9):
         raise ValueError(f"Expected #RRGGBB or #RRGGBBAA value, got: {value}")
-    r = int(value[1:3], 16) / 255.0
-    g = int(value[3:5], 16) / 255.0
-    b = int(value[5:7], 16) / 255.0
-    a = 1.0 if len(value) == 7 else int(value[7:9], 16) / 255.0
-    return f"{_format_unit(r)} {_format_unit(g)} {_format_unit(b)} {_format_unit(a)}"
+    r = int(value[1:3], 16)
+    g = int(value[3:5], 16)
+    b = int(value[5:7], 16)
+    a = 0xFF if len(value) == 7 else int(value[7:9], 16)
+    return r, g, b, a
 
 
-def _resolve_palette_value(palette: dict[str, str], key: str) -> str:
-    """Resolve a palette value, following one level of indirection if needed."""
+def _resolve_palette_key(palette: Mapping[str, str], key: str) -> str:
+    """Return the key holding a palette value, following one level of indirection."""
     value = palette[key]
     if isinstance(value, str) and value in palette:
-        return palette[value]
-    return value
+        return value
+    return key
 
 
-def render_template(
-    template: str,
-    palette: dict[str, str],
+def _palette_channels(palette: Mapping[str, str], key: str) -> tuple[int, int, int, int]:
+    if isinstance(palette, Palette):
+        return palette.rgba(key)
+    return _hex_channels(palette[key])
+
+
+def _format_rgb(rgba: tuple[int, int, int, int]) -> str:
+    return f"{rgba[0]};{rgba[1]};{rgba[2]}"
+
+
+def _format_rgba(rgba: tuple[int, int, int, int]) -> str:
+    return " ".join([_UNIT_STRINGS[channel] for channel in rgba])
+
+
+def _format_rgb_float(rgba: tuple[int, int, int, int]) -> str:
+    return " ".join([_UNIT_STRINGS[channel] for channel in rgba[:3]])
+
+
+def _format_hex_noprefix(rgba: tuple[int, int, int, int]) -> str:
+    if rgba[3] == 0xFF:
+        return "%02x%02x%02x" % rgba[:3]
+    return "%02x%02x%02x%02x" % rgba
+
+
+def _format_hsl(rgba: tuple[int, int, int, int]) -> str:
+    h, l, s = colorsys.rgb_to_hls(rgba[0] / 255, rgba[1] / 255, rgba[2] / 255)
+    return f"hsl({h * 360:.0f}, {s * 100:.0f}%, {l * 100:.0f}%)"
+
+
+def _format_ansi256(rgba: tuple[int, int, int, int]) -> str:
+    return str(quantize.nearest_ansi256(rgba[:3]))
+
+
+def _format_ansi16(rgba: tuple[int, int, int, int]) -> str:
+    return str(quantize.nearest_ansi16(rgba[:3]))
+
+
+def _format_ansi256_hex(rgba: tuple[int, int, int, int]) -> str:
+    return "#%02x%02x%02x" % quantize.XTERM_COLORS[quantize.nearest_ansi256(rgba[:3])]
+
+
+register_format("rgb", _format_rgb)
+register_format("rgba", _format_rgba)
+register_format("rgb_float", _format_rgb_float)
+register_format("hex_noprefix", _format_hex_noprefix)
+register_format("hsl", _format_hsl)
+register_format("ansi256", _format_ansi256)
+register_format("ansi16", _format_ansi16)
+register_format("ansi256_hex", _format_ansi256_hex)
+
+
+def parse_blend(kind: str, key: str) -> tuple[list[str], float]:
+    """Split a blend token's argument into palette keys and an amount.
+
+    ``mix`` takes two keys and the share of the second; ``lighten`` and
+    ``darken`` take a key and the share of white or black; ``alpha`` takes
+    a key and an alpha channel, either 0-255 (``128``, ``0x80``) or 0-1
+    (``0.5``). The returned amount is always 0-1.
+
+    Raises:
+        ValueError: If the argument is malformed.
+    """
+    *keys, amount_text = key.split(",")
+    if len(keys) != (2 if kind == "mix" else 1) or not all(keys):
+        raise ValueError(f"Invalid {kind} token arguments: {key}")
+    try:
+        if kind == "alpha" and "." not in amount_text:
+            amount = int(amount_text, 0) / 255
+        else:
+            amount = float(amount_text)
+    except ValueError:
+        raise ValueError(f"Invalid {kind} amount: {amount_text}") from None
+    if not 0 <= amount <= 1:
+        raise ValueError(f"Out of range {kind} amount: {amount_text}")
+    return keys, amount
+
+
+def blend_color(palette: Mapping[str, str], kind: str, key: str) -> str:
+    """Evaluate a blend token against a palette, returning ``#rrggbb[aa]``."""
+    keys, amount = parse_blend(kind, key)
+    channels = []
+    for name in keys:
+        if name not in palette:
+            raise KeyError(f"Missing palette key: {name}")
+        ref = _resolve_palette_key(palette, name)
+        if palette[ref] == "unspecified":
+            raise ValueError(f"Palette key '{name}' is unspecified and cannot be used in templates")
+        channels.append(_palette_channels(palette, ref))
+    rgb = channels[0][:3]
+    if kind == "alpha":
+        return "#%02x%02x%02x%02x" % (*rgb, round(amount * 255))
+    if kind == "mix":
+        other = channels[1][:3]
+    else:
+        other = (255, 255, 255) if kind == "lighten" else (0, 0, 0)
+    return "#%02x%02x%02x" % color_utils.mix_rgb(rgb, other, amount)
+
+
+def blend_tokens(text: str) -> list[tuple[str, str]]:
+    """Return the distinct (kind, argument) blend tokens in a template."""
+    found: dict[tuple[str, str], None] = {}
+    for match in TOKEN_RE.finditer(text):
+        if match.group(1) in BLEND_KINDS:
+            found[(match.group(1), match.group(2))] = None
+    return list(found)
+
+
+def _token_resolver(
+    palette: Mapping[str, str],
     mapping: dict[str, Any],
     theme_name: str,
-) -> str:
-    def replace(match):
-        kind, key = match.group(1), match.group(2)
+    include: Callable[[str], str] | None = None,
+) -> Callable[[str, str], str]:
+    """Return a function mapping a token (kind, key) to its rendered text."""
+    derived = palette.derived if isinstance(palette, Palette) else None
+
+    def resolve(kind: str, key: str) -> str:
+        if key.startswith(MAPPING_REF_PREFIX) and is_palette_kind(kind):
+            key = mapping_ref(mapping, key)
         if kind == "color":
             if key not in palette:
                 raise KeyError(f"Missing palette key: {key}")
@@ -65,24 +252,6 @@ def render_template(
             if key not in mapping:
                 raise KeyError(f"Missing mapping key: {key}")
             return str(mapping[key])
-        if kind == "rgb":
-            if key not in palette:
-                raise KeyError(f"Missing palette key: {key}")
-            value = _resolve_palette_value(palette, key)
-            if value == "unspecified":
-                raise ValueError(
-                    f"Palette key '{key}' is unspecified and cannot be used in templates"
-                )
-            return _hex_to_rgb(value)
-        if kind == "rgba":
-            if key not in palette:
-                raise KeyError(f"Missing palette key: {key}")
-            value = _resolve_palette_value(palette, key)
-            if value == "unspecified":
-                raise ValueError(
-                    f"Palette key '{key}' is unspecified and cannot be used in templates"
-                )
-            return _hex_to_rgba(value)
         if kind == "meta":
             if key == "theme":
                 return theme_name
@@ -91,9 +260,213 @@ def render_template(
             if key == "appearance":
                 return "light" if theme_name.startswith("modus-operandi") else "dark"
             raise KeyError(f"Unknown meta key: {key}")
-        raise KeyError(f"Unknown token kind: {kind}")
+        if kind == "include":
+            if include is None:
+                raise KeyError(f"Includes are not available here: {key}")
+            return include(key)
+        if derived is not None:
+            value = derived.get((kind, key))
+            if value is not None:
+                return value
+        if kind in BLEND_KINDS:
+            # NOTE: Memoized on the palette like formats, so each blend runs
+            # once per palette across every template and tool in a run.
+            value = blend_color(palette, kind, key)
+            if derived is not None:
+                derived[(kind, key)] = value
+            return value
+        formatter = FORMATS.get(kind)
+        if formatter is None:
+            raise KeyError(f"Unknown token kind: {kind}")
+        if key not in palette:
+            raise KeyError(f"Missing palette key: {key}")
+        ref = _resolve_palette_key(palette, key)
+        if palette[ref] == "unspecified":
+            raise ValueError(
+                f"Palette key '{key}' is unspecified and cannot be used in templates"
+            )
+        value = formatter(_palette_channels(palette, ref))
+        if derived is not None:
+            derived[(kind, key)] = value
+        return value
+
+    return resolve
+
+
+def render_template(
+    template: str,
+    palette: Mapping[str, str],
+    mapping: dict[str, Any],
+    theme_name: str,
+    include: Callable[[str], str] | None = None,
+) -> str:
+    resolve = _token_resolver(palette, mapping, theme_name, include)
+    return TOKEN_RE.sub(lambda match: resolve(match.group(1), match.group(2)), template)
+
+
+def compile_template(template: str) -> list[list[str]]:
+    """Split a template into [literal, kind, key] segments.
+
+    The last segment holds the trailing literal with empty kind and key.
+    The result is plain JSON data so it can be cached on disk.
+    """
+    segments: list[list[str]] = []
+    pos = 0
+    for match in TOKEN_RE.finditer(template):
+        segments.append([template[pos:match.start()], match.group(1), match.group(2)])
+        pos = match.end()
+    segments.append([template[pos:], "", ""])
+    return segments
+
+
+def render_compiled(
+    segments: list[list[str]],
+    palette: Mapping[str, str],
+    mapping: dict[str, Any],
+    theme_name: str,
+    include: Callable[[str], str] | None = None,
+) -> str:
+    """Render segments from ``compile_template``; same output as ``render_template``."""
+    resolve = _token_resolver(palette, mapping, theme_name, include)
+    return "".join([literal + resolve(kind, key) if kind else literal for literal, kind, key in segments])
+
+
+def iter_render_template(
+    template: str,
+    palette: Mapping[str, str],
+    mapping: dict[str, Any],
+    theme_name: str,
+    chunk_size: int = 16 * 1024,
+    include: Callable[[str], str] | None = None,
+) -> Iterator[str]:
+    """Render a template incrementally, yielding chunks of about ``chunk_size`` characters.
+
+    The concatenated chunks equal ``render_template`` for the same inputs.
+    """
+    return iter_render_compiled(compile_template(template), palette, mapping, theme_name, chunk_size, include)
+
+
+def iter_render_compiled(
+    segments: list[list[str]],
+    palette: Mapping[str, str],
+    mapping: dict[str, Any],
+    theme_name: str,
+    chunk_size: int = 16 * 1024,
+    include: Callable[[str], str] | None = None,
+) -> Iterator[str]:
+    """Render segments from ``compile_template`` incrementally, in chunks of about ``chunk_size`` characters."""
+    resolve = _token_resolver(palette, mapping, theme_name, include)
+    parts: list[str] = []
+    size = 0
+    for literal, kind, key in segments:
+        value = resolve(kind, key) if kind else ""
+        parts += (literal, value)
+        size += len(literal) + len(value)
+        if size >= chunk_size:
+            yield "".join(parts)
+            parts.clear()
+            size = 0
+    tail = "".join(parts)
+    if tail:
+        yield tail
+
+
+def find_fragment(name: str, origin: Path | None = None) -> Path | None:
+    """Find the file for ``{include:name}`` beside ``origin``, then in ports/shared/."""
+    directories = [origin.parent] if origin is not None else []
+    for directory in (*directories, SHARED_FRAGMENT_DIR):
+        path = directory / f"{name}.tmpl"
+        if path.is_file():
+            return path
+    return None
 
-    return TOKEN_RE.sub(replace, template)
+
+def _include_names(text: str) -> list[str]:
+    return [match.group(2) for match in TOKEN_RE.finditer(text) if match.group(1) == "include"]
+
+
+def fragment_paths(path: Path) -> list[Path]:
+    """Return every fragment a template includes, directly or not (missing ones skipped)."""
+    found: list[Path] = []
+    pending = [path]
+    while pending:
+        current = pending.pop()
+        if not current.is_file():
+            continue
+        for name in _include_names(current.read_text(encoding="utf-8")):
+            fragment = find_fragment(name, current)
+            if fragment is not None and fragment != path and fragment not in found:
+                found.append(fragment)
+                pending.append(fragment)
+    return found
+
+
+class Fragments:
+    """Renders ``{include:name}`` fragments once per (fragment, palette context).
+
+    Args:
+        compile: Returns the compiled segments of a fragment file, so callers
+            can share their own template cache; defaults to reading the file.
+        cache_size: How many rendered fragments to keep (unbounded if None).
+    """
+
+    def __init__(
+        self,
+        compile: Callable[[Path], list[list[str]]] | None = None,
+        cache_size: int | None = None,
+    ) -> None:
+        self._compile = compile or (lambda path: compile_template(path.read_text(encoding="utf-8")))
+        self.cache_size = cache_size
+        self._rendered: dict[tuple[Path, str], str] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def includer(
+        self,
+        origin: Path,
+        palette: Mapping[str, str],
+        mapping: dict[str, Any],
+        theme_name: str,
+        context: str,
+        stack: tuple[Path, ...] = (),
+    ) -> Callable[[str], str]:
+        """Return the include function for a template being rendered.
+
+        Args:
+            origin: Path of the including template.
+            palette: Resolved palette.
+            mapping: Mapping data.
+            theme_name: Theme name.
+            context: Key identifying the palette, mapping and theme, e.g. a
+                hash; fragments rendered under the same context are reused.
+            stack: Templates currently being included, for cycle detection.
+        """
+        stack = stack or (origin,)
+
+        def include(name: str) -> str:
+            path = find_fragment(name, origin)
+            if path is None:
+                raise KeyError(f"Missing fragment: {name}")
+            if path in stack:
+                chain = " -> ".join(item.stem for item in (*stack, path))
+                raise ValueError(f"Include cycle: {chain}")
+            key = (path, context)
+            with self._lock:
+                text = self._rendered.get(key)
+            if text is None:
+                segments = self._compile(path)
+                nested = self.includer(path, palette, mapping, theme_name, context, (*stack, path))
+                text = render_compiled(segments, palette, mapping, theme_name, nested)
+                if segments[-1][0].endswith("\n"):
+                    text = text[:-1]
+                with self._lock:
+                    self._rendered[key] = text
+                    self.renders += 1
+                    while self.cache_size is not None and len(self._rendered) > self.cache_size:
+                        del self._rendered[next(iter(self._rendered))]
+            return text
+
+        return include
 
 
 # Valid meta keys that can be used in templates
@@ -104,19 +477,29 @@ def validate_template(
     template: str,
     palette_keys: set[str],
     mapping_keys: set[str],
+    origin: Path | None = None,
+    _stack: tuple[Path, ...] = (),
+    mapping: Mapping[str, Any] | None = None,
 ) -> list[str]:
     """Validate that all template tokens reference valid keys.
 
+    Included fragments are validated too, reporting missing fragments
+    and include cycles.
+
     Args:
         template: The template string to validate.
         palette_keys: Set of valid palette key names.
         mapping_keys: Set of valid mapping key names.
+        origin: Path of the template, used to find its fragments.
+        mapping: Mapping data; if given, ``value.`` palette keys are
+            followed to the palette key they select.
 
     Returns:
         A list of error messages (empty if valid).
     """
     errors: list[str] = []
     seen: set[tuple[str, str]] = set()
+    stack = _stack or ((origin,) if origin is not None else ())
 
     for match in TOKEN_RE.finditer(template):
         kind, key = match.group(1), match.group(2)
@@ -124,7 +507,19 @@ def validate_template(
             continue
         seen.add((kind, key))
 
-        if kind in {"color", "rgb", "rgba"}:
+        if is_palette_kind(kind) and key.startswith(MAPPING_REF_PREFIX):
+            if mapping is None:
+                if key[len(MAPPING_REF_PREFIX):].split(".")[0] not in mapping_keys:
+                    errors.append(f"Unknown mapping key: {key[len(MAPPING_REF_PREFIX):]}")
+                continue
+            try:
+                name = mapping_ref(mapping, key)
+            except (KeyError, ValueError) as exc:
+                errors.append(str(exc).strip("'\""))
+                continue
+            if name not in palette_keys:
+                errors.append(f"Unknown palette key: {name} (via {key})")
+        elif is_palette_kind(kind):
             if key not in palette_keys:
                 errors.append(f"Unknown palette key: {key}")
         elif kind == "value":
@@ -133,5 +528,29 @@ def validate_template(
         elif kind == "meta":
             if key not in _VALID_META_KEYS:
                 errors.append(f"Unknown meta key: {key}")
+        elif kind in BLEND_KINDS:
+            try:
+                keys, _ = parse_blend(kind, key)
+            except ValueError as exc:
+                errors.append(str(exc))
+                continue
+            for name in keys:
+                if name not in palette_keys and f"Unknown palette key: {name}" not in errors:
+                    errors.append(f"Unknown palette key: {name}")
+        elif kind == "include":
+            path = find_fragment(key, origin)
+            if path is None:
+                errors.append(f"Missing fragment: {key}")
+            elif path in stack:
+                chain = " -> ".join(item.stem for item in (*stack, path))
+                errors.append(f"Include cycle: {chain}")
+            else:
+                text = path.read_text(encoding="utf-8")
+                for error in validate_template(text, palette_keys, mapping_keys, path, (*stack, path), mapping):
+                    message = error if error.startswith(("Include cycle", "Missing fragment")) else f"{key}: {error}"
+                    if message not in errors:
+                        errors.append(message)
+        else:
+            errors.append(f"Unknown token kind: {kind}")
 
     return errors
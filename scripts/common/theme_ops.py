@@ -6,7 +6,11 @@ from __future__ import annotations
 import os
 import shutil
 import subprocess
+import tempfile
 from pathlib import Path
+from typing import Any
+
+from scripts.common import ledger
 
 
 def list_themes(
@@ -98,35 +102,18 @@ def find_theme_dir(
     return None
 
 
-def install_themes(
+def select_themes(
     src_dir: Path,
-    dest_dir: Path,
-    mode: str,
     theme_name: str | None = None,
     theme_kind: str = "file",
     theme_ext: str = "",
     dir_suffix: str = ".yazi",
-    theme_entry: str = "",
-    symlink_entry_only: bool = False,
-) -> None:
-    """Install themes to a destination directory.
+) -> list[Path]:
+    """Select theme files or directories to install from a source directory.
 
-    Args:
-        src_dir: Source directory containing themes.
-        dest_dir: Destination directory for installed themes.
-        mode: "link" for symlinks, "copy" for file copies.
-        theme_name: Specific theme to install (all if None).
-        theme_kind: "file" for file-based, "dir" for directory-based.
-        theme_ext: File extension for file-based themes.
-        dir_suffix: Directory suffix for directory-based themes.
-        theme_entry: Entry file within directory themes.
-        symlink_entry_only: Only symlink the entry file, not the whole dir.
+    Raises:
+        FileNotFoundError: If the named theme or any theme is missing.
     """
-    if not src_dir.is_dir():
-        raise FileNotFoundError(f"Theme source directory missing: {src_dir}")
-
-    dest_dir.mkdir(parents=True, exist_ok=True)
-
     if theme_kind == "dir":
         if theme_name:
             theme_dir = find_theme_dir(src_dir, theme_name, dir_suffix)
@@ -146,10 +133,47 @@ def install_themes(
             theme_files = [theme_file]
         else:
             theme_files = [p for p in src_dir.iterdir() if p.is_file() and p.name != ".gitkeep"]
-
     if not theme_files:
         raise FileNotFoundError("No themes found.")
+    return theme_files
+
+
+def install_themes(
+    src_dir: Path,
+    dest_dir: Path,
+    mode: str,
+    theme_name: str | None = None,
+    theme_kind: str = "file",
+    theme_ext: str = "",
+    dir_suffix: str = ".yazi",
+    theme_entry: str = "",
+    symlink_entry_only: bool = False,
+) -> list[tuple[Path, Path]]:
+    """Install themes to a destination directory.
 
+    Args:
+        src_dir: Source directory containing themes.
+        dest_dir: Destination directory for installed themes.
+        mode: "link" for symlinks, "copy" for file copies.
+        theme_name: Specific theme to install (all if None).
+        theme_kind: "file" for file-based, "dir" for directory-based.
+        theme_ext: File extension for file-based themes.
+        dir_suffix: Directory suffix for directory-based themes.
+        theme_entry: Entry file within directory themes.
+        symlink_entry_only: Only symlink the entry file, not the whole dir.
+
+    Returns:
+        (installed path, source path) pairs for every theme installed now
+        or found already linked to its source.
+    """
+    if not src_dir.is_dir():
+        raise FileNotFoundError(f"Theme source directory missing: {src_dir}")
+
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    theme_files = select_themes(src_dir, theme_name, theme_kind, theme_ext, dir_suffix)
+
+    installed: list[tuple[Path, Path]] = []
     for src in theme_files:
         dest = dest_dir / src.name
 
@@ -160,17 +184,20 @@ def install_themes(
             if dest_entry.exists():
                 if dest_entry.is_symlink() and dest_entry.resolve() == src_entry.resolve():
                     print(f"Already installed: {src.name}")
+                    installed.append((dest_entry, src_entry))
                     continue
                 print(f"Skipping existing file: {dest_entry}")
                 continue
             dest.mkdir(parents=True, exist_ok=True)
             os.symlink(src_entry, dest_entry)
             print(f"Installed: {src.name}")
+            installed.append((dest_entry, src_entry))
             continue
 
         if dest.exists():
             if dest.is_symlink() and dest.resolve() == src.resolve():
                 print(f"Already installed: {src.name}")
+                installed.append((dest, src))
                 continue
             print(f"Skipping existing file: {dest}")
             continue
@@ -184,6 +211,174 @@ def install_themes(
             os.symlink(src, dest)
 
         print(f"Installed: {src.name}")
+        installed.append((dest, src))
+
+    return installed
+
+
+def _same_content(src: Path, dest: Path) -> bool:
+    """Compare files by size, then mtime, then content hash."""
+    try:
+        dest_stat = dest.stat()
+    except FileNotFoundError:
+        return False
+    src_stat = src.stat()
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    if ledger.content_hash(src) != ledger.content_hash(dest):
+        return False
+    # Same content: align the mtime so the next sync skips hashing.
+    shutil.copystat(src, dest)
+    return True
+
+
+def _atomic_copy(src: Path, dest: Path) -> None:
+    """Copy a file with its metadata, replacing the destination atomically."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def prune_entries(dest_dir: Path, entries: dict[str, dict[str, Any]]) -> tuple[int, int]:
+    """Remove installed themes in ``dest_dir`` whose source no longer exists.
+
+    Covers links left dangling and unedited copies, e.g. per-theme files
+    that a tool now ships as one family file. Links and copies replaced
+    or edited by hand are left in place. Entries for removed (or already
+    missing) paths are dropped from ``entries``.
+
+    Returns:
+        (removed, skipped) counts.
+    """
+    removed = skipped = 0
+    for path, entry in sorted(entries.items()):
+        dest = Path(path)
+        theme_dir = dest.parent if entry.get("entry_only") else dest
+        if theme_dir.parent != dest_dir or Path(entry["source"]).exists():
+            continue
+        state = ledger.entry_state(dest, entry)
+        if state in ("replaced", "modified"):
+            print(f"Skipping {state} file without source: {dest}")
+            skipped += 1
+            continue
+        if state != "missing":
+            if dest.is_dir() and not dest.is_symlink():
+                shutil.rmtree(dest)
+            else:
+                dest.unlink()
+            if theme_dir != dest and not any(theme_dir.iterdir()):
+                theme_dir.rmdir()
+        del entries[path]
+        print(f"Removed: {theme_dir.name}")
+        removed += 1
+    return removed, skipped
+
+
+def sync_themes(
+    src_dir: Path,
+    dest_dir: Path,
+    entries: dict[str, dict[str, Any]],
+    theme_name: str | None = None,
+    theme_kind: str = "file",
+    theme_ext: str = "",
+    dir_suffix: str = ".yazi",
+) -> list[tuple[Path, Path]]:
+    """Copy new and changed themes, leaving unchanged and hand-edited ones alone.
+
+    Files are compared by size, then mtime, then content hash, and only
+    differing files are copied, each with an atomic replace. Directory
+    themes are synced file by file, and files gone from the source are
+    removed. A destination is only overwritten or removed when the
+    install ledger shows it is an unedited copy. When syncing every
+    theme, installs in ``dest_dir`` whose source theme no longer exists are
+    removed too (see prune_entries).
+
+    Args:
+        src_dir: Source directory containing themes.
+        dest_dir: Destination directory for installed themes.
+        entries: The tool's install ledger entries, keyed by installed path.
+        theme_name: Specific theme to sync (all if None).
+        theme_kind: "file" for file-based, "dir" for directory-based.
+        theme_ext: File extension for file-based themes.
+        dir_suffix: Directory suffix for directory-based themes.
+
+    Returns:
+        (installed path, source path) pairs for every theme now in sync.
+    """
+    if not src_dir.is_dir():
+        raise FileNotFoundError(f"Theme source directory missing: {src_dir}")
+
+    theme_files = select_themes(src_dir, theme_name, theme_kind, theme_ext, dir_suffix)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    synced: list[tuple[Path, Path]] = []
+    counts = {"installed": 0, "updated": 0, "unchanged": 0, "skipped": 0, "removed": 0}
+    for src in sorted(theme_files):
+        dest = dest_dir / src.name
+        if dest.is_symlink():
+            print(f"Skipping linked theme: {dest}")
+            counts["skipped"] += 1
+            continue
+
+        stale: list[Path] = []
+        if src.is_dir():
+            pairs = [(path, dest / path.relative_to(src)) for path in sorted(src.rglob("*")) if path.is_file()]
+            if dest.is_dir():
+                targets = {target for _, target in pairs}
+                stale = [path for path in sorted(dest.rglob("*")) if path.is_file() and path not in targets]
+        else:
+            pairs = [(src, dest)]
+        changed = [(path, target) for path, target in pairs if not _same_content(path, target)]
+
+        if not changed and not stale:
+            counts["unchanged"] += 1
+            synced.append((dest, src))
+            continue
+
+        if dest.exists():
+            entry = entries.get(str(dest))
+            if entry is None or entry["mode"] != "copy":
+                print(f"Skipping existing file: {dest}")
+                counts["skipped"] += 1
+                continue
+            if ledger.entry_state(dest, entry) == "modified":
+                print(f"Skipping modified file: {dest}")
+                counts["skipped"] += 1
+                continue
+
+        existed = dest.exists()
+        for path, target in changed:
+            _atomic_copy(path, target)
+        for path in stale:
+            path.unlink()
+        if existed:
+            touched = [target for _, target in changed] + stale
+            files = ", ".join(target.relative_to(dest).as_posix() for target in touched) if src.is_dir() else ""
+            print(f"Updated: {src.name}" + (f" ({files})" if files else ""))
+            counts["updated"] += 1
+        else:
+            print(f"Installed: {src.name}")
+            counts["installed"] += 1
+        synced.append((dest, src))
+
+    # A named theme was found above, so only a full sync can have gone stale.
+    if not theme_name:
+        counts["removed"], skipped = prune_entries(dest_dir, entries)
+        counts["skipped"] += skipped
+
+    print(
+        f"Synced {len(theme_files)} theme(s): {counts['installed']} installed, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged, {counts['removed']} removed, {counts['skipped']} skipped."
+    )
+    return synced
 
 
 def _trash_path(path: Path) -> None:
@@ -240,16 +435,17 @@ def uninstall_themes(
                 name = f"{name}{theme_ext}"
             targets = [dest_dir / name]
         else:
-            targets = [p for p in dest_dir.iterdir() if p.is_file() and p.name != ".gitkeep"]
+            # Dangling links count too: their source may have been removed.
+            targets = [p for p in dest_dir.iterdir() if (p.is_file() or p.is_symlink()) and p.name != ".gitkeep"]
 
-    if not targets or all(not t.exists() for t in targets):
+    if not targets or all(not t.exists() and not t.is_symlink() for t in targets):
         print("No matching themes to uninstall.")
         return
 
     src_root = src_dir.resolve()
 
     for target in targets:
-        if not target.exists() or target.name == ".gitkeep":
+        if (not target.exists() and not target.is_symlink()) or target.name == ".gitkeep":
             continue
 
         # Handle symlink_entry_only mode for directory themes
@@ -282,3 +478,57 @@ def uninstall_themes(
             print(f"Removed: {target.name}")
         else:
             print(f"Skipping non-symlink file: {target}")
+
+
+def uninstall_entries(
+    entries: dict[str, dict[str, Any]],
+    theme_name: str | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Uninstall exactly the paths recorded in an install ledger.
+
+    Links are removed only while they still point at their source, and
+    copies only while their content matches the recorded hash, so files
+    replaced or edited by hand are left in place and kept in the ledger.
+
+    Args:
+        entries: Ledger entries keyed by installed path.
+        theme_name: Specific theme to uninstall (all if None). Entries
+            recorded without a theme (extra install dirs) always match.
+
+    Returns:
+        The entries that remain installed.
+    """
+    remaining = dict(entries)
+    matched = [
+        path
+        for path, entry in sorted(entries.items())
+        if not theme_name or entry.get("theme") in (None, theme_name)
+    ]
+    if not matched:
+        print("No matching themes to uninstall.")
+        return remaining
+
+    for path in matched:
+        dest = Path(path)
+        state = ledger.entry_state(dest, entries[path])
+        if state == "missing":
+            del remaining[path]
+            print(f"Already removed: {dest}")
+            continue
+        if state in ("replaced", "modified"):
+            print(f"Skipping {state} file: {dest}")
+            continue
+        if state == "broken":
+            # A dangling link holds nothing worth keeping in the trash.
+            dest.unlink()
+        else:
+            _trash_path(dest)
+        del remaining[path]
+        # Remove the parent directory of entry-only links if now empty
+        if entries[path].get("entry_only"):
+            if dest.parent.is_dir() and not any(dest.parent.iterdir()):
+                dest.parent.rmdir()
+            print(f"Removed: {dest.parent.name}")
+        else:
+            print(f"Removed: {dest.name}")
+    return remaining
@@ -1,11 +1,27 @@
 #!/usr/bin/env python3
-"""Spec-based theme validation for Modus theme ports."""
+"""Theme validation for Modus theme ports.
+
+Spec-based ports are checked by their spec's ``validate()``. Plist and
+TOML outputs are checked structurally: plists are streamed through
+expat and every ``<string>`` color is verified; TOML is parsed with
+``tomllib`` and checked against a per-tool key schema (skipped before
+Python 3.11, which lacks ``tomllib``).
+"""
 
 from __future__ import annotations
 
 import argparse
+import re
 import sys
+from collections.abc import Iterable
 from pathlib import Path
+from typing import Any
+from xml.parsers import expat
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    tomllib = None
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
@@ -13,6 +29,193 @@ if str(REPO_ROOT) not in sys.path:
 
 from scripts.common import io
 
+_HEX_COLOR_RE = re.compile(r"#[0-9A-Fa-f]{6}(?:[0-9A-Fa-f]{2})?")
+
+
+def _is_hex_color(value: str) -> bool:
+    return _HEX_COLOR_RE.fullmatch(value) is not None
+
+
+def _is_rgba_color(value: str) -> bool:
+    parts = value.split()
+    if len(parts) != 4:
+        return False
+    try:
+        return all(0.0 <= float(part) <= 1.0 for part in parts)
+    except ValueError:
+        return False
+
+
+# Plist color encodings: "hex" (#RRGGBB, tmTheme) or "rgba" (0-1 floats, Xcode).
+_PLIST_COLOR_CHECKS = {"hex": _is_hex_color, "rgba": _is_rgba_color}
+
+_CHUNK_SIZE = 64 * 1024
+
+TOML_SKIPPED = "TOML checks skipped (needs Python 3.11+)"
+
+
+def validate_plist(
+    path: Path,
+    colors: str = "hex",
+    text_keys: Iterable[str] = (),
+    required: Iterable[str] = (),
+) -> list[str]:
+    """Validate a plist file (tmTheme, xccolortheme) without building a tree.
+
+    Args:
+        path: File to validate.
+        colors: Color encoding of ``<string>`` values ("hex" or "rgba").
+        text_keys: Dict keys whose ``<string>`` values are not colors.
+        required: Keys that must appear in the top-level dict.
+
+    Returns:
+        List of validation error messages (empty if valid).
+    """
+    is_color = _PLIST_COLOR_CHECKS[colors]
+    text_keys = set(text_keys)
+    issues: list[str] = []
+    top_keys: set[str] = set()
+    elements: list[str] = []
+    # Most recent <key> of each open <dict>.
+    dict_keys: list[str | None] = []
+    chunks: list[str] = []
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+
+    def start(name: str, _attrs: dict[str, str]) -> None:
+        if not elements and name != "plist":
+            issues.append(f"Expected <plist> root element, got <{name}>")
+        elements.append(name)
+        chunks.clear()
+        if name == "dict":
+            dict_keys.append(None)
+
+    def end(name: str) -> None:
+        elements.pop()
+        if name == "dict":
+            dict_keys.pop()
+        elif name == "key" and dict_keys:
+            dict_keys[-1] = "".join(chunks)
+            if len(dict_keys) == 1:
+                top_keys.add(dict_keys[-1])
+        elif name == "string":
+            key = dict_keys[-1] if dict_keys else None
+            value = "".join(chunks)
+            if key not in text_keys and not is_color(value):
+                issues.append(f"Invalid color for {key} (line {parser.CurrentLineNumber}): {value!r}")
+
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = chunks.append
+
+    try:
+        with path.open("rb") as handle:
+            while chunk := handle.read(_CHUNK_SIZE):
+                parser.Parse(chunk, False)
+            parser.Parse(b"", True)
+    except expat.ExpatError as exc:
+        return issues + [f"Malformed XML: {exc}"]
+
+    for key in required:
+        if key not in top_keys:
+            issues.append(f"Missing key: {key}")
+    return issues
+
+
+def _toml_lookup(data: Any, path: str) -> Any:
+    """Find a dotted path, preferring literal dotted keys such as "ui.background"."""
+    if not isinstance(data, dict):
+        return None
+    if path in data:
+        return data[path]
+    head, sep, rest = path.partition(".")
+    if not sep or head not in data:
+        return None
+    return _toml_lookup(data[head], rest)
+
+
+def _toml_strings(value: Any, key: str | None = None) -> Iterable[tuple[str | None, str]]:
+    if isinstance(value, dict):
+        for child_key, child in value.items():
+            yield from _toml_strings(child, child_key)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _toml_strings(item, key)
+    elif isinstance(value, str):
+        yield key, value
+
+
+def _load_toml_theme(path: Path, seen: tuple[Path, ...] = ()) -> tuple[dict[str, Any], list[str]]:
+    """Parse a TOML theme, merging in any theme it ``inherits`` from the same directory.
+
+    Inheriting themes (see delta.py) override their base key by key, and
+    their ``palette`` tables are merged.
+    """
+    try:
+        data = tomllib.loads(path.read_text(encoding="utf-8"))
+    except tomllib.TOMLDecodeError as exc:
+        return {}, [f"Invalid TOML: {exc}"]
+    inherits = data.pop("inherits", None)
+    if not isinstance(inherits, str):
+        return data, []
+    base_path = path.with_name(f"{inherits}{path.suffix}")
+    if base_path in seen or base_path == path:
+        return data, [f"Inheritance cycle: {inherits}"]
+    if not base_path.is_file():
+        return data, [f"Missing inherited theme: {inherits}"]
+    base, issues = _load_toml_theme(base_path, (*seen, path))
+    merged = base | data
+    if isinstance(base.get("palette"), dict) and isinstance(data.get("palette"), dict):
+        merged["palette"] = base["palette"] | data["palette"]
+    return merged, issues
+
+
+def validate_toml(
+    path: Path,
+    required: Iterable[str] = (),
+    text_keys: Iterable[str] = (),
+) -> list[str]:
+    """Validate a TOML theme against a key schema.
+
+    Args:
+        path: File to validate.
+        required: Dotted key paths that must be present, here or in an
+            inherited theme.
+        text_keys: Keys whose string values are not colors; every other
+            string value must be a hex color.
+
+    Returns:
+        List of validation error messages (empty if valid).
+    """
+    data, issues = _load_toml_theme(path)
+    if not data and issues:
+        return issues
+
+    for key in required:
+        if _toml_lookup(data, key) is None:
+            issues.append(f"Missing key: {key}")
+    text_keys = set(text_keys)
+    for key, value in _toml_strings(data):
+        if key not in text_keys and not _is_hex_color(value):
+            issues.append(f"Invalid color for {key}: {value!r}")
+    return issues
+
+
+def validate_format(path: Path, entry: dict[str, Any]) -> list[str]:
+    """Run the format checks configured in a manifest or extra template entry.
+
+    Recognized fields are ``validate_plist`` and ``validate_toml``, each an
+    object of keyword arguments for the matching validator. TOML checks are
+    skipped when ``tomllib`` is unavailable.
+    """
+    issues: list[str] = []
+    if "validate_plist" in entry:
+        issues.extend(validate_plist(path, **entry["validate_plist"]))
+    if "validate_toml" in entry and tomllib is not None:
+        issues.extend(validate_toml(path, **entry["validate_toml"]))
+    return issues
+
 
 def validate_all(
     themes_dir: Path,
@@ -0,0 +1,46 @@
+(require 'extract-palettes)
+
+(defvar modus-themes--daemon-idle-timeout 300
+  "Seconds without an extraction request before the daemon exits.")
+
+(defvar modus-themes--daemon-last-request nil
+  "Time of the most recent extraction request.")
+
+(defvar modus-themes--daemon-loaded-mtime nil
+  "Modification time of the modus-themes.el that is currently loaded.")
+
+(defun modus-themes--daemon-check-idle ()
+  (when (> (float-time (time-since modus-themes--daemon-last-request))
+           modus-themes--daemon-idle-timeout)
+    (kill-emacs 0)))
+
+(defun modus-themes--daemon-load (themes-dir)
+  "Load modus-themes from THEMES-DIR, again if its source has changed."
+  (let* ((themes-dir (file-name-as-directory (expand-file-name themes-dir)))
+         (source (expand-file-name "modus-themes.el" themes-dir))
+         (mtime (file-attribute-modification-time (file-attributes source))))
+    (add-to-list 'load-path themes-dir)
+    (cond
+     ((not (featurep 'modus-themes))
+      (require 'modus-themes))
+     ((not (equal mtime modus-themes--daemon-loaded-mtime))
+      (load-file source)))
+    (setq modus-themes--daemon-loaded-mtime mtime)))
+
+(defun modus-themes-daemon-start (themes-dir idle-timeout)
+  "Preload modus-themes from THEMES-DIR and exit after IDLE-TIMEOUT idle seconds."
+  (setq modus-themes--daemon-idle-timeout idle-timeout
+        modus-themes--daemon-last-request (current-time))
+  (modus-themes--daemon-load themes-dir)
+  (run-with-timer 30 30 #'modus-themes--daemon-check-idle))
+
+(defun modus-themes-daemon-export (themes-dir out-dir &optional idle-timeout)
+  "Export palettes like `modus-themes-export-palettes' from a warm daemon."
+  (setq modus-themes--daemon-last-request (current-time))
+  (when idle-timeout
+    (setq modus-themes--daemon-idle-timeout idle-timeout))
+  (modus-themes--daemon-load themes-dir)
+  (modus-themes-export-palettes themes-dir out-dir)
+  t)
+
+(provide 'extract-palettes-daemon)
@@ -11,6 +11,8 @@ import shutil
 import subprocess
 import sys
 import urllib.request
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
@@ -18,9 +20,21 @@ REPO_ROOT = Path(__file__).resolve().parent.parent
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from scripts.common import bundle
 from scripts.common import contrast as contrast_utils
+from scripts.common import cvd
+from scripts.common import delta
+from scripts.common import doctor
+from scripts.common import emacs_daemon
+from scripts.common import family
 from scripts.common import git as git_utils
+from scripts.common import impact
 from scripts.common import io
+from scripts.common import ledger
+from scripts.common import metrics
+from scripts.common import osc
+from scripts.common import palette_history
+from scripts.common import palette_lint
 from scripts.common import paths
 from scripts.common import registry as registry_utils
 from scripts.common import render
@@ -33,8 +47,30 @@ def palettes_dir() -> Path:
     return REPO_ROOT / "palettes"
 
 
-def load_registry() -> dict[str, dict[str, Any]]:
-    return registry_utils.load_registry(REPO_ROOT)
+def load_registry() -> registry_utils.Registry:
+    try:
+        return registry_utils.load_registry(REPO_ROOT)
+    except (FileNotFoundError, ValueError) as exc:
+        raise SystemExit(f"Error: {exc}") from exc
+
+
+def load_ledger(tool: str) -> dict[str, dict[str, Any]]:
+    try:
+        return ledger.load(tool)
+    except ValueError as exc:
+        raise SystemExit(f"Error: {exc}") from None
+
+
+def manifest_root(manifest: dict[str, Any]) -> Path:
+    # Relative manifest paths resolve against the parent of the manifest's port root.
+    return Path(manifest.get("_root", REPO_ROOT))
+
+
+def display_path(path: Path) -> Path:
+    try:
+        return path.relative_to(REPO_ROOT)
+    except ValueError:
+        return path
 
 
 def resolve_path(repo_root: Path, value: str | None) -> Path | None:
@@ -48,7 +84,7 @@ def tool_manifest(registry: dict[str, dict[str, Any]], tool: str) -> dict[str, A
 
 
 def tool_spec(manifest: dict[str, Any]) -> Path | None:
-    return resolve_path(REPO_ROOT, manifest.get("spec_path"))
+    return resolve_path(manifest_root(manifest), manifest.get("spec_path"))
 
 
 def tool_mapping(manifest: dict[str, Any], override: str | None) -> Path:
@@ -57,23 +93,31 @@ def tool_mapping(manifest: dict[str, Any], override: str | None) -> Path:
     mapping_path = manifest.get("mapping_path")
     if not mapping_path:
         raise SystemExit("Error: mapping_path missing in manifest")
-    return resolve_path(REPO_ROOT, mapping_path)
+    return resolve_path(manifest_root(manifest), mapping_path)
+
+
+def tool_mapping_overlays(manifest: dict[str, Any], theme_name: str) -> tuple[Path, ...]:
+    try:
+        return registry_utils.mapping_overlays(manifest, theme_name)
+    except ValueError as exc:
+        raise SystemExit(f"Error: {exc}") from None
 
 
 def tool_template(manifest: dict[str, Any]) -> Path | None:
-    return resolve_path(REPO_ROOT, manifest.get("template_path"))
+    return resolve_path(manifest_root(manifest), manifest.get("template_path"))
 
 
 def extra_templates(manifest: dict[str, Any]) -> list[dict[str, Any]]:
     entries = manifest.get("extra_templates") or []
     resolved: list[dict[str, Any]] = []
     for entry in entries:
-        template_path = resolve_path(REPO_ROOT, entry.get("template_path"))
+        template_path = resolve_path(manifest_root(manifest), entry.get("template_path"))
         output_path = entry.get("output_path_template")
         if not template_path or not output_path:
             raise SystemExit("Error: extra_templates entries require template_path and output_path_template")
         resolved.append(
-            {
+            entry
+            | {
                 "template_path": template_path,
                 "output_path_template": output_path,
             }
@@ -91,7 +135,7 @@ def extra_install_dirs(manifest: dict[str, Any]) -> list[dict[str, Any]]:
             raise SystemExit("Error: extra_install_dirs entries require source_rel")
         resolved.append(
             {
-                "source_dir": resolve_path(REPO_ROOT, source_rel),
+                "source_dir": resolve_path(manifest_root(manifest), source_rel),
                 "dest_subdir": dest_subdir,
             }
         )
@@ -104,14 +148,14 @@ def tool_out_dir(manifest: dict[str, Any], override: str | None) -> Path:
     theme_dir = manifest.get("theme_dir_rel")
     if not theme_dir:
         raise SystemExit("Error: theme_dir_rel missing in manifest")
-    return resolve_path(REPO_ROOT, theme_dir)
+    return resolve_path(manifest_root(manifest), theme_dir)
 
 
 def tool_src_dir(manifest: dict[str, Any]) -> Path:
     theme_dir = manifest.get("theme_dir_rel")
     if not theme_dir:
         raise SystemExit("Error: theme_dir_rel missing in manifest")
-    return resolve_path(REPO_ROOT, theme_dir)
+    return resolve_path(manifest_root(manifest), theme_dir)
 
 
 def resolve_output_path(manifest: dict[str, Any], theme_name: str, out_dir_override: str | None) -> Path:
@@ -128,12 +172,21 @@ def resolve_output_path(manifest: dict[str, Any], theme_name: str, out_dir_overr
         return base / f"{theme_name}{suffix}"
 
     if template:
-        return REPO_ROOT / template.replace("{theme}", theme_name)
+        return manifest_root(manifest) / template.replace("{theme}", theme_name)
 
     suffix = theme_ext if theme_ext else ""
     return tool_out_dir(manifest, None) / f"{theme_name}{suffix}"
 
 
+def tool_family_path(manifest: dict[str, Any], out_dir_override: str | None) -> Path:
+    family_output = manifest.get("family_output")
+    if not family_output:
+        raise SystemExit("Error: family_format requires family_output in manifest")
+    if out_dir_override:
+        return Path(out_dir_override) / Path(family_output).name
+    return manifest_root(manifest) / family_output
+
+
 def tool_default_themes_dir(manifest: dict[str, Any]) -> Path:
     install_targets = manifest.get("install_targets") or []
     for target in install_targets:
@@ -206,178 +259,478 @@ def cmd_list(_args: argparse.Namespace) -> None:
                 print(f"- {name}")
 
 
-def render_with_template(
+def palette_entries() -> list[tuple[str, Path]]:
+    entries: list[tuple[str, Path]] = []
+    for palette_path in sorted(palettes_dir().glob("*.json")):
+        theme_name, _ = io.read_palette(str(palette_path))
+        entries.append((theme_name, palette_path))
+    return entries
+
+
+def tool_render_jobs(
+    tool: str,
     manifest: dict[str, Any],
-    palette: dict[str, str],
-    mapping: dict[str, str],
-    template_text: str,
-    theme_name: str,
-) -> str:
-    return template_utils.render_template(template_text, palette, mapping, theme_name)
+    themes: list[str],
+    mapping_override: str | None,
+    out_dir_override: str | None,
+) -> list[dict[str, Any]]:
+    spec = tool_spec(manifest)
+    mapping = tool_mapping(manifest, mapping_override)
+
+    template_path = None
+    if not spec:
+        template_path = tool_template(manifest)
+        if not template_path:
+            raise SystemExit(f"Error: no spec_path or template_path for {tool}")
+
+    delta_format = manifest.get("delta_format")
+    if delta_format and delta_format not in delta.FORMATS:
+        raise SystemExit(f"Error: unknown delta_format for {tool}: {delta_format}")
+    family_format = manifest.get("family_format")
+    family_path = None
+    if family_format:
+        if family_format not in family.FORMATS:
+            raise SystemExit(f"Error: unknown family_format for {tool}: {family_format}")
+        if delta_format:
+            raise SystemExit(f"Error: {tool} cannot combine delta_format and family_format")
+        family_path = tool_family_path(manifest, out_dir_override)
+        # A family file always holds every theme, in theme name order.
+        themes = sorted(name for name, _ in palette_entries())
+    # Variants inherit from base themes even when only the variant is rendered.
+    all_themes = [path.stem for path in palettes_dir().glob("*.json")] if delta_format else []
+
+    extra = extra_templates(manifest)
+    extra_written = set()
+    jobs: list[dict[str, Any]] = []
+    for theme_name in themes:
+        # An explicit --mapping replaces the default and its overlays alike.
+        overlays = () if mapping_override else tool_mapping_overlays(manifest, theme_name)
+        base = {"tool": tool, "mapping_path": mapping, "mapping_overlays": overlays}
+        if spec:
+            output_path = tool_out_dir(manifest, out_dir_override) / theme_name
+            jobs.append(base | {"theme": theme_name, "kind": "spec", "source": spec, "output_path": output_path})
+        else:
+            output_path = family_path or resolve_output_path(manifest, theme_name, out_dir_override)
+            job = base | {"theme": theme_name, "kind": "template", "source": template_path, "output_path": output_path}
+            if family_format:
+                job["family_format"] = family_format
+            inherits = delta.base_theme(theme_name, all_themes) if delta_format else None
+            if inherits:
+                job |= {
+                    "inherits": inherits,
+                    "delta_format": delta_format,
+                    "base_mapping_overlays": () if mapping_override else tool_mapping_overlays(manifest, inherits),
+                }
+            jobs.append(job)
+        for entry in extra:
+            if out_dir_override:
+                extra_path = output_path.parent / Path(entry["output_path_template"]).name.replace("{theme}", theme_name)
+            else:
+                extra_path = manifest_root(manifest) / entry["output_path_template"].replace("{theme}", theme_name)
+            if "{theme}" not in entry["output_path_template"]:
+                if str(extra_path) in extra_written:
+                    continue
+                extra_written.add(str(extra_path))
+            jobs.append(
+                base
+                | {"theme": theme_name, "kind": "extra_template", "source": entry["template_path"], "output_path": extra_path}
+            )
+    return jobs
+
+
+def render_jobs(
+    registry: dict[str, dict[str, Any]],
+    tool: str,
+    theme: str | None,
+    mapping_override: str | None = None,
+    out_dir_override: str | None = None,
+) -> list[dict[str, Any]]:
+    tools = sorted(registry.keys()) if tool == "all" else [tool]
+    entries = palette_entries()
+    if not entries:
+        raise SystemExit("Error: no palettes found. Run extract-palettes first.")
+    themes = [name for name, _ in entries if not theme or name == theme]
+
+    jobs: list[dict[str, Any]] = []
+    for name in tools:
+        manifest = tool_manifest(registry, name)
+        jobs.extend(tool_render_jobs(name, manifest, themes, mapping_override, out_dir_override))
+    return jobs
+
+
+def raw_palettes() -> dict[str, dict[str, str]]:
+    palettes: dict[str, dict[str, str]] = {}
+    for palette_path in sorted(palettes_dir().glob("*.json")):
+        theme_name, palette = io.read_palette(str(palette_path))
+        palettes[theme_name] = palette
+    return palettes
+
+
+def changed_palette_keys(rev: str) -> dict[str, set[str] | None]:
+    changes: dict[str, set[str] | None] = {}
+    for palette_path in sorted(palettes_dir().glob("*.json")):
+        theme_name, palette = io.read_palette(str(palette_path))
+        rel = palette_path.relative_to(REPO_ROOT).as_posix()
+        old_text = git_utils.show_file(str(REPO_ROOT), rev, rel)
+        old_palette = None
+        if old_text is not None:
+            _, old_palette = io.parse_palette(json.loads(old_text), palette_path)
+        changes[theme_name] = impact.changed_keys(old_palette, palette)
+    return changes
+
+
+def select_changed_jobs(jobs: list[dict[str, Any]], rev: str) -> list[dict[str, Any]]:
+    changes = changed_palette_keys(rev)
+    index = impact.build_index(jobs, raw_palettes())
+    affected = impact.affected_outputs(index, changes)
+    return [
+        job
+        for job in jobs
+        if job["output_path"] in affected
+        or changes.get(job["theme"], set()) is None
+        or (job.get("inherits") and changes.get(job["inherits"], set()) is None)
+    ]
+
+
+def describe_job(job: dict[str, Any]) -> str:
+    return f"{job['tool']} {job['theme']} ({display_path(job['source'])})"
+
+
+def output_conflict(path: Path, first: dict[str, Any], job: dict[str, Any]) -> SystemExit:
+    """Return the error for two jobs writing different content to one output."""
+    return SystemExit(
+        f"Error: {display_path(path)} is written with different content by {describe_job(first)} "
+        f"and {describe_job(job)}"
+    )
+
+
+def check_render_jobs(session: render.RenderSession, jobs: list[dict[str, Any]]) -> None:
+    # Resolve keys serially so every input is cached before rendering in parallel.
+    unique: dict[tuple[str, str, str], dict[str, Any]] = {}
+    job_keys: dict[Path, tuple[str, str, str]] = {}
+    families: dict[Path, list[dict[str, Any]]] = {}
+    owners: dict[Path, dict[str, Any]] = {}
+    shared: list[tuple[Path, dict[str, Any], tuple[str, str, str], dict[str, Any]]] = []
+    for job in jobs:
+        key = session.job_key(job)
+        path = job["output_path"]
+        owner = owners.setdefault(path, job)
+        if bool(owner.get("family_format")) != bool(job.get("family_format")):
+            raise output_conflict(path, owner, job)
+        if job.get("family_format"):
+            # Family entries are streamed into the comparison, not collected.
+            families.setdefault(path, []).append(job)
+            continue
+        unique.setdefault(key, job)
+        if owner is job:
+            job_keys[path] = key
+        elif key != job_keys[path]:
+            shared.append((path, owner, key, job))
+
+    def check(path: Path) -> str | None:
+        if path in families:
+            group = families[path]
+            documents = (session.render(job, keep=False) for job in group)
+            return family.check_family(path, family.iter_family(group[0]["family_format"], documents))
+        return render.check_output(path, contents[job_keys[path]])
+
+    with ThreadPoolExecutor() as pool:
+        contents = dict(zip(unique, pool.map(session.render, unique.values())))
+        # Jobs sharing an output with different inputs must still agree on its content.
+        for path, first, key, job in shared:
+            if contents[key] != contents[job_keys[path]]:
+                raise output_conflict(path, first, job)
+        outputs = sorted([*job_keys, *families])
+        states = list(pool.map(check, outputs))
+
+    problems = [(path, state) for path, state in zip(outputs, states) if state]
+    for path, state in problems:
+        print(f"{state.capitalize()}: {path}")
+    if problems:
+        raise SystemExit(f"Render check failed: {len(problems)} of {len(outputs)} output(s) out of date.")
+    print(f"All {len(outputs)} output(s) up to date.")
 
 
 def cmd_render(args: argparse.Namespace) -> None:
     registry = load_registry()
-    tools = sorted(registry.keys()) if args.tool == "all" else [args.tool]
+    jobs = render_jobs(registry, args.tool, args.theme, args.mapping, args.out_dir)
+    if args.changed_since:
+        total = len({job["output_path"] for job in jobs})
+        jobs = select_changed_jobs(jobs, args.changed_since)
+        affected = len({job["output_path"] for job in jobs})
+        print(f"Palette changes since {args.changed_since} affect {affected} of {total} output(s).")
+
+    session = render.RenderSession(dict(palette_entries()))
+    if args.check:
+        check_render_jobs(session, jobs)
+        return
 
-    for tool in tools:
-        manifest = tool_manifest(registry, tool)
-        spec = tool_spec(manifest)
-        mapping = tool_mapping(manifest, args.mapping)
-        out_dir = tool_out_dir(manifest, args.out_dir)
+    written: dict[Path, tuple[dict[str, Any], str]] = {}
+    families: dict[Path, list[dict[str, Any]]] = {}
+    for job in jobs:
+        if job.get("family_format"):
+            families.setdefault(job["output_path"], []).append(job)
+            continue
+        content = session.render(job)
+        output_path = job["output_path"]
+        digest = render.content_hash(content)
+        if output_path in written:
+            # Outputs shared by several tools are written once, but only if they agree.
+            first, first_digest = written[output_path]
+            if digest != first_digest:
+                raise output_conflict(output_path, first, job)
+            continue
+        io.write_output(str(output_path), content)
+        written[output_path] = (job, digest)
+        print(f"Wrote {output_path}")
+    for output_path, group in families.items():
+        if output_path in written:
+            raise output_conflict(output_path, written[output_path][0], group[0])
+        # Entries are rendered one by one as the family file is written.
+        chunks = family.iter_family(group[0]["family_format"], (session.render(job, keep=False) for job in group))
+        try:
+            family.write_family(output_path, chunks)
+        except ValueError as exc:
+            raise SystemExit(f"Error: {output_path}: {exc}") from None
+        written[output_path] = (group[0], "")
+        print(f"Wrote {output_path} ({len(group)} theme(s))")
+
+    saved_writes = len(jobs) - len(written)
+    print(
+        f"Rendered {session.renders} of {len(jobs)} job(s); "
+        f"saved {session.reused} render(s) and {saved_writes} write(s)."
+    )
 
-        if spec:
-            outputs = render.render_all(
-                palettes_dir(),
-                mapping,
-                out_dir,
-                spec,
-                theme=args.theme,
-            )
-            for output in outputs:
-                print(f"Wrote {output}")
+
+def cmd_impact(args: argparse.Namespace) -> None:
+    registry = load_registry()
+    jobs = render_jobs(registry, args.tool, args.theme)
+    index = impact.build_index(jobs, raw_palettes())
+    palette_refs, mapping_refs = impact.lookup(index, args.key)
+    if not palette_refs and not mapping_refs:
+        raise SystemExit(f"Error: no references to key: {args.key}")
+
+    for label, refs in (("Palette key", palette_refs), ("Mapping key", mapping_refs)):
+        if not refs:
             continue
+        sites = sorted({(ref.tool, ref.kind, ref.path, ref.line, ref.token) for ref in refs})
+        outputs = sorted({ref.output_path for ref in refs})
+        print(f"{label} '{args.key}': {len(sites)} reference(s), {len(outputs)} output(s)")
+        for tool, kind, path, line, token in sites:
+            via = f" via {token}" if token != args.key else ""
+            print(f"  {tool}: {display_path(path)}:{line} ({kind}){via}")
+        print("Affected outputs:")
+        for output in outputs:
+            print(f"  {display_path(output)}")
+
+
+def family_issues(data: Any, manifest: dict[str, Any]) -> list[str]:
+    """Check that a family file holds every theme once, each with the required fields.
+
+    ``required_fields`` under the first entry (``themes.0.style``) apply to
+    every entry of the family.
+    """
+    field = family.FORMATS[manifest["family_format"]].entries_field
+    entries = data.get(field) if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        return [f"Missing family entries: {field}"]
+    issues = []
+    expected = len(palette_entries())
+    if len(entries) != expected:
+        issues.append(f"Family has {len(entries)} theme(s), expected {expected}")
+    names = [entry.get("name") for entry in entries if isinstance(entry, dict)]
+    for name in sorted({name for name in names if names.count(name) > 1}, key=str):
+        issues.append(f"Duplicate family entry: {name}")
+    prefix = f"{field}.0."
+    for index in range(1, len(entries)):
+        for required in manifest.get("required_fields", []):
+            if required.startswith(prefix):
+                path = f"{field}.{index}.{required[len(prefix):]}"
+                if not json_path_exists(data, path):
+                    issues.append(f"Missing field: {path}")
+    return issues
+
+
+def theme_issues(path: Path, manifest: dict[str, Any]) -> list[str]:
+    """Check one rendered theme file against its manifest's validation settings."""
+    text = path.read_text(encoding="utf-8")
+    issues = []
+    if manifest.get("validate_json", False):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as exc:
+            issues.append(f"Invalid JSON: {exc}")
+        else:
+            for field in manifest.get("required_fields", []):
+                if not json_path_exists(data, field):
+                    issues.append(f"Missing field: {field}")
+            if manifest.get("family_format"):
+                issues.extend(family_issues(data, manifest))
+    for key in manifest.get("required_keys", []):
+        if key == "palette":
+            if "palette =" not in text:
+                issues.append("Missing palette entries")
+        else:
+            if not re.search(rf"^\s*{re.escape(key)}\s*=", text, re.MULTILINE):
+                issues.append(f"Missing key: {key}")
+    issues.extend(validate.validate_format(path, manifest))
+    return issues
 
-        template_path = tool_template(manifest)
-        if not template_path:
-            raise SystemExit(f"Error: no spec_path or template_path for {tool}")
 
-        template_text = template_path.read_text(encoding="utf-8")
-        mapping_data = io.load_mapping(str(mapping))
-        extra = extra_templates(manifest)
-        extra_written = set()
+def submit_validation(
+    pool: ThreadPoolExecutor,
+    tool: str,
+    manifest: dict[str, Any],
+    args: argparse.Namespace,
+) -> Callable[[], tuple[int, list[tuple[Path, list[str]]]]]:
+    """Queue every file check for a tool and return a function collecting the results.
+
+    The returned function gives (theme count, errors) with errors in path order.
+    """
+    spec = tool_spec(manifest)
+    themes_dir = tool_out_dir(manifest, args.themes_dir)
+
+    if spec:
+        return pool.submit(validate.validate_all, themes_dir, spec, theme=args.theme).result
 
-        palette_files = sorted(palettes_dir().glob("*.json"))
-        if not palette_files:
-            raise SystemExit("Error: no palettes found. Run extract-palettes first.")
+    errors: list[tuple[Path, list[str]]] = []
+    checks: list[tuple[Path, Future[list[str]]]] = []
+    theme_kind = manifest.get("theme_kind", "file")
+    theme_entry = manifest.get("theme_entry", "flavor.toml")
+    dir_suffix = manifest.get("dir_suffix", ".yazi")
 
-        out_dir.mkdir(parents=True, exist_ok=True)
-        for palette_path in palette_files:
-            theme_name, palette = io.load_palette(str(palette_path))
-            if args.theme and theme_name != args.theme:
+    for path in sorted(themes_dir.iterdir()):
+        if path.name.startswith("."):
+            continue
+        if theme_kind == "dir":
+            if not path.is_dir():
                 continue
-            content = render_with_template(manifest, palette, mapping_data, template_text, theme_name)
-            output_path = resolve_output_path(manifest, theme_name, args.out_dir)
-            io.write_output(str(output_path), content)
-            print(f"Wrote {output_path}")
-            for entry in extra:
-                extra_text = entry["template_path"].read_text(encoding="utf-8")
-                extra_content = render_with_template(manifest, palette, mapping_data, extra_text, theme_name)
-                if args.out_dir:
-                    base_dir = output_path.parent
-                    extra_path = base_dir / Path(entry["output_path_template"]).name
-                else:
-                    extra_path = REPO_ROOT / entry["output_path_template"].replace("{theme}", theme_name)
-                if "{theme}" not in entry["output_path_template"]:
-                    if str(extra_path) in extra_written:
-                        continue
-                    extra_written.add(str(extra_path))
-                io.write_output(str(extra_path), extra_content)
-                print(f"Wrote {extra_path}")
+            if dir_suffix and not path.name.endswith(dir_suffix):
+                continue
+            candidate = path / theme_entry
+        else:
+            if path.is_dir():
+                continue
+            if args.theme and path.name != args.theme:
+                continue
+            candidate = path
+        if args.theme and theme_kind == "dir":
+            if dir_suffix and not args.theme.endswith(dir_suffix):
+                expected = f"{args.theme}{dir_suffix}"
+            else:
+                expected = args.theme
+            if path.name != expected:
+                continue
+        if not candidate.is_file():
+            errors.append((path, [f"Missing {theme_entry}"]))
+            continue
+        checks.append((path, pool.submit(theme_issues, candidate, manifest)))
+
+    # Extra template outputs with their own format checks.
+    entries = {
+        entry["template_path"]: entry
+        for entry in extra_templates(manifest)
+        if "validate_plist" in entry or "validate_toml" in entry
+    }
+    if entries:
+        themes = [name for name, _ in palette_entries() if not args.theme or name == args.theme]
+        for job in tool_render_jobs(tool, manifest, themes, None, args.themes_dir):
+            entry = entries.get(job["source"]) if job["kind"] == "extra_template" else None
+            if not entry:
+                continue
+            if not job["output_path"].is_file():
+                errors.append((job["output_path"], ["Missing rendered output"]))
+                continue
+            checks.append((job["output_path"], pool.submit(validate.validate_format, job["output_path"], entry)))
+
+    if theme_kind == "dir":
+        total = len(
+            [
+                p
+                for p in themes_dir.iterdir()
+                if p.is_dir() and (not dir_suffix or p.name.endswith(dir_suffix))
+            ]
+        )
+        if args.theme:
+            if dir_suffix and not args.theme.endswith(dir_suffix):
+                name = f"{args.theme}{dir_suffix}"
+            else:
+                name = args.theme
+            total = 1 if (themes_dir / name).is_dir() else 0
+    else:
+        total = len([p for p in themes_dir.iterdir() if p.is_file() and not p.name.startswith('.')])
+        if args.theme:
+            total = 1 if (themes_dir / args.theme).is_file() else 0
+
+    if manifest.get("family_format"):
+        # The family file holds every theme; count those rather than files.
+        family_path = tool_family_path(manifest, args.themes_dir)
+        if family_path.is_file():
+            total += len(palette_entries()) - 1
+        else:
+            errors.append((family_path, ["Missing family file"]))
+
+    def collect() -> tuple[int, list[tuple[Path, list[str]]]]:
+        found = errors + [(path, issues) for path, future in checks if (issues := future.result())]
+        return total, sorted(found, key=lambda item: str(item[0]))
+
+    return collect
+
+
+def overlay_summary(manifest: dict[str, Any], themes: list[str]) -> list[str]:
+    """Describe which keys each mapping overlay changes, and for which themes."""
+    lines = []
+    base = None
+    for entry in manifest.get("mapping_overlays") or []:
+        path = resolve_path(manifest_root(manifest), entry["mapping_path"])
+        matched = [theme for theme in themes if path in tool_mapping_overlays(manifest, theme)]
+        if not matched:
+            continue
+        if base is None:
+            base = io.load_mapping(str(tool_mapping(manifest, None)))
+        changed = io.changed_mapping_keys(base, io.load_mapping(str(path)))
+        lines.append(
+            f"Overlay {display_path(path)} ({entry['themes']}): {len(changed)} key(s) changed "
+            f"({', '.join(changed)}) for {', '.join(matched)}"
+        )
+    return lines
+
+
+def uses_toml_checks(manifest: dict[str, Any]) -> bool:
+    return "validate_toml" in manifest or any("validate_toml" in entry for entry in extra_templates(manifest))
 
 
 def cmd_validate(args: argparse.Namespace) -> None:
     registry = load_registry()
     tools = sorted(registry.keys()) if args.tool == "all" else [args.tool]
 
-    for tool in tools:
-        manifest = tool_manifest(registry, tool)
-        spec = tool_spec(manifest)
-        themes_dir = tool_out_dir(manifest, args.themes_dir)
-        required_keys = manifest.get("required_keys", [])
-        validate_json = manifest.get("validate_json", False)
-        required_fields = manifest.get("required_fields", [])
-
-        if spec:
-            validated, errors = validate.validate_all(themes_dir, spec, theme=args.theme)
+    with ThreadPoolExecutor() as pool:
+        pending = [(tool, submit_validation(pool, tool, tool_manifest(registry, tool), args)) for tool in tools]
+        for tool, collect in pending:
+            validated, errors = collect()
             for path, issues in errors:
                 print(f"Invalid theme: {path}")
                 for issue in issues:
                     print(f"  {issue}")
             if errors:
                 raise SystemExit(f"Validation failed for {len(errors)} theme(s).")
+            themes = [name for name, _ in palette_entries() if not args.theme or name == args.theme]
+            for line in overlay_summary(tool_manifest(registry, tool), themes):
+                print(line)
+            if validate.tomllib is None and uses_toml_checks(tool_manifest(registry, tool)):
+                print(f"{tool}: {validate.TOML_SKIPPED}")
             print(f"Validated {validated} theme(s).")
-            continue
-
-        # Template-based validation (key presence)
-        errors = []
-        theme_kind = manifest.get("theme_kind", "file")
-        theme_entry = manifest.get("theme_entry", "flavor.toml")
-        dir_suffix = manifest.get("dir_suffix", ".yazi")
 
-        for path in sorted(themes_dir.iterdir()):
-            if path.name.startswith("."):
-                continue
-            if theme_kind == "dir":
-                if not path.is_dir():
-                    continue
-                if dir_suffix and not path.name.endswith(dir_suffix):
-                    continue
-                candidate = path / theme_entry
-                if not candidate.is_file():
-                    errors.append((path, [f"Missing {theme_entry}"]))
-                    continue
-                text = candidate.read_text(encoding="utf-8")
-            else:
-                if path.is_dir():
-                    continue
-                if args.theme and path.name != args.theme:
-                    continue
-                text = path.read_text(encoding="utf-8")
-            if args.theme and theme_kind == "dir":
-                if dir_suffix and not args.theme.endswith(dir_suffix):
-                    expected = f"{args.theme}{dir_suffix}"
-                else:
-                    expected = args.theme
-                if path.name != expected:
-                    continue
-            issues = []
-            if validate_json:
-                try:
-                    data = json.loads(text)
-                except json.JSONDecodeError as exc:
-                    issues.append(f"Invalid JSON: {exc}")
-                else:
-                    for field in required_fields:
-                        if not json_path_exists(data, field):
-                            issues.append(f"Missing field: {field}")
-            for key in required_keys:
-                if key == "palette":
-                    if "palette =" not in text:
-                        issues.append("Missing palette entries")
-                else:
-                    if not re.search(rf"^\s*{re.escape(key)}\s*=", text, re.MULTILINE):
-                        issues.append(f"Missing key: {key}")
-            if issues:
-                errors.append((path, issues))
-
-        for path, issues in errors:
-            print(f"Invalid theme: {path}")
-            for issue in issues:
-                print(f"  {issue}")
-
-        if errors:
-            raise SystemExit(f"Validation failed for {len(errors)} theme(s).")
 
-        if theme_kind == "dir":
-            total = len(
-                [
-                    p
-                    for p in themes_dir.iterdir()
-                    if p.is_dir() and (not dir_suffix or p.name.endswith(dir_suffix))
-                ]
-            )
-            if args.theme:
-                if dir_suffix and not args.theme.endswith(dir_suffix):
-                    name = f"{args.theme}{dir_suffix}"
-                else:
-                    name = args.theme
-                total = 1 if (themes_dir / name).is_dir() else 0
-        else:
-            total = len([p for p in themes_dir.iterdir() if p.is_file() and not p.name.startswith('.')])
-            if args.theme:
-                total = 1 if (themes_dir / args.theme).is_file() else 0
-        print(f"Validated {total} theme(s).")
+def installed_theme_name(manifest: dict[str, Any], file_name: str) -> str:
+    theme_kind = manifest.get("theme_kind", "file")
+    theme_ext = manifest.get("theme_ext", "")
+    dir_suffix = manifest.get("dir_suffix", ".yazi")
+    if theme_kind == "dir" and dir_suffix and file_name.endswith(dir_suffix):
+        return file_name[: -len(dir_suffix)]
+    if theme_kind != "dir" and theme_ext and file_name.endswith(theme_ext):
+        return file_name[: -len(theme_ext)]
+    return file_name
 
 
 def cmd_install(args: argparse.Namespace) -> None:
@@ -393,28 +746,219 @@ def cmd_install(args: argparse.Namespace) -> None:
     dir_suffix = manifest.get("dir_suffix", ".yazi")
     theme_entry = manifest.get("theme_entry", "")
     symlink_entry_only = manifest.get("symlink_entry_only", False)
-    theme_ops.install_themes(
-        src_dir,
-        dest_dir,
-        mode,
-        args.theme,
-        theme_kind=theme_kind,
-        theme_ext=theme_ext,
-        dir_suffix=dir_suffix,
-        theme_entry=theme_entry,
-        symlink_entry_only=symlink_entry_only,
-    )
+    if args.sync and mode != "copy":
+        raise SystemExit("Error: --sync requires --copy")
+    entries = load_ledger(args.tool)
+    theme_names: list[str | None] = [args.theme]
+    if args.theme and manifest.get("family_format"):
+        # Every theme lives in the one family file.
+        print(f"{args.tool} themes are installed as one family file, including {args.theme}")
+        theme_names = [None]
+    if args.theme and manifest.get("delta_format"):
+        # A variant rendered as a delta is unusable without the theme it inherits.
+        inherits = delta.base_theme(args.theme, [path.stem for path in palettes_dir().glob("*.json")])
+        if inherits:
+            theme_names.insert(0, inherits)
+    installed = []
+    for theme_name in theme_names:
+        if args.sync:
+            installed += theme_ops.sync_themes(
+                src_dir,
+                dest_dir,
+                entries,
+                theme_name,
+                theme_kind=theme_kind,
+                theme_ext=theme_ext,
+                dir_suffix=dir_suffix,
+            )
+        else:
+            installed += theme_ops.install_themes(
+                src_dir,
+                dest_dir,
+                mode,
+                theme_name,
+                theme_kind=theme_kind,
+                theme_ext=theme_ext,
+                dir_suffix=dir_suffix,
+                theme_entry=theme_entry,
+                symlink_entry_only=symlink_entry_only,
+            )
+    if not args.sync and theme_names[-1] is None:
+        # Sync prunes on its own; a full install also clears links left
+        # dangling by removed themes (e.g. per-theme files now in a family).
+        theme_ops.prune_entries(dest_dir, entries)
+    entry_only = theme_kind == "dir" and mode == "link" and symlink_entry_only and bool(theme_entry)
+    for dest, src in installed:
+        theme_path = src.parent if entry_only else src
+        theme_name = installed_theme_name(manifest, theme_path.name)
+        entry = ledger.make_entry(dest, src, "link" if dest.is_symlink() else mode, theme_name)
+        if entry_only:
+            entry["entry_only"] = True
+        entries[str(dest)] = entry
     for entry in extra_install_dirs(manifest):
         extra_src = entry["source_dir"]
         extra_dest = dest_dir / entry["dest_subdir"]
-        theme_ops.install_themes(extra_src, extra_dest, mode, None, theme_kind="file")
+        if args.sync:
+            extra_installed = theme_ops.sync_themes(extra_src, extra_dest, entries, None, theme_kind="file")
+        else:
+            extra_installed = theme_ops.install_themes(extra_src, extra_dest, mode, None, theme_kind="file")
+            theme_ops.prune_entries(extra_dest, entries)
+        for dest, src in extra_installed:
+            entries[str(dest)] = ledger.make_entry(dest, src, "link" if dest.is_symlink() else mode, None)
+    ledger.save(args.tool, entries)
+
+
+def bundle_units(manifest: dict[str, Any]) -> list[bundle.Unit]:
+    """Return what ``install --copy`` would install for a tool, as bundle units."""
+    theme_kind = manifest.get("theme_kind", "file")
+    theme_ext = manifest.get("theme_ext", "")
+    dir_suffix = manifest.get("dir_suffix", ".yazi")
+    themes = theme_ops.select_themes(tool_src_dir(manifest), None, theme_kind, theme_ext, dir_suffix)
+    units = [
+        bundle.Unit(src.name, None if manifest.get("family_format") else installed_theme_name(manifest, src.name), src)
+        for src in themes
+    ]
+    for entry in extra_install_dirs(manifest):
+        if not entry["source_dir"].is_dir():
+            continue
+        for src in theme_ops.select_themes(entry["source_dir"], None, "file"):
+            path = f"{entry['dest_subdir']}/{src.name}" if entry["dest_subdir"] else src.name
+            units.append(bundle.Unit(path, None, src))
+    return units
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    registry = load_registry()
+    tools = sorted(registry.keys()) if args.tool == "all" else [args.tool]
+    contents: dict[str, tuple[list[str], list[bundle.Unit]]] = {}
+    for tool in tools:
+        manifest = tool_manifest(registry, tool)
+        if not manifest.get("install_targets"):
+            raise SystemExit(f"Error: install_targets missing in manifest for {tool}")
+        try:
+            contents[tool] = (manifest["install_targets"], bundle_units(manifest))
+        except FileNotFoundError as exc:
+            raise SystemExit(f"Error: {tool}: {exc} Run render first.") from None
+
+    if args.output == "-":
+        files, objects = bundle.write_bundle(sys.stdout.buffer, contents)
+    else:
+        output = Path(args.output)
+        # NOTE: Stream to a temporary sibling so a failed export never leaves a
+        # truncated bundle behind.
+        tmp = output.with_name(f".{output.name}.tmp")
+        try:
+            with tmp.open("wb") as handle:
+                files, objects = bundle.write_bundle(handle, contents)
+            os.replace(tmp, output)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+    print(f"Exported {files} file(s) from {len(contents)} tool(s) as {objects} object(s).", file=sys.stderr)
+
+
+def cmd_import(args: argparse.Namespace) -> None:
+    if args.themes_dir and not args.tool:
+        raise SystemExit("Error: --themes-dir requires --tool")
+    registry = load_registry()
+    bundle_name = "-" if args.bundle == "-" else str(Path(args.bundle).resolve())
+    imported: list[tuple[str, list[tuple[Path, dict[str, Any]]]]] = []
+
+    def place(manifest: dict[str, Any]) -> dict[str, Path]:
+        tool = manifest["tool"]
+        if args.tool and tool != args.tool:
+            return {}
+        if tool not in registry:
+            print(f"Skipping unknown tool: {tool}")
+            return {}
+        # NOTE: install_targets in the bundle are ignored; only the local
+        # manifest decides where files go.
+        dest_dir = Path(args.themes_dir) if args.themes_dir else tool_default_themes_dir(tool_manifest(registry, tool))
+        root = dest_dir.resolve()
+        entries = load_ledger(tool)
+        destinations: dict[str, Path] = {}
+        units: list[tuple[Path, dict[str, Any]]] = []
+        skipped = 0
+        for unit in manifest["units"]:
+            dest = dest_dir / unit["path"]
+            if dest.is_symlink():
+                print(f"Skipping linked theme: {dest}")
+                skipped += 1
+                continue
+            if root not in dest.resolve().parents:
+                raise ValueError(f"Bundle path escapes {dest_dir}: {unit['path']}")
+            if dest.exists():
+                if ledger.content_hash(dest) == unit["hash"]:
+                    units.append((dest, unit))
+                    continue
+                entry = entries.get(str(dest))
+                if entry is None or entry["mode"] != "copy" or ledger.entry_state(dest, entry) == "modified":
+                    print(f"Skipping existing file: {dest}")
+                    skipped += 1
+                    continue
+            destinations[unit["path"]] = dest
+            units.append((dest, unit))
+        print(f"{tool}: {len(destinations)} to write, {len(units) - len(destinations)} unchanged, {skipped} skipped")
+        imported.append((tool, units))
+        return destinations
+
+    try:
+        if args.bundle == "-":
+            written = bundle.read_bundle(sys.stdin.buffer, place)
+        else:
+            with open(args.bundle, "rb") as handle:
+                written = bundle.read_bundle(handle, place)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Error: {exc}") from None
+    if args.tool and not imported:
+        raise SystemExit(f"Error: {args.tool} is not in the bundle")
+
+    for tool, units in imported:
+        entries = load_ledger(tool)
+        for dest, unit in units:
+            entries[str(dest)] = ledger.make_import_entry(dest, unit["theme"], unit["hash"], bundle_name)
+        ledger.save(tool, entries)
+    print(f"Imported {written} file(s) for {len(imported)} tool(s).")
+
+
+def uninstall_dependents(
+    manifest: dict[str, Any],
+    theme: str,
+    entries: dict[str, dict[str, Any]],
+    dest_dir: Path,
+) -> list[str]:
+    """Return installed delta variants that inherit from ``theme``."""
+    if entries:
+        installed = {entry.get("theme") for entry in entries.values()}
+    elif dest_dir.is_dir():
+        installed = {installed_theme_name(manifest, path.name) for path in dest_dir.iterdir()}
+    else:
+        installed = set()
+    themes = [path.stem for path in palettes_dir().glob("*.json")]
+    return sorted(name for name in installed if name and delta.base_theme(name, themes) == theme)
 
 
 def cmd_uninstall(args: argparse.Namespace) -> None:
     registry = load_registry()
     manifest = tool_manifest(registry, args.tool)
-    src_dir = tool_src_dir(manifest)
+    entries = load_ledger(args.tool)
     dest_dir = Path(args.themes_dir) if args.themes_dir else tool_default_themes_dir(manifest)
+    if args.theme and manifest.get("family_format"):
+        raise SystemExit(
+            f"Error: {args.tool} themes are installed as one family file; uninstall without --theme to remove it"
+        )
+    if args.theme and manifest.get("delta_format"):
+        dependents = uninstall_dependents(manifest, args.theme, {} if args.themes_dir else entries, dest_dir)
+        if dependents:
+            raise SystemExit(
+                f"Error: {', '.join(dependents)} inherit from {args.theme}; uninstall them first"
+            )
+    if entries and not args.themes_dir:
+        ledger.save(args.tool, theme_ops.uninstall_entries(entries, args.theme))
+        return
+
+    # No ledger (installed by an older version) or an explicit directory: scan it.
+    src_dir = tool_src_dir(manifest)
     theme_kind = manifest.get("theme_kind", "file")
     theme_ext = manifest.get("theme_ext", "")
     dir_suffix = manifest.get("dir_suffix", ".yazi")
@@ -434,6 +978,34 @@ def cmd_uninstall(args: argparse.Namespace) -> None:
         extra_src = entry["source_dir"]
         extra_dest = dest_dir / entry["dest_subdir"]
         theme_ops.uninstall_themes(extra_dest, extra_src, None, theme_kind="file")
+    if entries:
+        ledger.save(args.tool, {path: entry for path, entry in entries.items() if Path(path).exists() or Path(path).is_symlink()})
+
+
+def cmd_status(args: argparse.Namespace) -> None:
+    tools = ledger.tools() if args.tool == "all" else [args.tool]
+    if not tools:
+        print(f"No installs recorded in {ledger.ledger_dir()}")
+        return
+    problems = 0
+    for tool in tools:
+        entries = load_ledger(tool)
+        if not entries:
+            print(f"{tool}: not installed")
+            continue
+        states: dict[str, list[str]] = {}
+        modes: dict[str, int] = {}
+        for path, entry in sorted(entries.items()):
+            states.setdefault(ledger.entry_state(Path(path), entry), []).append(path)
+            modes[entry["mode"]] = modes.get(entry["mode"], 0) + 1
+        summary = ", ".join(f"{count} {mode}" for mode, count in sorted(modes.items()))
+        print(f"{tool}: {len(entries)} installed ({summary})")
+        for state in ("missing", "replaced", "broken", "modified", "outdated"):
+            for path in states.get(state, []):
+                print(f"  {state}: {path}")
+                problems += 1
+    if problems and args.strict:
+        raise SystemExit(f"Status check failed: {problems} path(s) differ from the install ledger.")
 
 
 def cmd_print_config(args: argparse.Namespace) -> None:
@@ -521,6 +1093,34 @@ def cmd_print_config(args: argparse.Namespace) -> None:
         return
 
 
+def theme_palette_path(theme_name: str) -> Path:
+    # Palette files are named after their theme; scan only when one is not.
+    path = palettes_dir() / f"{theme_name}.json"
+    if path.is_file():
+        return path
+    for name, palette_path in palette_entries():
+        if name == theme_name:
+            return palette_path
+    raise SystemExit(f"Error: palette not found for theme: {theme_name}")
+
+
+def cmd_apply(args: argparse.Namespace) -> None:
+    registry = load_registry()
+    mapping_path = tool_mapping(tool_manifest(registry, "ghostty"), args.mapping)
+    try:
+        content = osc.cached_sequences(args.theme, theme_palette_path(args.theme), mapping_path)
+    except (KeyError, ValueError) as exc:
+        raise SystemExit(f"Error: {exc}") from exc
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(content.encode("ascii"))
+        print(f"Wrote {output_path}")
+        return
+    osc.write_terminal(content)
+
+
 def emacs_bin() -> Path:
     if shutil.which("emacs"):
         return Path(shutil.which("emacs"))
@@ -530,24 +1130,191 @@ def emacs_bin() -> Path:
     raise FileNotFoundError("Emacs not found. Run: python3 scripts/modus.py fetch-emacs")
 
 
-def cmd_extract_palettes(_args: argparse.Namespace | None) -> None:
+def cmd_extract_palettes(args: argparse.Namespace | None) -> None:
     vendor_dir = REPO_ROOT / "vendor" / "modus-themes"
     out_dir = REPO_ROOT / "palettes"
-    if not vendor_dir.is_dir():
-        raise SystemExit(f"Error: missing subtree at {vendor_dir}")
+    backend = args.backend if args else "batch"
+    if args and args.stop_daemon:
+        backend = "daemon"
 
     try:
         emacs = emacs_bin()
     except FileNotFoundError as exc:
         raise SystemExit(f"Error: {exc}") from exc
+
+    if backend == "daemon":
+        try:
+            daemon = emacs_daemon.EmacsDaemon(emacs, emacs_daemon.socket_path(REPO_ROOT), args.idle_timeout)
+        except FileNotFoundError as exc:
+            raise SystemExit(f"Error: {exc}") from exc
+        if args.stop_daemon:
+            print("Stopped Emacs daemon." if daemon.stop() else "Emacs daemon not running.")
+            return
+
+    if not vendor_dir.is_dir():
+        raise SystemExit(f"Error: missing subtree at {vendor_dir}")
     out_dir.mkdir(parents=True, exist_ok=True)
-    elisp = REPO_ROOT / "scripts" / "core" / "extract-palettes.el"
-    expr = f'(modus-themes-export-palettes "{vendor_dir}" "{out_dir}")'
 
-    subprocess.run(
-        [str(emacs), "-Q", "--batch", "-l", str(elisp), "--eval", expr],
-        check=True,
-    )
+    if backend == "daemon":
+        try:
+            daemon.export_palettes(vendor_dir, out_dir)
+        except (RuntimeError, subprocess.CalledProcessError) as exc:
+            raise SystemExit(f"Error: daemon extraction failed: {exc}") from exc
+    else:
+        elisp = REPO_ROOT / "scripts" / "core" / "extract-palettes.el"
+        expr = f'(modus-themes-export-palettes "{vendor_dir}" "{out_dir}")'
+
+        subprocess.run(
+            [str(emacs), "-Q", "--batch", "-l", str(elisp), "--eval", expr],
+            check=True,
+        )
+    cmd_index_palettes(None)
+
+
+def cmd_index_palettes(_args: argparse.Namespace | None) -> None:
+    palette_paths = [path for _, path in palette_entries()]
+    if not palette_paths:
+        raise SystemExit("Error: no palettes found. Run extract-palettes first.")
+    indexed = metrics.index_palettes(palette_paths)
+    print(f"Indexed {indexed} of {len(palette_paths)} palette(s) ({len(palette_paths) - indexed} up to date).")
+
+
+def cmd_palette_lint(args: argparse.Namespace) -> None:
+    source_dir = Path(args.palettes_dir) if args.palettes_dir else palettes_dir()
+    palettes: dict[str, Any] = {}
+    palette_metrics: dict[str, metrics.PaletteMetrics] = {}
+    for palette_path in sorted(source_dir.glob("*.json")):
+        theme_name, palette = io.load_palette(str(palette_path))
+        if args.theme and theme_name != args.theme:
+            continue
+        palettes[theme_name] = palette
+        palette_metrics[theme_name] = metrics.load_metrics(palette_path, palette)
+    if not palettes:
+        raise SystemExit("Error: no palettes found. Run extract-palettes first.")
+
+    patterns = [p.strip() for p in args.keys.split(",") if p.strip()] if args.keys else None
+    report = palette_lint.near_duplicates(palettes, args.threshold, patterns, palette_metrics)
+
+    print(f"Near-duplicate colors (CIEDE2000 <= {args.threshold:g}):")
+    by_theme: dict[str, list[tuple]] = {}
+    for entry in report["palettes"]:
+        by_theme.setdefault(entry[0], []).append(entry)
+    for theme_name in palettes:
+        entries = by_theme.get(theme_name, [])
+        print(f"{theme_name}: {len(entries)} pair(s)")
+        for _, key_a, hex_a, key_b, hex_b, delta in entries:
+            print(f"  {key_a} ({hex_a}) ~ {key_b} ({hex_b}): {delta:.2f}")
+
+    if len(palettes) > 1:
+        print(f"Across variants: {len(report['variants'])} pair(s)")
+        for key, theme_a, hex_a, theme_b, hex_b, delta in report["variants"]:
+            print(f"  {key}: {theme_a} ({hex_a}) ~ {theme_b} ({hex_b}): {delta:.2f}")
+
+    print(f"Checked {report['colors']} distinct color(s) across {len(palettes)} palette(s).")
+
+
+def cmd_cvd_audit(args: argparse.Namespace) -> None:
+    palettes: dict[str, Any] = {}
+    for theme_name, palette_path in palette_entries():
+        if args.theme and theme_name != args.theme:
+            continue
+        palettes[theme_name] = io.load_palette(str(palette_path))[1]
+    if not palettes:
+        raise SystemExit("Error: no palettes found. Run extract-palettes first.")
+
+    groups = dict(cvd.SEMANTIC_GROUPS)
+    ghostty_mapping = REPO_ROOT / "mappings" / "ghostty" / "default.json"
+    if ghostty_mapping.is_file():
+        groups.update(cvd.ansi_groups(io.load_mapping(str(ghostty_mapping))))
+
+    simulations = [args.simulation] if args.simulation else None
+    collapsed = cvd.audit(palettes, groups, args.threshold, simulations)
+    if not args.all:
+        collapsed = [entry for entry in collapsed if entry["targeted"]]
+
+    print(f"Collapsed pairs (CIEDE2000 < {args.threshold:g} under simulation):")
+    for entry in collapsed:
+        key_a, key_b = entry["keys"]
+        color_a, color_b = entry["colors"]
+        print(
+            f"  {entry['theme']} [{entry['simulation']}] {entry['group']}: "
+            f"{key_a} ({color_a}) ~ {key_b} ({color_b}): "
+            f"{entry['delta_e']:.2f} (was {entry['base_delta_e']:.2f})"
+        )
+    scope = "all" if args.all else "targeted"
+    print(f"Audited {len(palettes)} palette(s), {scope} simulations: {len(collapsed)} collapsed pair(s).")
+    if collapsed and args.strict:
+        raise SystemExit("CVD audit failed.")
+
+
+def _history_value(raw: str | None, value: str | None) -> str:
+    if raw is None:
+        return "(absent)"
+    if raw == value or value is None:
+        return raw
+    return f"{raw} ({value})"
+
+
+def _history_delta(delta: float | None) -> str:
+    return "n/a" if delta is None else f"{delta:.2f}"
+
+
+def cmd_palette_history(args: argparse.Namespace) -> None:
+    with palette_history.History(str(REPO_ROOT)) as history:
+        if args.diff:
+            old_rev, new_rev = args.diff
+            old = history.palettes(old_rev)
+            new = history.palettes(new_rev)
+            if not old or not new:
+                missing = old_rev if not old else new_rev
+                raise SystemExit(f"Error: no Modus palettes found at {missing}:{palette_history.VENDOR_PATH}")
+            changes = [
+                change
+                for change in palette_history.ranked_diff(old, new)
+                if (not args.theme or change["theme"] == args.theme) and (not args.key or change["key"] == args.key)
+            ]
+            print(f"Palette changes {old_rev}..{new_rev} (largest CIEDE2000 first):")
+            for change in changes:
+                before = _history_value(change["old_raw"], change["old"])
+                after = _history_value(change["new_raw"], change["new"])
+                print(f"  {change['theme']} {change['key']}: {before} -> {after}: {_history_delta(change['delta_e'])}")
+            print(f"{len(changes)} change(s).")
+            return
+
+        revisions = git_utils.log_revisions(str(REPO_ROOT), args.rev, palette_history.VENDOR_PATH, args.max_count)
+        if not revisions:
+            raise SystemExit(f"Error: no revisions touch {palette_history.VENDOR_PATH} in {args.rev}")
+        snapshots = [(revision, history.palettes(revision["sha"])) for revision in revisions]
+        if args.theme:
+            snapshots = [
+                (revision, {name: raw for name, raw in palettes.items() if name == args.theme})
+                for revision, palettes in snapshots
+            ]
+
+        if args.key:
+            print(f"History of {args.key}:")
+            for theme_name, changes in palette_history.timeline(snapshots, args.key).items():
+                print(f"{theme_name}: {len(changes)} change(s)")
+                for change in changes:
+                    revision = change["revision"]
+                    value = _history_value(change["raw"], change["value"])
+                    delta = "" if change["delta_e"] is None else f" ({_history_delta(change['delta_e'])})"
+                    print(f"  {revision['date']} {revision['short']} {value}{delta}  {revision['subject']}")
+        else:
+            print("Palette changes by revision:")
+            previous = None
+            for revision, palettes in snapshots:
+                summary = "initial"
+                if previous is not None:
+                    changes = palette_history.ranked_diff(previous, palettes)
+                    summary = f"{len(changes)} change(s)"
+                    if changes and changes[0]["delta_e"] is not None:
+                        top = changes[0]
+                        summary += f", max {top['delta_e']:.2f} ({top['theme']} {top['key']})"
+                previous = palettes
+                print(f"  {revision['date']} {revision['short']} {summary}  {revision['subject']}")
+
+        print(f"Read {len(revisions)} revision(s), parsed {history.blobs_read} source blob(s).")
 
 
 def cmd_fetch_emacs(_args: argparse.Namespace) -> None:
@@ -603,12 +1370,11 @@ def cmd_update_subtree(_args: argparse.Namespace) -> None:
     prefix = "vendor/modus-themes"
     git_utils.subtree_update(str(REPO_ROOT), remote_url, prefix)
     cmd_extract_palettes(None)
-    cmd_render(argparse.Namespace(tool="all", mapping=None, out_dir=None, theme=None))
+    cmd_render(argparse.Namespace(tool="all", mapping=None, out_dir=None, theme=None, changed_since=None, check=False))
 
 
-def cmd_doctor(_args: argparse.Namespace) -> None:
+def binary_issues() -> list[str]:
     issues = []
-
     if shutil.which("git") is None:
         issues.append("git not found")
     if shutil.which("python3") is None:
@@ -620,49 +1386,184 @@ def cmd_doctor(_args: argparse.Namespace) -> None:
         emacs_bin()
     except FileNotFoundError:
         issues.append("emacs not found (run: python3 scripts/modus.py fetch-emacs)")
+    return issues
 
-    if not (REPO_ROOT / "palettes").is_dir():
-        issues.append("palettes directory missing (run: python3 scripts/modus.py extract-palettes)")
-
-    # Validate all templates reference valid palette keys
-    palette_files = list(palettes_dir().glob("*.json"))
-    if palette_files:
-        # Use the first palette to get the set of valid keys
-        _, sample_palette = io.load_palette(str(palette_files[0]))
-        palette_keys = set(sample_palette.keys())
-
-        registry = load_registry()
-        for tool, manifest in registry.items():
-            template_path = tool_template(manifest)
-            if template_path and template_path.is_file():
-                template_text = template_path.read_text(encoding="utf-8")
-                mapping_path = manifest.get("mapping_path")
-                mapping_keys: set[str] = set()
-                if mapping_path:
-                    mapping = io.load_mapping(str(REPO_ROOT / mapping_path))
-                    mapping_keys = set(mapping.keys())
-                errors = template_utils.validate_template(
-                    template_text, palette_keys, mapping_keys
+
+def palette_issues(palette_files: list[Path]) -> list[str]:
+    if not palettes_dir().is_dir():
+        return ["palettes directory missing (run: python3 scripts/modus.py extract-palettes)"]
+    if not palette_files:
+        return ["no palettes found (run: python3 scripts/modus.py extract-palettes)"]
+    issues = []
+    for path in palette_files:
+        try:
+            doctor.load_palette(path)
+        except (ValueError, KeyError) as exc:
+            issues.append(f"{path.name}: {exc}")
+    return issues
+
+
+def doctor_checks(registry: dict[str, dict[str, Any]]) -> list[doctor.Check]:
+    palette_files = sorted(palettes_dir().glob("*.json")) if palettes_dir().is_dir() else []
+    checks = [
+        doctor.Check("binaries", "", (), lambda: (binary_issues(), [])),
+        doctor.Check("palettes", "", tuple(palette_files), lambda: (palette_issues(palette_files), [])),
+    ]
+    palette_paths: dict[str, Path] = {}
+    for path in palette_files:
+        try:
+            theme_name, _ = io.read_palette(str(path))
+        except (ValueError, json.JSONDecodeError):
+            continue
+        palette_paths[theme_name] = path
+    palette_inputs = tuple(palette_paths.values())
+    # Templates whose blend tokens join the contrast audit.
+    blend_sources: list[Path] = []
+
+    for tool in sorted(registry):
+        manifest = tool_manifest(registry, tool)
+        mapping_path = resolve_path(manifest_root(manifest), manifest.get("mapping_path"))
+        mapping_inputs = (mapping_path,) if mapping_path else ()
+
+        template_path = tool_template(manifest)
+        extras = [entry["template_path"] for entry in extra_templates(manifest)]
+        for path in (template_path, *extras):
+            if path and path.is_file():
+                blend_sources.extend([path, *template_utils.fragment_paths(path)])
+
+        if template_path:
+            checks.append(
+                doctor.Check(
+                    "templates",
+                    tool,
+                    (template_path, *template_utils.fragment_paths(template_path), *mapping_inputs, *palette_inputs),
+                    lambda path=template_path, mapping=mapping_path: (
+                        doctor.template_issues(path, palette_paths, mapping),
+                        [],
+                    ),
                 )
-                for error in errors:
-                    issues.append(f"{tool}: {error}")
-
-        # Check WCAG AAA contrast for all palettes (warnings only)
-        contrast_warnings = []
-        for palette_path in palette_files:
-            theme_name, palette = io.load_palette(str(palette_path))
-            warnings = contrast_utils.validate_palette_contrast(palette)
-            for warning in warnings:
-                contrast_warnings.append(f"{theme_name}: {warning}")
-        if contrast_warnings:
-            print("Contrast warnings (may be intentional for tinted variants):")
-            for warning in contrast_warnings:
-                print(f"  - {warning}")
-
-    if issues:
+            )
+
+        if extras:
+
+            def run_extras(extras=extras, mapping=mapping_path) -> tuple[list[str], list[str]]:
+                issues = []
+                for path in extras:
+                    for issue in doctor.template_issues(path, palette_paths, mapping):
+                        issues.append(f"{path.name}: {issue}")
+                return issues, []
+
+            checks.append(
+                doctor.Check(
+                    "extra-templates",
+                    tool,
+                    (
+                        *extras,
+                        *(fragment for path in extras for fragment in template_utils.fragment_paths(path)),
+                        *mapping_inputs,
+                        *palette_inputs,
+                    ),
+                    run_extras,
+                )
+            )
+
+        spec_path = tool_spec(manifest)
+        if spec_path:
+            if mapping_path is None:
+                checks.append(doctor.Check("specs", tool, (), lambda: (["mapping_path missing in manifest"], [])))
+            else:
+                checks.append(
+                    doctor.Check(
+                        "specs",
+                        tool,
+                        (spec_path, mapping_path, *palette_inputs),
+                        lambda path=spec_path, mapping=mapping_path: (
+                            doctor.spec_issues(path, palette_paths, mapping),
+                            [],
+                        ),
+                    )
+                )
+
+        if mapping_path:
+            checks.append(
+                doctor.Check(
+                    "mappings",
+                    tool,
+                    (mapping_path, *palette_inputs),
+                    lambda mapping=mapping_path: (doctor.mapping_issues(mapping, palette_paths), []),
+                )
+            )
+
+        overlays = manifest.get("mapping_overlays") or []
+        if overlays and mapping_path:
+            entries = [(entry.get("themes"), resolve_path(manifest_root(manifest), entry.get("mapping_path"))) for entry in overlays]
+
+            def run_overlays(entries=entries, mapping=mapping_path) -> tuple[list[str], list[str]]:
+                issues = []
+                for themes_glob, path in entries:
+                    if not themes_glob or path is None:
+                        issues.append("mapping_overlays entries require themes and mapping_path")
+                        continue
+                    issues.extend(doctor.overlay_issues(path, themes_glob, mapping, palette_paths))
+                return issues, []
+
+            overlay_inputs = tuple(path for _, path in entries if path)
+            checks.append(
+                doctor.Check("mapping-overlays", tool, (mapping_path, *overlay_inputs, *palette_inputs), run_overlays)
+            )
+
+    blend_inputs = tuple(dict.fromkeys(blend_sources))
+    for theme_name, path in palette_paths.items():
+        checks.append(
+            doctor.Check(
+                "contrast",
+                theme_name,
+                (path, *blend_inputs),
+                lambda path=path: ([], doctor.contrast_warnings(path, blend_inputs)),
+            )
+        )
+    return checks
+
+
+def cmd_doctor(args: argparse.Namespace) -> None:
+    results = doctor.run_checks(doctor_checks(load_registry()), use_cache=not args.no_cache)
+    failed = [result for result in results if result.issues]
+
+    if args.json:
+        report = {
+            "status": "failed" if failed else "passed",
+            "checks": [
+                {
+                    "check": result.name,
+                    "target": result.target,
+                    "status": result.status,
+                    "cached": result.cached,
+                    "issues": result.issues,
+                    "warnings": result.warnings,
+                }
+                for result in results
+            ],
+        }
+        print(json.dumps(report, indent=2))
+        if failed:
+            raise SystemExit("Doctor failed.")
+        return
+
+    contrast_warnings = [
+        f"{result.target}: {warning}" for result in results if result.name == "contrast" for warning in result.warnings
+    ]
+    if contrast_warnings:
+        print("Contrast warnings (may be intentional for tinted variants):")
+        for warning in contrast_warnings:
+            print(f"  - {warning}")
+
+    cached = sum(result.cached for result in results)
+    print(f"Ran {len(results)} check(s) ({cached} cached).")
+    if failed:
         print("Doctor found issues:")
-        for issue in issues:
-            print(f"- {issue}")
+        for result in failed:
+            for issue in result.issues:
+                print(f"- {result.name} {result.target}".rstrip() + f": {issue}")
         raise SystemExit("Doctor failed.")
 
     print("Doctor passed.")
@@ -679,8 +1580,16 @@ def build_parser() -> argparse.ArgumentParser:
     render_cmd.add_argument("--mapping")
     render_cmd.add_argument("--out-dir")
     render_cmd.add_argument("--theme")
+    render_cmd.add_argument("--changed-since", metavar="REV")
+    render_cmd.add_argument("--check", action="store_true")
     render_cmd.set_defaults(func=cmd_render)
 
+    impact_cmd = sub.add_parser("impact")
+    impact_cmd.add_argument("--key", required=True)
+    impact_cmd.add_argument("--tool", default="all")
+    impact_cmd.add_argument("--theme")
+    impact_cmd.set_defaults(func=cmd_impact)
+
     validate_cmd = sub.add_parser("validate")
     validate_cmd.add_argument("--tool", required=True)
     validate_cmd.add_argument("--themes-dir")
@@ -694,24 +1603,89 @@ def build_parser() -> argparse.ArgumentParser:
     install_cmd.add_argument("--config-dir")
     install_cmd.add_argument("--link", action="store_true")
     install_cmd.add_argument("--copy", action="store_true")
+    install_cmd.add_argument("--sync", action="store_true", help="with --copy, update changed copies in place")
     install_cmd.set_defaults(func=cmd_install)
 
+    export_cmd = sub.add_parser("export")
+    export_cmd.add_argument("output", help="bundle file to write, or - for stdout")
+    export_cmd.add_argument("--tool", default="all")
+    export_cmd.set_defaults(func=cmd_export)
+
+    import_cmd = sub.add_parser("import")
+    import_cmd.add_argument("bundle", help="bundle file to read, or - for stdin")
+    import_cmd.add_argument("--tool", help="import only this tool")
+    import_cmd.add_argument("--themes-dir", help="with --tool, install here instead of install_targets")
+    import_cmd.set_defaults(func=cmd_import)
+
+    status_cmd = sub.add_parser("status")
+    status_cmd.add_argument("--tool", default="all")
+    status_cmd.add_argument("--strict", action="store_true", help="exit non-zero if any installed path changed")
+    status_cmd.set_defaults(func=cmd_status)
+
     uninstall_cmd = sub.add_parser("uninstall")
     uninstall_cmd.add_argument("--tool", required=True)
     uninstall_cmd.add_argument("--theme")
     uninstall_cmd.add_argument("--themes-dir")
     uninstall_cmd.set_defaults(func=cmd_uninstall)
 
+    apply_cmd = sub.add_parser("apply")
+    apply_cmd.add_argument("--theme", required=True)
+    apply_cmd.add_argument("--mapping", help="mapping file (defaults to the Ghostty mapping)")
+    apply_cmd.add_argument("--output", help="write the escape sequences to a file instead of the terminal")
+    apply_cmd.set_defaults(func=cmd_apply)
+
     print_cmd = sub.add_parser("print-config")
     print_cmd.add_argument("--tool", required=True)
     print_cmd.add_argument("--theme")
     print_cmd.add_argument("--config-dir")
     print_cmd.set_defaults(func=cmd_print_config)
 
-    sub.add_parser("extract-palettes").set_defaults(func=cmd_extract_palettes)
+    lint_cmd = sub.add_parser("palette-lint")
+    lint_cmd.add_argument("--threshold", type=float, default=2.0)
+    lint_cmd.add_argument("--theme")
+    lint_cmd.add_argument("--keys", help="comma-separated key globs, e.g. 'bg-added*,bg-removed*'")
+    lint_cmd.add_argument("--palettes-dir")
+    lint_cmd.set_defaults(func=cmd_palette_lint)
+
+    cvd_cmd = sub.add_parser("cvd-audit")
+    cvd_cmd.add_argument("--threshold", type=float, default=cvd.DEFAULT_THRESHOLD)
+    cvd_cmd.add_argument("--theme")
+    cvd_cmd.add_argument("--simulation", choices=sorted(cvd.SIMULATIONS))
+    cvd_cmd.add_argument("--all", action="store_true", help="report every palette under every simulation")
+    cvd_cmd.add_argument("--strict", action="store_true", help="exit non-zero if any pair collapses")
+    cvd_cmd.set_defaults(func=cmd_cvd_audit)
+
+    history_cmd = sub.add_parser("palette-history")
+    history_cmd.add_argument("--rev", default="HEAD", help="revision or range to walk, e.g. 'v4.0..HEAD'")
+    history_cmd.add_argument("--max-count", type=int, help="only the N most recent revisions")
+    history_cmd.add_argument("--key", help="show the timeline of one palette key")
+    history_cmd.add_argument("--theme")
+    history_cmd.add_argument("--diff", nargs=2, metavar=("FROM", "TO"), help="rank changes between two revisions")
+    history_cmd.set_defaults(func=cmd_palette_history)
+
+    extract_cmd = sub.add_parser("extract-palettes")
+    extract_cmd.add_argument(
+        "--backend",
+        choices=["batch", "daemon"],
+        default="batch",
+        help="'daemon' keeps a private Emacs with modus-themes loaded between runs",
+    )
+    extract_cmd.add_argument(
+        "--idle-timeout",
+        type=int,
+        default=emacs_daemon.DEFAULT_IDLE_TIMEOUT,
+        help="seconds the daemon stays up without requests",
+    )
+    extract_cmd.add_argument("--stop-daemon", action="store_true", help="shut down the daemon and exit")
+    extract_cmd.set_defaults(func=cmd_extract_palettes)
+    sub.add_parser("index-palettes").set_defaults(func=cmd_index_palettes)
     sub.add_parser("fetch-emacs").set_defaults(func=cmd_fetch_emacs)
     sub.add_parser("update-subtree").set_defaults(func=cmd_update_subtree)
-    sub.add_parser("doctor").set_defaults(func=cmd_doctor)
+
+    doctor_cmd = sub.add_parser("doctor")
+    doctor_cmd.add_argument("--json", action="store_true", help="print a machine-readable report")
+    doctor_cmd.add_argument("--no-cache", action="store_true", help="re-run every check instead of reusing cached results")
+    doctor_cmd.set_defaults(func=cmd_doctor)
 
     return parser
 
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for the in-memory render API."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import api
+
+
+class RendererTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.renderer = api.Renderer(cache_size=4)
+
+    def test_matches_rendered_output(self) -> None:
+        expected = (REPO_ROOT / "ports" / "ghostty" / "themes" / "modus-vivendi").read_text(encoding="utf-8")
+        self.assertEqual(self.renderer.render("ghostty", "modus-vivendi"), expected)
+
+    def test_iter_render_yields_byte_sized_chunks(self) -> None:
+        document = self.renderer.render("zed", "modus-operandi").encode("utf-8")
+        for renderer in (self.renderer, api.Renderer()):
+            chunks = list(renderer.iter_render("zed", "modus-operandi", chunk_size=1000))
+            self.assertEqual(b"".join(chunks), document)
+            self.assertEqual({len(chunk) for chunk in chunks[:-1]}, {1000})
+            self.assertLessEqual(len(chunks[-1]), 1000)
+
+    def test_in_memory_palette(self) -> None:
+        values = dict(self.renderer.palette("modus-vivendi")[1])
+        named = self.renderer.render("ghostty", "modus-vivendi")
+        adhoc = self.renderer.render("ghostty", {"name": "modus-vivendi", "palette": values})
+        self.assertEqual(adhoc, named)
+        custom = self.renderer.render("ghostty", values | {"bg-main": "#123456"}, "custom")
+        self.assertIn("123456", custom)
+        with self.assertRaises(ValueError):
+            self.renderer.render("ghostty", values)
+        with self.assertRaises(KeyError):
+            self.renderer.render("ghostty", "no-such-theme")
+
+    def test_render_many(self) -> None:
+        documents = self.renderer.render_many([("bat", "modus-operandi"), ("ghostty", "modus-vivendi")])
+        self.assertEqual(documents[1], self.renderer.render("ghostty", "modus-vivendi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Tests for export bundles and importing them."""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts import modus
+from scripts.common import bundle
+from scripts.common import ledger
+
+
+def crafted_bundle(tool: str, unit_path: str, file_path: str = "", data: bytes = b"owned\n") -> bytes:
+    """Return a bundle whose manifest is written by hand, not by ``write_bundle``."""
+    digest = hashlib.sha256(data).hexdigest()
+    manifest = {
+        "tool": tool,
+        "install_targets": ["/tmp/elsewhere"],
+        "units": [{"path": unit_path, "theme": None, "hash": digest, "files": [{"path": file_path, "sha256": digest}]}],
+    }
+    out = io.BytesIO()
+    with tarfile.open(fileobj=out, mode="w:gz") as archive:
+        for name, content in (
+            ("bundle.json", json.dumps({"version": bundle.BUNDLE_VERSION, "tools": [tool]}).encode()),
+            (f"tools/{tool}.json", json.dumps(manifest).encode()),
+            (f"objects/{digest}", data),
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return out.getvalue()
+
+
+class BundleTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.dest_dir = self.root / "themes"
+        self.dest_dir.mkdir()
+
+    def place_all(self, manifest: dict) -> dict[str, Path]:
+        return {unit["path"]: self.dest_dir / unit["path"] for unit in manifest["units"]}
+
+    def test_round_trip(self) -> None:
+        src = self.root / "src"
+        (src / "modus.yazi").mkdir(parents=True)
+        (src / "modus.yazi" / "flavor.toml").write_text("[mgr]\n")
+        (src / "modus.conf").write_text("same\n")
+        (src / "copy.conf").write_text("same\n")
+        units = [
+            bundle.Unit("modus.yazi", "modus", src / "modus.yazi"),
+            bundle.Unit("modus.conf", "modus", src / "modus.conf"),
+            bundle.Unit("extra/copy.conf", None, src / "copy.conf"),
+        ]
+        first, second = io.BytesIO(), io.BytesIO()
+        self.assertEqual(bundle.write_bundle(first, {"tool": (["~/themes"], units)}), (3, 2))
+        bundle.write_bundle(second, {"tool": (["~/themes"], units)})
+        self.assertEqual(first.getvalue(), second.getvalue())
+
+        first.seek(0)
+        self.assertEqual(bundle.read_bundle(first, self.place_all), 3)
+        self.assertEqual((self.dest_dir / "modus.yazi" / "flavor.toml").read_text(), "[mgr]\n")
+        self.assertEqual((self.dest_dir / "extra" / "copy.conf").read_text(), "same\n")
+        self.assertEqual(ledger.content_hash(self.dest_dir / "modus.yazi"), ledger.content_hash(src / "modus.yazi"))
+
+    def test_rejects_unsafe_paths(self) -> None:
+        for tool, unit_path, file_path in (
+            ("ghostty", "../escaped.conf", ""),
+            ("ghostty", str(self.root / "escaped.conf"), ""),
+            ("ghostty", "modus.yazi", "../../escaped.conf"),
+            ("ghostty", "modus.yazi", "/tmp/escaped.conf"),
+            ("..", "modus.conf", ""),
+        ):
+            with self.subTest(tool=tool, unit=unit_path, file=file_path):
+                data = crafted_bundle(tool, unit_path, file_path)
+                with self.assertRaises(ValueError):
+                    bundle.read_bundle(io.BytesIO(data), self.place_all)
+        self.assertEqual(list(self.root.rglob("escaped.conf")), [])
+
+    def test_rejects_file_through_symlinked_directory(self) -> None:
+        outside = self.root / "outside"
+        outside.mkdir()
+        (self.dest_dir / "modus.yazi").mkdir()
+        (self.dest_dir / "modus.yazi" / "link").symlink_to(outside)
+        data = crafted_bundle("ghostty", "modus.yazi", "link/escaped.conf")
+        with self.assertRaises(ValueError):
+            bundle.read_bundle(io.BytesIO(data), self.place_all)
+        self.assertFalse((outside / "escaped.conf").exists())
+
+
+class ImportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        env = {key: str(self.root / key.lower()) for key in ("XDG_STATE_HOME", "XDG_CONFIG_HOME", "XDG_CACHE_HOME")}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_import(self, data: bytes, **options: str | None) -> None:
+        path = self.root / "bundle.tar.gz"
+        path.write_bytes(data)
+        args = argparse.Namespace(bundle=str(path), tool=None, themes_dir=None)
+        for key, value in options.items():
+            setattr(args, key, value)
+        with contextlib.redirect_stdout(io.StringIO()):
+            modus.cmd_import(args)
+
+    def test_installs_into_local_target(self) -> None:
+        self.run_import(crafted_bundle("ghostty", "modus-operandi"))
+        dest = self.root / "xdg_config_home" / "ghostty" / "themes" / "modus-operandi"
+        self.assertEqual(dest.read_text(), "owned\n")
+        self.assertIn(str(dest), ledger.load("ghostty"))
+        self.assertFalse(Path("/tmp/elsewhere/modus-operandi").exists())
+
+    def test_crafted_bundle_writes_nothing_outside(self) -> None:
+        themes_dir = self.root / "themes"
+        for unit_path in ("../escaped", str(self.root / "escaped")):
+            with self.subTest(unit=unit_path):
+                with self.assertRaises(SystemExit):
+                    self.run_import(crafted_bundle("ghostty", unit_path), tool="ghostty", themes_dir=str(themes_dir))
+        self.assertEqual(list(self.root.rglob("escaped")), [])
+        self.assertEqual(ledger.load("ghostty"), {})
+
+    def test_skips_unknown_tool(self) -> None:
+        self.run_import(crafted_bundle("not-a-tool", "modus-operandi"))
+        self.assertFalse(ledger.ledger_path("not-a-tool").exists())
+        self.assertEqual(list(self.root.rglob("modus-operandi")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Tests for the shared cache and output locks."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import cache
+
+
+class LockTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        patcher = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(self.root / "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_file_lock_excludes_and_cleans_up(self) -> None:
+        lock_path = self.root / "counter.lock"
+        counter = self.root / "counter"
+        counter.write_text("0")
+
+        def bump() -> None:
+            for _ in range(20):
+                with cache.file_lock(lock_path):
+                    value = int(counter.read_text())
+                    counter.write_text(str(value + 1))
+
+        threads = [threading.Thread(target=bump) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.read_text(), "160")
+        self.assertFalse(lock_path.exists())
+
+    def test_no_lock_files_left_behind(self) -> None:
+        for index in range(5):
+            with cache.output_lock(self.root / f"out-{index}"):
+                pass
+        store = cache.DiskCache()
+        self.assertEqual(store.get_or_build("test", "ab" * 32, lambda: {"value": 1}), {"value": 1})
+        self.assertEqual(store.get_or_build("test", "ab" * 32, lambda: {"value": 2}), {"value": 1})
+        self.assertEqual(sorted(path.name for path in (self.root / "cache").rglob("*.lock")), [])
+
+    def test_replacement_mode(self) -> None:
+        path = self.root / "file"
+        self.assertEqual(cache.replacement_mode(path), 0o666 & ~cache._process_umask())
+        path.write_text("x")
+        os.chmod(path, 0o600)
+        cache.atomic_write_bytes(path, b"y")
+        self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+        self.assertEqual(path.read_bytes(), b"y")
+
+
+if __name__ == "__main__":
+    unittest.main()
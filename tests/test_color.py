@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for color conversions and near-duplicate search."""
+
+from __future__ import annotations
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import color
+from scripts.common import contrast
+from scripts.common.palette_lint import find_close_pairs
+
+
+class ColorTest(unittest.TestCase):
+    def test_delta_e_2000_reference_pairs(self) -> None:
+        # From Sharma, Wu and Dalal's CIEDE2000 test data.
+        for lab1, lab2, expected in (
+            ((50.0, 2.6772, -79.7751), (50.0, 0.0, -82.7485), 2.0425),
+            ((50.0, 2.5, 0.0), (73.0, 25.0, -18.0), 27.1492),
+            ((2.0776, 0.0795, -1.1350), (0.9033, -0.0636, -0.5514), 0.9082),
+        ):
+            self.assertAlmostEqual(color.delta_e_2000(lab1, lab2), expected, places=4)
+
+    def test_luminance_uses_linear_table(self) -> None:
+        self.assertEqual(contrast.rgb_luminance((255, 255, 255)), 1.0)
+        self.assertEqual(contrast.rgb_luminance((0, 0, 0)), 0.0)
+        self.assertAlmostEqual(contrast.relative_luminance("#808080"), color.SRGB_TO_LINEAR[128])
+
+
+class FindClosePairsTest(unittest.TestCase):
+    def test_matches_brute_force(self) -> None:
+        rng = random.Random(20)
+        colors = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(150)]
+        # Near-duplicates of some colors, so small thresholds find pairs too.
+        colors += [tuple(min(255, max(0, c + rng.randint(-3, 3))) for c in base) for base in colors[:80]]
+        colors += [(0, 0, 0), (1, 1, 1), (255, 255, 255), (254, 255, 255), (128, 128, 128), (130, 127, 129)]
+        labs = color.rgb_to_lab_batch(colors)
+        for threshold in (0.5, 2.0, 5.0, 15.0):
+            with self.subTest(threshold=threshold):
+                expected = {
+                    (i, j)
+                    for i in range(len(labs))
+                    for j in range(i + 1, len(labs))
+                    if color.delta_e_2000(labs[i], labs[j]) <= threshold
+                }
+                found = find_close_pairs(labs, threshold)
+                self.assertEqual({(i, j) for i, j, _ in found}, expected)
+                self.assertEqual(len(found), len(expected))
+                self.assertTrue(all(delta <= threshold for _, _, delta in found))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Tests for inheritance-based delta output."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import delta
+
+BASE = """# Modus Operandi
+# Generated
+
+"ui.background" = { bg = "bg-main" }
+"ui.text" = "fg-main"
+
+[palette]
+bg-main = "#ffffff"
+fg-main = "#000000"
+"""
+
+VARIANT = """# Modus Operandi Tinted
+# Generated
+
+"ui.background" = { bg = "bg-main" }
+"ui.text" = "fg-main"
+
+[palette]
+bg-main = "#fbf7f0"
+fg-main = "#000000"
+"""
+
+
+class DeltaTest(unittest.TestCase):
+    def test_base_theme(self) -> None:
+        themes = ["modus-operandi", "modus-operandi-tinted", "modus-vivendi"]
+        self.assertEqual(delta.base_theme("modus-operandi-tinted", themes), "modus-operandi")
+        self.assertIsNone(delta.base_theme("modus-operandi", themes))
+        self.assertIsNone(delta.base_theme("modus-vivendi", themes))
+
+    def test_render_delta(self) -> None:
+        rendered = delta.render_delta("helix", BASE, VARIANT, "modus-operandi")
+        self.assertEqual(
+            rendered,
+            '# Modus Operandi Tinted\n# Generated\n\ninherits = "modus-operandi"\n\n[palette]\nbg-main = "#fbf7f0"\n',
+        )
+
+    def test_identical_variant_only_inherits(self) -> None:
+        rendered = delta.render_delta("helix", BASE, BASE, "base")
+        self.assertEqual(rendered, '# Modus Operandi\n# Generated\n\ninherits = "base"\n')
+
+    def test_dropped_key_falls_back_to_full_variant(self) -> None:
+        variant = VARIANT.replace('"ui.text" = "fg-main"\n', "")
+        self.assertEqual(delta.render_delta("helix", BASE, variant, "modus-operandi"), variant)
+
+    def test_multiline_values_stay_whole(self) -> None:
+        base = 'a = [\n  "x",\n]\nb = 1\n'
+        variant = 'a = [\n  "y",\n]\nb = 1\n'
+        document = delta.FORMATS["helix"].parse(variant)
+        self.assertEqual(document.entries[0], (("", "a"), 'a = [\n  "y",\n]'))
+        self.assertEqual(delta.render_delta("helix", base, variant, "base"), 'inherits = "base"\n\na = [\n  "y",\n]\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
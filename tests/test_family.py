@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Tests for theme family output."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import family
+from scripts.common import render
+
+TEMPLATE = """{
+  "name": "Family",
+  "themes": [
+    {
+      "name": "{meta:theme}",
+      "background": "{color:bg-main}"
+    }
+  ]
+}
+"""
+
+
+def document(name: str, background: str) -> str:
+    return TEMPLATE.replace("{meta:theme}", name).replace("{color:bg-main}", background)
+
+
+class FamilyFormatTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def test_iter_family_joins_entries(self) -> None:
+        text = "".join(family.iter_family("json-themes", [document("a", "#ffffff"), document("b", "#000000")]))
+        data = json.loads(text)
+        self.assertEqual(data["name"], "Family")
+        self.assertEqual([theme["name"] for theme in data["themes"]], ["a", "b"])
+        self.assertEqual(data["themes"][1]["background"], "#000000")
+        self.assertTrue(text.endswith("]\n}\n"))
+
+    def test_iter_family_rejects_bad_documents(self) -> None:
+        with self.assertRaises(ValueError):
+            list(family.iter_family("json-themes", []))
+        with self.assertRaises(ValueError):
+            list(family.iter_family("json-themes", ['{"name": "no themes"}\n']))
+
+    def test_write_and_check(self) -> None:
+        path = self.root / "out" / "family.json"
+        documents = [document("a", "#ffffff"), document("b", "#000000")]
+        self.assertEqual(family.check_family(path, family.iter_family("json-themes", documents)), "missing")
+        self.assertTrue(family.write_family(path, family.iter_family("json-themes", documents)))
+        self.assertFalse(family.write_family(path, family.iter_family("json-themes", documents)))
+        self.assertIsNone(family.check_family(path, family.iter_family("json-themes", documents)))
+        self.assertEqual(family.check_family(path, family.iter_family("json-themes", documents[:1])), "stale")
+        self.assertEqual(family.check_family(path, family.iter_family("json-themes", documents + documents)), "stale")
+
+
+class FamilySessionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        patcher = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(root / "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        (root / "theme.tmpl").write_text(TEMPLATE)
+        (root / "mapping.json").write_text("{}\n")
+        palettes = {}
+        for name, background in (("light", "#ffffff"), ("dark", "#000000")):
+            palettes[name] = root / f"{name}.json"
+            palettes[name].write_text(json.dumps({"name": name, "palette": {"bg-main": background}}))
+        self.session = render.RenderSession(palettes)
+        self.jobs = [
+            {
+                "tool": "test",
+                "theme": name,
+                "kind": "template",
+                "source": root / "theme.tmpl",
+                "mapping_path": root / "mapping.json",
+                "output_path": root / "family.json",
+                "family_format": "json-themes",
+            }
+            for name in ("dark", "light")
+        ]
+
+    def test_family_entries_are_not_kept(self) -> None:
+        for _ in range(2):
+            chunks = family.iter_family("json-themes", (self.session.render(job, keep=False) for job in self.jobs))
+            data = json.loads("".join(chunks))
+            self.assertEqual([theme["name"] for theme in data["themes"]], ["dark", "light"])
+        self.assertEqual((self.session.renders, self.session.reused), (4, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Tests for the install ledger."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import ledger
+
+
+class EntryStateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.src = self.root / "src.conf"
+        self.src.write_text("# theme\n")
+
+    def link(self) -> tuple[Path, dict]:
+        dest = self.root / "link.conf"
+        dest.symlink_to(self.src)
+        return dest, ledger.make_entry(dest, self.src, "link", "theme")
+
+    def copy(self) -> tuple[Path, dict]:
+        dest = self.root / "copy.conf"
+        dest.write_text(self.src.read_text())
+        return dest, ledger.make_entry(dest, self.src, "copy", "theme")
+
+    def test_link_states(self) -> None:
+        dest, entry = self.link()
+        self.assertEqual(ledger.entry_state(dest, entry), "ok")
+        self.src.unlink()
+        self.assertEqual(ledger.entry_state(dest, entry), "broken")
+        dest.unlink()
+        self.assertEqual(ledger.entry_state(dest, entry), "missing")
+        dest.write_text("# mine\n")
+        self.assertEqual(ledger.entry_state(dest, entry), "replaced")
+        dest.unlink()
+        dest.symlink_to(self.root / "elsewhere.conf")
+        self.assertEqual(ledger.entry_state(dest, entry), "replaced")
+
+    def test_copy_states(self) -> None:
+        dest, entry = self.copy()
+        self.assertEqual(ledger.entry_state(dest, entry), "ok")
+        self.src.write_text("# theme, re-rendered\n")
+        self.assertEqual(ledger.entry_state(dest, entry), "outdated")
+        dest.write_text("# edited\n")
+        self.assertEqual(ledger.entry_state(dest, entry), "modified")
+        self.src.unlink()
+        self.assertEqual(ledger.entry_state(dest, entry), "modified")
+        dest.unlink()
+        self.assertEqual(ledger.entry_state(dest, entry), "missing")
+        dest.symlink_to(self.root / "elsewhere.conf")
+        self.assertEqual(ledger.entry_state(dest, entry), "replaced")
+
+    def test_touched_copy_is_still_ok(self) -> None:
+        dest, entry = self.copy()
+        os.utime(dest, ns=(0, 0))
+        os.utime(self.src, ns=(0, 0))
+        # Only the mtimes changed, so the content hash still matches.
+        self.assertEqual(ledger.entry_state(dest, entry), "ok")
+
+    def test_unchanged_stats_skip_hashing(self) -> None:
+        dest, entry = self.copy()
+        with mock.patch.object(ledger, "content_hash", side_effect=AssertionError("hashed")):
+            self.assertEqual(ledger.entry_state(dest, entry), "ok")
+
+    def test_directory_copy(self) -> None:
+        src = self.root / "theme.yazi"
+        src.mkdir()
+        (src / "flavor.toml").write_text("[mgr]\n")
+        dest = self.root / "installed.yazi"
+        dest.mkdir()
+        (dest / "flavor.toml").write_text("[mgr]\n")
+        entry = ledger.make_entry(dest, src, "copy", "theme")
+        self.assertEqual(entry["hash"], ledger.content_hash(dest))
+        self.assertEqual(ledger.entry_state(dest, entry), "ok")
+        (dest / "extra.toml").write_text("")
+        self.assertEqual(ledger.entry_state(dest, entry), "modified")
+
+    def test_import_entry_is_never_outdated(self) -> None:
+        dest, _ = self.copy()
+        entry = ledger.make_import_entry(dest, "theme", ledger.content_hash(dest), "bundle.tar.gz")
+        self.assertEqual(ledger.entry_state(dest, entry), "ok")
+        dest.write_text("# edited\n")
+        self.assertEqual(ledger.entry_state(dest, entry), "modified")
+
+
+class LedgerFileTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {"XDG_STATE_HOME": tmp.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_round_trip(self) -> None:
+        self.assertEqual(ledger.load("ghostty"), {})
+        entries = {"/b": {"mode": "link"}, "/a": {"mode": "copy"}}
+        ledger.save("ghostty", entries)
+        self.assertEqual(list(ledger.load("ghostty")), ["/a", "/b"])
+        self.assertEqual(ledger.tools(), ["ghostty"])
+        ledger.save("ghostty", {})
+        self.assertFalse(ledger.ledger_path("ghostty").exists())
+        self.assertEqual(ledger.tools(), [])
+
+    def test_rejects_other_versions(self) -> None:
+        path = ledger.ledger_path("ghostty")
+        path.parent.mkdir(parents=True)
+        path.write_text('{"version": 99, "entries": {}}\n')
+        with self.assertRaises(ValueError):
+            ledger.load("ghostty")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tests for OSC terminal recoloring."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import osc
+
+MAPPING = {
+    "background": "bg-main",
+    "foreground": "fg-main",
+    "cursor-color": "fg-main",
+    "palette": {str(index): "fg-main" if index % 2 else "bg-main" for index in range(16)},
+}
+
+
+class ColorSpecTest(unittest.TestCase):
+    def test_color_spec(self) -> None:
+        self.assertEqual(osc.color_spec("#A0B1C2"), "rgb:a0/b1/c2")
+        self.assertEqual(osc.color_spec("a0b1c2"), "rgb:a0/b1/c2")
+        # Terminals take no alpha here, so it is dropped.
+        self.assertEqual(osc.color_spec("#a0b1c280"), "rgb:a0/b1/c2")
+
+    def test_rejects_invalid(self) -> None:
+        for value in ("#fff", "#a0b1c2d", "", "#zzzzzz", "unspecified"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                osc.color_spec(value)
+
+
+class SequencesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.palette = {"bg-main": "#ffffff", "fg-main": "#000000"}
+
+    def test_sequences(self) -> None:
+        content = osc.sequences(self.palette, MAPPING)
+        parts = content.split("\x1b\\")
+        self.assertEqual(parts.pop(), "")
+        self.assertEqual(len(parts), 19)
+        self.assertEqual(parts[0], "\x1b]4;0;rgb:ff/ff/ff")
+        self.assertEqual(parts[15], "\x1b]4;15;rgb:00/00/00")
+        self.assertEqual(parts[16:], ["\x1b]10;rgb:00/00/00", "\x1b]11;rgb:ff/ff/ff", "\x1b]12;rgb:00/00/00"])
+
+    def test_missing_keys(self) -> None:
+        slots = dict(MAPPING["palette"])
+        del slots["7"]
+        with self.assertRaisesRegex(KeyError, "index 7"):
+            osc.sequences(self.palette, {**MAPPING, "palette": slots})
+        with self.assertRaisesRegex(KeyError, "cursor-color"):
+            osc.sequences(self.palette, {key: value for key, value in MAPPING.items() if key != "cursor-color"})
+        with self.assertRaisesRegex(KeyError, "bg-dim"):
+            osc.sequences(self.palette, {**MAPPING, "background": "bg-dim"})
+
+    def test_cached_sequences(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        patcher = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(root / "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        palette_path = root / "test.json"
+        mapping_path = root / "mapping.json"
+        palette_path.write_text(json.dumps({"name": "test", "palette": self.palette}))
+        mapping_path.write_text(json.dumps(MAPPING))
+
+        content = osc.cached_sequences("test", palette_path, mapping_path)
+        self.assertEqual(content, osc.sequences(self.palette, MAPPING))
+        self.assertTrue(osc.cache_path("test").is_file())
+        self.assertEqual(osc.cached_sequences("test", palette_path, mapping_path), content)
+
+        palette_path.write_text(json.dumps({"name": "test", "palette": {**self.palette, "bg-main": "#eeeeee"}}))
+        self.assertIn("rgb:ee/ee/ee", osc.cached_sequences("test", palette_path, mapping_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
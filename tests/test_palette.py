@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Tests for the packed Palette type."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import contrast
+from scripts.common import template
+from scripts.common.palette import Palette
+
+
+class UppercaseColorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.palette = Palette(
+            {"bg-main": "#FFFFFF", "fg-main": "#000000", "bg-hl": "#AABBCC80", "mixed": "#AbCdEf", "none": "unspecified"},
+            "test",
+        )
+
+    def test_values_round_trip(self) -> None:
+        self.assertEqual(self.palette["bg-main"], "#FFFFFF")
+        self.assertEqual(self.palette["bg-hl"], "#AABBCC80")
+        self.assertEqual(self.palette["mixed"], "#AbCdEf")
+
+    def test_channels(self) -> None:
+        self.assertTrue(self.palette.is_color("bg-main"))
+        self.assertEqual(self.palette.rgb("mixed"), (0xAB, 0xCD, 0xEF))
+        self.assertEqual(self.palette.rgb("bg-hl"), (0xAA, 0xBB, 0xCC))
+        self.assertEqual(self.palette.rgba("bg-hl"), (0xAA, 0xBB, 0xCC, 0x80))
+        self.assertFalse(self.palette.is_color("none"))
+        with self.assertRaises(ValueError):
+            self.palette.rgb("none")
+
+    def test_tokens_and_contrast(self) -> None:
+        rendered = template.render_template("{rgb:mixed} {rgba:bg-hl}", self.palette, {}, "test")
+        self.assertEqual(rendered, "171;205;239 0.666667 0.733333 0.8 0.501961")
+        self.assertEqual(contrast.validate_palette_contrast(self.palette, fg_keys=["fg-main"]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
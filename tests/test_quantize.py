@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Tests for xterm color quantization."""
+
+from __future__ import annotations
+
+import math
+import random
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import color
+from scripts.common import quantize
+
+
+def brute_force(rgb: tuple[int, int, int], indexes: range) -> int:
+    point = color.rgb_to_oklab(rgb)
+    return min(indexes, key=lambda i: math.dist(point, color.rgb_to_oklab(quantize.XTERM_COLORS[i])))
+
+
+class QuantizeTest(unittest.TestCase):
+    def test_palette_layout(self) -> None:
+        self.assertEqual(len(quantize.XTERM_COLORS), 256)
+        self.assertEqual(quantize.XTERM_COLORS[16], (0, 0, 0))
+        self.assertEqual(quantize.XTERM_COLORS[231], (255, 255, 255))
+        self.assertEqual(quantize.XTERM_COLORS[232], (8, 8, 8))
+
+    def test_matches_brute_force(self) -> None:
+        rng = random.Random(7)
+        samples = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(500)]
+        samples += [(0, 0, 0), (255, 255, 255), (128, 128, 128), (255, 0, 0), (8, 8, 8)]
+        for rgb in samples:
+            with self.subTest(rgb=rgb):
+                self.assertEqual(quantize.nearest_ansi256(rgb), brute_force(rgb, range(16, 256)))
+                self.assertEqual(quantize.nearest_ansi16(rgb), brute_force(rgb, range(16)))
+
+    def test_exact_entries(self) -> None:
+        for index in range(16, 256):
+            rgb = quantize.XTERM_COLORS[index]
+            # The system slots duplicate some cube colors, so compare colors, not indexes.
+            self.assertEqual(quantize.XTERM_COLORS[quantize.nearest_ansi256(rgb)], rgb)
+
+    def test_unknown_palette(self) -> None:
+        with self.assertRaises(KeyError):
+            quantize.quantizer("ansi88")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Tests for template tokens."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import contrast
+from scripts.common import template
+from scripts.common.palette import Palette
+
+
+class BlendTokenTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.palette = Palette(
+            {"bg-main": "#ffffff", "fg-main": "#000000", "blue": "#0000ff", "alias": "blue", "none": "unspecified"},
+            "test",
+        )
+
+    def test_parse(self) -> None:
+        self.assertEqual(template.parse_blend("mix", "bg-main,blue,0.25"), (["bg-main", "blue"], 0.25))
+        self.assertEqual(template.parse_blend("lighten", "blue,1"), (["blue"], 1.0))
+        self.assertEqual(template.parse_blend("alpha", "blue,0x80"), (["blue"], 128 / 255))
+        self.assertEqual(template.parse_blend("alpha", "blue,255"), (["blue"], 1.0))
+        self.assertEqual(template.parse_blend("alpha", "blue,0.5"), (["blue"], 0.5))
+
+    def test_parse_rejects_malformed(self) -> None:
+        for kind, key in (
+            ("mix", "bg-main,0.5"),
+            ("lighten", "bg-main,blue,0.5"),
+            ("darken", ",0.5"),
+            ("mix", "bg-main,blue,half"),
+            ("alpha", "blue,0x100"),
+            ("lighten", "blue,1.5"),
+        ):
+            with self.subTest(kind=kind, key=key), self.assertRaises(ValueError):
+                template.parse_blend(kind, key)
+
+    def test_render(self) -> None:
+        rendered = template.render_template(
+            "{mix:bg-main,fg-main,0.5} {lighten:fg-main,0.5} {darken:bg-main,0} {mix:bg-main,blue,1} "
+            "{alpha:blue,0x80} {alpha:alias,0.5}",
+            self.palette,
+            {},
+            "test",
+        )
+        # Blends are linear-light, so half of black and white is #bcbcbc rather than #808080.
+        self.assertEqual(rendered, "#bcbcbc #bcbcbc #ffffff #0000ff #0000ff80 #0000ff80")
+
+    def test_render_rejects_bad_keys(self) -> None:
+        with self.assertRaises(KeyError):
+            template.render_template("{mix:bg-main,missing,0.5}", self.palette, {}, "test")
+        with self.assertRaises(ValueError):
+            template.render_template("{alpha:none,0x80}", self.palette, {}, "test")
+
+    def test_blend_tokens(self) -> None:
+        text = "{alpha:blue,0x80} {color:blue} {alpha:blue,0x80} {mix:bg-main,blue,0.1}"
+        self.assertEqual(template.blend_tokens(text), [("alpha", "blue,0x80"), ("mix", "bg-main,blue,0.1")])
+
+    def test_overlay_contrast(self) -> None:
+        # A faint overlay composited over white stays readable under black text.
+        self.assertEqual(contrast.validate_blend_contrast(self.palette, {"{alpha:blue,0x20}": "#0000ff20"}), [])
+        # An opaque blue overlay does not.
+        warnings = contrast.validate_blend_contrast(self.palette, {"{alpha:blue,0xff}": "#0000ffff"})
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("fg-main (#000000) on {alpha:blue,0xff} (#0000ffff over bg-main)", warnings[0])
+
+
+class MappingRefTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.palette = Palette({"bg-main": "#ffffff", "red": "#ff0000"}, "test")
+        self.mapping = {"background": "bg-main", "palette": {"1": "red"}, "width": 2}
+
+    def test_render(self) -> None:
+        rendered = template.render_template(
+            "{color:value.background} {ansi256_hex:value.palette.1} {value:width}", self.palette, self.mapping, "test"
+        )
+        self.assertEqual(rendered, "#ffffff #ff0000 2")
+
+    def test_render_rejects_bad_refs(self) -> None:
+        with self.assertRaises(KeyError):
+            template.render_template("{color:value.palette.2}", self.palette, self.mapping, "test")
+        with self.assertRaises(ValueError):
+            template.render_template("{color:value.palette}", self.palette, self.mapping, "test")
+
+    def test_validate(self) -> None:
+        text = "{color:value.palette.1} {rgb:value.palette.9} {color:value.width} {color:value.missing}"
+        errors = template.validate_template(text, {"bg-main", "red"}, set(self.mapping), mapping=self.mapping)
+        self.assertEqual(
+            errors,
+            [
+                "Missing mapping key: palette.9",
+                "Mapping key 'width' does not name a palette key",
+                "Missing mapping key: missing",
+            ],
+        )
+        mapping = {"palette": {"1": "blue"}}
+        self.assertEqual(
+            template.validate_template("{color:value.palette.1}", {"red"}, set(mapping), mapping=mapping),
+            ["Unknown palette key: blue (via value.palette.1)"],
+        )
+
+
+class IncludeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.palette = Palette({"bg-main": "#ffffff", "fg-main": "#000000"}, "test")
+
+    def write(self, name: str, text: str) -> Path:
+        path = self.root / f"{name}.tmpl"
+        path.write_text(text)
+        return path
+
+    def render(self, path: Path, fragments: template.Fragments, context: str = "test") -> str:
+        include = fragments.includer(path, self.palette, {}, "test", context)
+        return template.render_template(path.read_text(), self.palette, {}, "test", include)
+
+    def test_nested_fragments(self) -> None:
+        main = self.write("main", "a {include:outer} b\n")
+        self.write("outer", "[{include:inner}]\n")
+        self.write("inner", "{color:bg-main}\n")
+        fragments = template.Fragments()
+        self.assertEqual(self.render(main, fragments), "a [#ffffff] b\n")
+        self.assertEqual(self.render(main, fragments), "a [#ffffff] b\n")
+        # Each fragment renders once per context.
+        self.assertEqual(fragments.renders, 2)
+        self.render(main, fragments, "other")
+        self.assertEqual(fragments.renders, 4)
+        self.assertEqual(template.fragment_paths(main), [self.root / "outer.tmpl", self.root / "inner.tmpl"])
+        self.assertEqual(template.validate_template(main.read_text(), {"bg-main"}, set(), main), [])
+
+    def test_missing_fragment(self) -> None:
+        main = self.write("main", "{include:outer}")
+        self.write("outer", "{include:nowhere} {color:missing}")
+        with self.assertRaisesRegex(KeyError, "Missing fragment: nowhere"):
+            self.render(main, template.Fragments())
+        self.assertEqual(
+            template.validate_template(main.read_text(), {"bg-main"}, set(), main),
+            ["Missing fragment: nowhere", "outer: Unknown palette key: missing"],
+        )
+
+    def test_include_cycle(self) -> None:
+        main = self.write("main", "{include:a}")
+        self.write("a", "{include:b}")
+        self.write("b", "{include:a}")
+        with self.assertRaisesRegex(ValueError, "Include cycle: main -> a -> b -> a"):
+            self.render(main, template.Fragments())
+        self.assertEqual(
+            template.validate_template(main.read_text(), set(), set(), main),
+            ["Include cycle: main -> a -> b -> a"],
+        )
+        self.assertEqual(template.fragment_paths(main), [self.root / "a.tmpl", self.root / "b.tmpl"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests for syncing and pruning installed themes."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.common import ledger
+from scripts.common import theme_ops
+
+
+class SyncThemesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src_dir = Path(tmp.name) / "src"
+        self.dest_dir = Path(tmp.name) / "dest"
+        self.src_dir.mkdir()
+        for name in ("modus-operandi", "modus-vivendi"):
+            (self.src_dir / f"{name}.conf").write_text(f"# {name}\n")
+        (self.src_dir / "modus-extra.yazi").mkdir()
+        (self.src_dir / "modus-extra.yazi" / "flavor.toml").write_text("[mgr]\n")
+        (self.src_dir / "modus-extra.yazi" / "tmtheme.xml").write_text("<plist/>\n")
+        self.entries: dict[str, dict] = {}
+
+    def sync(self, theme_kind: str = "file") -> list[tuple[Path, Path]]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            synced = theme_ops.sync_themes(
+                self.src_dir, self.dest_dir, self.entries, theme_kind=theme_kind, theme_ext=".conf"
+            )
+        for dest, src in synced:
+            self.entries[str(dest)] = ledger.make_entry(dest, src, "copy", src.stem)
+        return synced
+
+    def test_removes_copy_of_deleted_theme(self) -> None:
+        self.sync()
+        removed = self.dest_dir / "modus-vivendi.conf"
+        self.assertTrue(removed.exists())
+
+        (self.src_dir / "modus-vivendi.conf").unlink()
+        self.sync()
+        self.assertFalse(removed.exists())
+        self.assertNotIn(str(removed), self.entries)
+        self.assertTrue((self.dest_dir / "modus-operandi.conf").exists())
+
+    def test_keeps_edited_copy_of_deleted_theme(self) -> None:
+        self.sync()
+        edited = self.dest_dir / "modus-vivendi.conf"
+        edited.write_text("# my colors\n")
+
+        (self.src_dir / "modus-vivendi.conf").unlink()
+        self.sync()
+        self.assertEqual(edited.read_text(), "# my colors\n")
+        self.assertIn(str(edited), self.entries)
+
+    def test_removes_deleted_files_of_directory_theme(self) -> None:
+        self.sync("dir")
+        dest = self.dest_dir / "modus-extra.yazi"
+        self.assertTrue((dest / "tmtheme.xml").exists())
+
+        (self.src_dir / "modus-extra.yazi" / "tmtheme.xml").unlink()
+        self.sync("dir")
+        self.assertFalse((dest / "tmtheme.xml").exists())
+        self.assertTrue((dest / "flavor.toml").exists())
+
+        for path in (self.src_dir / "modus-extra.yazi").iterdir():
+            path.unlink()
+        (self.src_dir / "modus-extra.yazi").rmdir()
+        (self.src_dir / "modus-other.yazi").mkdir()
+        (self.src_dir / "modus-other.yazi" / "flavor.toml").write_text("[mgr]\n")
+        self.sync("dir")
+        self.assertFalse(dest.exists())
+        self.assertNotIn(str(dest), self.entries)
+
+
+class PruneEntriesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src_dir = Path(tmp.name) / "src"
+        self.dest_dir = Path(tmp.name) / "dest"
+        self.src_dir.mkdir()
+        for name in ("modus-operandi", "modus-vivendi"):
+            (self.src_dir / f"{name}.json").write_text("{}\n")
+        self.entries: dict[str, dict] = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            installed = theme_ops.install_themes(self.src_dir, self.dest_dir, "link")
+        for dest, src in installed:
+            self.entries[str(dest)] = ledger.make_entry(dest, src, "link", src.stem)
+
+    def prune(self) -> tuple[int, int]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return theme_ops.prune_entries(self.dest_dir, self.entries)
+
+    def test_removes_dangling_links(self) -> None:
+        # As when per-theme files are replaced by one family file.
+        for name in ("modus-operandi", "modus-vivendi"):
+            (self.src_dir / f"{name}.json").unlink()
+        (self.src_dir / "modus-themes.json").write_text("{}\n")
+        self.assertEqual(self.prune(), (2, 0))
+        self.assertEqual(list(self.dest_dir.iterdir()), [])
+        self.assertEqual(self.entries, {})
+
+    def test_keeps_live_and_replaced_links(self) -> None:
+        (self.src_dir / "modus-vivendi.json").unlink()
+        replaced = self.dest_dir / "modus-vivendi.json"
+        replaced.unlink()
+        replaced.write_text("# mine\n")
+        self.assertEqual(self.prune(), (0, 1))
+        self.assertEqual(replaced.read_text(), "# mine\n")
+        self.assertTrue((self.dest_dir / "modus-operandi.json").is_symlink())
+        self.assertEqual(len(self.entries), 2)
+
+    def test_uninstall_removes_dangling_link(self) -> None:
+        (self.src_dir / "modus-vivendi.json").unlink()
+        dangling = self.dest_dir / "modus-vivendi.json"
+        with contextlib.redirect_stdout(io.StringIO()):
+            remaining = theme_ops.uninstall_entries({str(dangling): self.entries[str(dangling)]})
+        self.assertEqual(remaining, {})
+        self.assertFalse(dangling.is_symlink())
+
+
+if __name__ == "__main__":
+    unittest.main()